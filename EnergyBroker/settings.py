@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'core',
+    'api',
 ]
 
 MIDDLEWARE = [
@@ -82,6 +83,39 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Кеш обчислених контекстів дашборду та сторінок списку. Ключі містять версію даних
+# (core.data_cache), тож після fetch_energy_data або train_predict_model старі записи просто не читаються.
+# Для кількох процесів без спільної пам'яті можна перейти на файловий кеш:
+# 'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': BASE_DIR / 'cache'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'energybroker',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    }
+}
+
+
+# Model registry
+# Файли версій моделі (нативний формат XGBoost) та інтервал, з яким процеси перевіряють,
+# чи не була просунута нова активна версія.
+
+MODEL_REGISTRY_DIR = BASE_DIR / 'model_registry'
+MODEL_RELOAD_CHECK_SECONDS = 5
+
+
+# Columnar archive
+# Копія EnergyData у файлах Arrow IPC (партиції зона/рік), яку імпорт підтримує в актуальному стані.
+# Навчання та бектест читають її через memory map замість ORM.
+
+ENERGY_ARCHIVE_DIR = BASE_DIR / 'energy_archive'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
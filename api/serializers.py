@@ -1,8 +1,75 @@
 # api/serializers.py
-from rest_framework import serializers
-# from core.models import EnergyData # Додамо пізніше, коли будемо розробляти API
+import json
 
-# class EnergyDataSerializer(serializers.ModelSerializer):
-#     class Meta:
-#         model = EnergyData
-#         fields = '__all__'
\ No newline at end of file
+from asgiref.sync import sync_to_async
+
+from core.models import EnergyData, PricePrediction
+
+ENERGY_DATA_FIELDS = [
+    'timestamp', 'price', 'demand', 'supply', 'temperature',
+    'wind_generation', 'solar_generation',
+    'radiation_direct_horizontal', 'radiation_diffuse_horizontal',
+]
+PREDICTION_FIELDS = ['timestamp', 'predicted_price', 'actual_price', 'recommendation']
+
+# Моделі, доступні через API, та поля, які можна запитувати
+RESOURCES = {
+    'energy-data': (EnergyData, ENERGY_DATA_FIELDS),
+    'predictions': (PricePrediction, PREDICTION_FIELDS),
+}
+
+
+def _encode_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _json_items(values, first):
+    """
+    Елементи JSON-масиву без дужок; продовження масиву починається з коми.
+    """
+    body = json.dumps(values)[1:-1]
+    return body if first else ', ' + body
+
+
+def serialize_rows(rows, fields):
+    """
+    Кортежі values_list -> список об'єктів {поле: значення}.
+    """
+    return [dict(zip(fields, map(_encode_value, row))) for row in rows]
+
+
+def serialize_columns(rows, fields):
+    """
+    Кортежі values_list -> паралельні масиви {поле: [значення, ...]}.
+    """
+    columns = list(zip(*rows)) if rows else [()] * len(fields)
+    return {field: list(map(_encode_value, values)) for field, values in zip(fields, columns)}
+
+
+async def _stream_document(head, batches, serialize):
+    yield head
+    first = True
+    async for batch in batches:
+        # Серіалізація пакета — в пулі потоків, щоб не блокувати цикл подій
+        yield _json_items(await sync_to_async(serialize, thread_sensitive=False)(batch), first)
+        first = False
+    yield ']}'
+
+
+def stream_rows(batches, fields):
+    """
+    Асинхронно генерує JSON-документ {"fields": [...], "results": [{...}, ...]} частинами з асинхронного
+    ітератора пакетів кортежів values_list, не тримаючи в пам'яті ні всього queryset, ні всього документа.
+    """
+    head = f'{{"fields": {json.dumps(fields)}, "results": ['
+    return _stream_document(head, batches, lambda batch: serialize_rows(batch, fields))
+
+
+def stream_column_blocks(batches, fields):
+    """
+    Асинхронно генерує колонковий JSON-документ {"fields": [...], "blocks": [{"поле": [...], ...}, ...]}
+    частинами. Пакети рядків мають надходити з одного проходу (одного запиту, тож стовпці узгоджені між
+    собою); кожен пакет транспонується в окремий блок паралельних масивів.
+    """
+    head = f'{{"fields": {json.dumps(fields)}, "blocks": ['
+    return _stream_document(head, batches, lambda batch: [serialize_columns(batch, fields)])
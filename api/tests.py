@@ -1,3 +1,234 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from xgboost import XGBRegressor
+
+from core import model_registry
+from core.feature_store import refresh_feature_state
+from core.ml_utils import FEATURES
+from core.models import EnergyData
+from core.predictions import save_forecast_run
+
+
+def _stream_parts(response):
+    """
+    Частини тіла потокової відповіді async-представлення (асинхронний ітератор).
+    """
+    async def read():
+        return [part async for part in response.streaming_content]
+    return async_to_sync(read)()
+
+
+class EnergyDataApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        EnergyData.objects.bulk_create([
+            EnergyData(timestamp=start + timedelta(hours=i), price=40 + i, demand=2000 + i,
+                       supply=None, temperature=5.0)
+            for i in range(50)
+        ])
+        for price, label in ((39.0, 'ПРОДАВАТИ'), (41.5, 'КУПУВАТИ')):
+            cls.forecast_run = save_forecast_run(pd.DataFrame({
+                'timestamp': [start], 'predicted_price': [price], 'actual_price': [np.nan], 'recommendation': [label],
+            }))
+
+    def test_keyset_pagination_walks_all_rows_once(self):
+        url = reverse('energy_data_api')
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 15, 'fields': 'price'}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(url, params).json()
+            seen.extend(row['price'] for row in data['results'])
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(seen, [40 + i for i in range(50)])
+
+    def test_time_range_and_columnar_format(self):
+        data = self.client.get(reverse('energy_data_api'), {
+            'start': '2020-01-01T10:00:00Z', 'end': '2020-01-01T12:00:00Z',
+            'fields': 'price,supply', 'format': 'columnar',
+        }).json()
+        self.assertEqual(data['fields'], ['timestamp', 'price', 'supply'])
+        self.assertEqual(data['results']['price'], [50.0, 51.0, 52.0])
+        self.assertEqual(data['results']['supply'], [None, None, None])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_invalid_parameters_return_400(self):
+        url = reverse('energy_data_api')
+        self.assertEqual(self.client.get(url, {'fields': 'password'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'limit': 0}).status_code, 400)
+
+    def test_streaming_export_in_both_formats(self):
+        for response_format in ('rows', 'columnar'):
+            response = self.client.get(reverse('energy_data_export_api'), {'format': response_format})
+            self.assertTrue(response.streaming)
+            data = json.loads(b''.join(_stream_parts(response)))
+            if response_format == 'rows':
+                self.assertEqual(len(data['results']), 50)
+            else:
+                self.assertEqual(data['fields'][0], 'timestamp')
+                self.assertEqual(len(data['blocks'][0]['timestamp']), 50)
+                self.assertEqual(data['blocks'][0]['demand'][-1], 2049.0)
+
+    @patch('api.views.EXPORT_CHUNK_SIZE', 20)
+    def test_columnar_export_reads_all_columns_in_one_pass(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('energy_data_export_api'), {'format': 'columnar', 'fields': 'price'})
+            data = json.loads(b''.join(_stream_parts(response)))
+        # Один запит на весь експорт: стовпці не можуть розійтися через запис між проходами
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([len(block['price']) for block in data['blocks']], [20, 20, 10])
+        self.assertEqual([price for block in data['blocks'] for price in block['price']], [40 + i for i in range(50)])
+        self.assertTrue(all(len(block['timestamp']) == len(block['price']) for block in data['blocks']))
+
+    @patch('api.views.EXPORT_CHUNK_SIZE', 20)
+    def test_export_streams_batches_asynchronously(self):
+        # Асинхронний ітератор: під ASGI Django не збирає весь експорт у пам'ять перед відправкою
+        response = async_to_sync(self.async_client.get)(reverse('energy_data_export_api'))
+        self.assertTrue(response.is_async)
+        parts = _stream_parts(response)
+        self.assertEqual(len(parts), 5)  # Початок документа, три пакети рядків, кінець
+        self.assertEqual(len(json.loads(b''.join(parts))['results']), 50)
+
+    def test_zone_filter(self):
+        EnergyData.objects.create(zone='DK_2', timestamp=datetime(2020, 1, 1, tzinfo=timezone.utc), price=99.0,
+                                  demand=1500.0)
+        url = reverse('energy_data_api')
+        self.assertEqual(len(self.client.get(url, {'limit': 100}).json()['results']), 50)
+        data = self.client.get(url, {'zone': 'DK_2', 'fields': 'price'}).json()
+        self.assertEqual([row['price'] for row in data['results']], [99.0])
+        self.assertEqual(self.client.get(url, {'zone': 'X' * 40}).status_code, 400)
+
+    def test_predictions_endpoint(self):
+        url = reverse('predictions_api')
+        data = self.client.get(url).json()
+        self.assertEqual([row['recommendation'] for row in data['results']], ['КУПУВАТИ'])
+        # Попередній запуск на ту саму годину доступний для порівняння
+        data = self.client.get(url, {'run': self.forecast_run.pk - 1}).json()
+        self.assertEqual([row['predicted_price'] for row in data['results']], [39.0])
+        self.assertEqual(self.client.get(url, {'run': 'latest'}).status_code, 400)
+
+
+class ForecastApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        EnergyData.objects.bulk_create([
+            EnergyData(timestamp=start + timedelta(hours=i), price=40 + i % 24, demand=2000 + 10 * (i % 24),
+                       temperature=5.0, wind_generation=100.0, solar_generation=0.0,
+                       radiation_direct_horizontal=0.0, radiation_diffuse_horizontal=0.0)
+            for i in range(72)
+        ])
+        refresh_feature_state()
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        settings_override = override_settings(MODEL_REGISTRY_DIR=tmp_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        model_registry.clear_model_cache()
+        self.addCleanup(model_registry.clear_model_cache)
+
+    def _register_model(self):
+        # Ціна залежить лише від попиту, тож overrides попиту мають змінювати прогноз
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.normal(size=(300, len(FEATURES))), columns=FEATURES)
+        X['demand'] = rng.uniform(1000, 5000, size=300)
+        model = XGBRegressor(n_estimators=30, max_depth=3).fit(X, X['demand'] / 50)
+        return model_registry.register_model(model, FEATURES)
+
+    def test_forecast_next_hours(self):
+        version = self._register_model()
+        data = self.client.get(reverse('forecast_api')).json()
+        self.assertEqual(data['model_version'], version.pk)
+        self.assertEqual(data['count'], 24)
+        self.assertEqual(data['results'][0]['timestamp'], '2020-01-04T00:00:00+00:00')
+
+    def test_overrides_change_prediction(self):
+        self._register_model()
+        url = reverse('forecast_api')
+        params = {'start': '2020-01-04T05:00:00Z', 'end': '2020-01-04T07:00:00Z'}
+        low = self.client.get(url, {**params, 'demand': 1200}).json()
+        high = self.client.post(url, {**params, 'overrides': {'demand': [4500, 4600, 4700]}},
+                                content_type='application/json').json()
+        self.assertEqual([row['timestamp'][11:16] for row in low['results']], ['05:00', '06:00', '07:00'])
+        self.assertLess(low['results'][0]['predicted_price'], high['results'][0]['predicted_price'])
+
+    def test_recursive_mode(self):
+        self._register_model()
+        data = self.client.post(reverse('forecast_api'), {'mode': 'recursive', 'end': '2020-01-05T23:00:00Z'},
+                                content_type='application/json').json()
+        self.assertEqual(data['mode'], 'recursive')
+        self.assertEqual(data['count'], 48)
+        self.assertEqual(self.client.get(reverse('forecast_api'), {'mode': 'magic'}).status_code, 400)
+
+    def test_invalid_requests(self):
+        url = reverse('forecast_api')
+        self.assertEqual(self.client.get(url).status_code, 503)  # Модель ще не зареєстрована
+        self._register_model()
+        self.assertEqual(self.client.get(url, {'start': '2019-12-31'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'humidity': 5}).status_code, 200)  # Невідомі GET-параметри ігноруються
+        self.assertEqual(self.client.post(url, {'overrides': {'humidity': 5}},
+                                          content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.post(url, {'overrides': {'demand': [1, 2]}},
+                                          content_type='application/json').status_code, 400)
+
+
+class ScheduleApiTests(TestCase):
+    def _save_predictions(self, hours=48):
+        save_forecast_run(pd.DataFrame({
+            'timestamp': pd.date_range('2020-01-04', periods=hours, freq='h', tz='UTC'),
+            'predicted_price': 40 + 20 * np.sin(np.arange(hours) / 24 * 2 * np.pi),
+            'actual_price': np.nan,
+            'recommendation': 'Нейтрально',
+        }))
+
+    def test_plans_every_asset_over_latest_run(self):
+        self._save_predictions()
+        assets = [{'id': 'battery', 'capacity': 10, 'charge_rate': 2.5}, {'daily_volume': 24}]
+        response = self.client.post(reverse('schedule_api'), {'assets': assets}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data['timestamps']), 48)
+        self.assertEqual(data['timestamps'][0], '2020-01-04T00:00:00+00:00')
+        battery, consumer = data['results']
+        self.assertEqual(battery['id'], 'battery')
+        self.assertLess(battery['cost'], 0)  # Арбітраж без споживання лише заробляє
+        self.assertEqual(consumer['id'], 1)
+        self.assertAlmostEqual(consumer['cost'], consumer['baseline_cost'], places=2)
+        self.assertEqual(len(battery['level']), 48)
+
+    def test_hours_limit_horizon(self):
+        self._save_predictions()
+        data = self.client.post(reverse('schedule_api'), {'assets': [{'daily_volume': 24}], 'hours': 24,
+                                                          'start': '2020-01-04T12:00:00Z'},
+                                content_type='application/json').json()
+        self.assertEqual(len(data['timestamps']), 24)
+        self.assertEqual(data['timestamps'][0], '2020-01-04T12:00:00+00:00')
+
+    def test_errors(self):
+        url = reverse('schedule_api')
+        self.assertEqual(self.client.post(url, {'assets': [{}]}, content_type='application/json').status_code, 503)
+        self._save_predictions()
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(self.client.post(url, {'assets': 'battery'}, content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.post(url, {'assets': [{'capacity': -1}]},
+                                          content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.post(url, {'assets': [{}], 'hours': 1000},
+                                          content_type='application/json').status_code, 400)
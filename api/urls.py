@@ -1,7 +1,12 @@
 # api/urls.py
 from django.urls import path
-# from . import views # Додамо пізніше, коли будемо розробляти API
+from . import views
 
 urlpatterns = [
-    # path('energy-data/', views.EnergyDataList.as_view(), name='energy_data_api'),
-]
\ No newline at end of file
+    path('energy-data/', views.series_page, {'resource': 'energy-data'}, name='energy_data_api'),
+    path('energy-data/export/', views.series_export, {'resource': 'energy-data'}, name='energy_data_export_api'),
+    path('predictions/', views.series_page, {'resource': 'predictions'}, name='predictions_api'),
+    path('predictions/export/', views.series_export, {'resource': 'predictions'}, name='predictions_export_api'),
+    path('forecast/', views.forecast, name='forecast_api'),
+    path('schedule/', views.schedule, name='schedule_api'),
+]
@@ -1,8 +1,308 @@
 # api/views.py
-# from rest_framework import generics
-# from api.serializers import EnergyDataSerializer
-# from core.models import EnergyData # Додамо пізніше, коли будемо розробляти API
+import json
+from datetime import datetime, time, timezone
+from functools import partial
 
-# class EnergyDataList(generics.ListAPIView):
-#     queryset = EnergyData.objects.all()
-#     serializer_class = EnergyDataSerializer
\ No newline at end of file
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+
+from api.serializers import RESOURCES, serialize_columns, serialize_rows, stream_column_blocks, stream_rows
+from core.data_access import aiter_batches, read_async
+from core.feature_store import EXOGENOUS_FIELDS, FORECAST_MODES, predict_online
+from core.model_registry import get_active_model
+from core.models import DEFAULT_ZONE, ZONE_MAX_LENGTH
+from core.predictions import DEFAULT_PLAN_HOURS, prediction_prices, run_predictions
+from core.scheduling import DEFAULT_LEVELS, MAX_LEVELS, optimize_schedule
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+EXPORT_CHUNK_SIZE = 2000
+RESPONSE_FORMATS = ('rows', 'columnar')
+
+
+class ApiError(ValueError):
+    pass
+
+
+def _parse_timestamp(value, name, end_of_day=False):
+    """
+    Приймає ISO 8601 дату або дату-час; час без часового поясу вважається UTC.
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        parsed_date = parse_date(value)
+        if parsed_date is None:
+            raise ApiError(f"Invalid '{name}': expected ISO 8601 date or datetime, got '{value}'.")
+        parsed = datetime.combine(parsed_date, time.max if end_of_day else time.min)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _parse_zone(value):
+    """
+    Торгова зона запиту (за замовчуванням DEFAULT_ZONE).
+    """
+    if value in (None, ''):
+        return DEFAULT_ZONE
+    if not isinstance(value, str) or len(value) > ZONE_MAX_LENGTH:
+        raise ApiError(f"Invalid 'zone': expected a zone name of at most {ZONE_MAX_LENGTH} characters.")
+    return value
+
+
+def _query_params(request, resource):
+    """
+    Розбирає спільні параметри: zone, start, end, fields, format. Повертає (queryset, fields, format).
+    """
+    model, allowed_fields = RESOURCES[resource]
+    zone = _parse_zone(request.GET.get('zone'))
+    if resource == 'predictions':
+        # Прогнози поточного запуску зони або, з ?run=, будь-якого збереженого запуску для порівняння
+        run_id = request.GET.get('run')
+        if run_id and not run_id.isdigit():
+            raise ApiError("Invalid 'run': expected a forecast run id.")
+        queryset = run_predictions(zone, int(run_id) if run_id else None)
+    else:
+        # Фільтр за зоною йде першим: індекс (zone, timestamp) обслуговує і діапазон, і курсор
+        queryset = model.objects.filter(zone=zone)
+
+    if request.GET.get('start'):
+        queryset = queryset.filter(timestamp__gte=_parse_timestamp(request.GET['start'], 'start'))
+    if request.GET.get('end'):
+        queryset = queryset.filter(timestamp__lte=_parse_timestamp(request.GET['end'], 'end', end_of_day=True))
+
+    fields = allowed_fields
+    if request.GET.get('fields'):
+        requested = [field.strip() for field in request.GET['fields'].split(',') if field.strip()]
+        unknown = [field for field in requested if field not in allowed_fields]
+        if unknown:
+            raise ApiError(f"Unknown field(s) {unknown}. Available fields: {allowed_fields}")
+        # timestamp завжди перший: він же курсор пагінації
+        fields = ['timestamp'] + [field for field in requested if field != 'timestamp']
+
+    response_format = request.GET.get('format', 'rows')
+    if response_format not in RESPONSE_FORMATS:
+        raise ApiError(f"Invalid 'format': expected one of {list(RESPONSE_FORMATS)}.")
+
+    return queryset.order_by('timestamp'), fields, response_format
+
+
+def _error_response(error):
+    return JsonResponse({'error': str(error)}, status=400)
+
+
+@require_GET
+async def series_page(request, resource):
+    """
+    Сторінка ряду з keyset-пагінацією: ?cursor=<timestamp останнього запису> замість OFFSET,
+    тому кожна сторінка — це пошук за індексом timestamp незалежно від глибини.
+    Запит і серіалізація JSON виконуються в пулі потоків, не блокуючи цикл подій.
+    """
+    try:
+        queryset, fields, response_format = _query_params(request, resource)
+        limit = DEFAULT_PAGE_SIZE
+        if request.GET.get('limit'):
+            try:
+                limit = int(request.GET['limit'])
+            except ValueError:
+                raise ApiError("Invalid 'limit': expected an integer.")
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                raise ApiError(f"Invalid 'limit': expected a value between 1 and {MAX_PAGE_SIZE}.")
+        if request.GET.get('cursor'):
+            queryset = queryset.filter(timestamp__gt=_parse_timestamp(request.GET['cursor'], 'cursor'))
+    except ApiError as e:
+        return _error_response(e)
+
+    # Беремо на один запис більше, щоб дізнатися, чи є наступна сторінка, без COUNT(*)
+    rows = await read_async(lambda: list(queryset.values_list(*fields)[:limit + 1]))
+    return await sync_to_async(_page_response, thread_sensitive=False)(rows, fields, limit, response_format)
+
+
+def _page_response(rows, fields, limit, response_format):
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = rows[-1][0].isoformat() if has_more else None
+    if response_format == 'columnar':
+        data = serialize_columns(rows, fields)
+    else:
+        data = serialize_rows(rows, fields)
+
+    return JsonResponse({
+        'fields': fields,
+        'count': len(rows),
+        'next_cursor': next_cursor,
+        'results': data,
+    })
+
+
+@require_GET
+async def series_export(request, resource):
+    """
+    Потоковий експорт усього діапазону. Рядки читаються одним курсором бази даних частинами
+    (aiter_batches), а JSON віддається частинами через StreamingHttpResponse з асинхронним ітератором,
+    тож під ASGI перший байт іде до того, як прочитано весь діапазон. Колонковий формат —
+    блоками паралельних масивів по EXPORT_CHUNK_SIZE рядків.
+    """
+    try:
+        queryset, fields, response_format = _query_params(request, resource)
+    except ApiError as e:
+        return _error_response(e)
+
+    batches = aiter_batches(queryset.values_list(*fields), EXPORT_CHUNK_SIZE)
+    if response_format == 'columnar':
+        content = stream_column_blocks(batches, fields)
+    else:
+        content = stream_rows(batches, fields)
+
+    response = StreamingHttpResponse(content, content_type='application/json')
+    response['Content-Disposition'] = f'attachment; filename="{resource}.json"'
+    return response
+
+
+def _forecast_params(request):
+    """
+    Параметри прогнозу з query string (GET) або JSON-тіла (POST): zone, start, end, mode (direct/recursive)
+    та overrides екзогенних рядів. У GET override — число; у POST — число або масив погодинних значень.
+    """
+    if request.method == 'POST':
+        try:
+            payload = json.loads(request.body or b'{}')
+        except ValueError:
+            raise ApiError("Request body must be a JSON object.")
+        if not isinstance(payload, dict):
+            raise ApiError("Request body must be a JSON object.")
+        overrides = payload.get('overrides') or {}
+        if not isinstance(overrides, dict):
+            raise ApiError("'overrides' must be an object of {field: number or list}.")
+    else:
+        payload = request.GET
+        overrides = {}
+        for field in EXOGENOUS_FIELDS:
+            if request.GET.get(field):
+                try:
+                    overrides[field] = float(request.GET[field])
+                except ValueError:
+                    raise ApiError(f"Invalid '{field}': expected a number.")
+
+    unknown = [field for field in overrides if field not in EXOGENOUS_FIELDS]
+    if unknown:
+        raise ApiError(f"Unknown override(s) {unknown}. Available overrides: {EXOGENOUS_FIELDS}")
+
+    start = _parse_timestamp(payload['start'], 'start') if payload.get('start') else None
+    end = _parse_timestamp(payload['end'], 'end') if payload.get('end') else None
+    mode = payload.get('mode') or 'direct'
+    if mode not in FORECAST_MODES:
+        raise ApiError(f"Invalid 'mode': expected one of {list(FORECAST_MODES)}.")
+    return _parse_zone(payload.get('zone')), start, end, overrides, mode
+
+
+def _predict_online(zone, start, end, overrides, mode):
+    loaded_model = get_active_model(zone)
+    return loaded_model, *predict_online(loaded_model, start, end, overrides, mode, key=zone)
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+async def forecast(request):
+    """
+    Online-прогноз ціни зони для діапазону годин після останньої фактичної. Ознаки беруться зі
+    сховища ознак (core.feature_store), модель зони — з кешу процесу, тож запит не читає історію
+    і не будує DataFrame. Читання стану й прогноз виконуються в пулі потоків.
+    """
+    try:
+        zone, start, end, overrides, mode = _forecast_params(request)
+        loaded_model, timestamps, predictions, state = await read_async(
+            partial(_predict_online, zone, start, end, overrides, mode))
+    except ValueError as e:  # ApiError, некоректний діапазон або overrides
+        return _error_response(e)
+    except (FileNotFoundError, LookupError) as e:
+        return JsonResponse({'error': str(e)}, status=503)
+
+    return JsonResponse({
+        'zone': zone,
+        'model_version': loaded_model.version,
+        'mode': mode,
+        'as_of': state.as_of.isoformat(),
+        'fields': ['timestamp', 'predicted_price'],
+        'count': len(timestamps),
+        'results': [
+            {'timestamp': timestamp.isoformat(), 'predicted_price': float(price)}
+            for timestamp, price in zip(timestamps, predictions)
+        ],
+    })
+
+
+def _schedule_params(request):
+    """
+    JSON-тіло запиту плану: assets (список параметрів core.scheduling.ASSET_DEFAULTS, необов'язковий id),
+    zone (зона прогнозів), start (початок горизонту), hours (до DEFAULT_PLAN_HOURS)
+    та levels (мінімальна кількість рівнів сітки).
+    """
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        raise ApiError("Request body must be a JSON object.")
+    if not isinstance(payload, dict):
+        raise ApiError("Request body must be a JSON object.")
+    assets = payload.get('assets')
+    if not isinstance(assets, list):
+        raise ApiError("'assets' must be a list of asset objects.")
+
+    start = _parse_timestamp(payload['start'], 'start') if payload.get('start') else None
+    try:
+        hours = int(payload.get('hours') or DEFAULT_PLAN_HOURS)
+        levels = int(payload.get('levels') or DEFAULT_LEVELS)
+    except (TypeError, ValueError):
+        raise ApiError("'hours' and 'levels' must be integers.")
+    if not 1 <= hours <= DEFAULT_PLAN_HOURS:
+        raise ApiError(f"'hours' must be between 1 and {DEFAULT_PLAN_HOURS}.")
+    if not 2 <= levels <= MAX_LEVELS:
+        raise ApiError(f"'levels' must be between 2 and {MAX_LEVELS}.")
+    return assets, _parse_zone(payload.get('zone')), start, hours, levels
+
+
+def _rounded(values):
+    return np.round(values, 4).tolist()
+
+
+@csrf_exempt
+@require_POST
+async def schedule(request):
+    """
+    Оптимальний план купівлі-продажу для кожного активу за прогнозованими цінами PricePrediction зони.
+    Усі активи плануються одним векторним динамічним програмуванням (core.scheduling) у пулі потоків,
+    тож довга оптимізація не блокує цикл подій.
+    """
+    try:
+        assets, zone, start, hours, levels = _schedule_params(request)
+        timestamps, prices = await read_async(partial(prediction_prices, start, hours, zone))
+        plan = await sync_to_async(optimize_schedule, thread_sensitive=False)(prices, assets, levels)
+    except ValueError as e:  # ApiError, некоректні параметри активів або пропуски в прогнозах
+        return _error_response(e)
+    except LookupError as e:
+        return JsonResponse({'error': str(e)}, status=503)
+
+    results = []
+    for n, asset in enumerate(assets):
+        feasible = bool(plan.feasible[n])
+        results.append({
+            'id': asset.get('id', n),
+            'feasible': feasible,
+            'cost': round(float(plan.cost[n]), 2) if feasible else None,
+            'baseline_cost': round(float(plan.baseline_cost[n]), 2),
+            'buy': _rounded(plan.buy[n]) if feasible else None,
+            'sell': _rounded(plan.sell[n]) if feasible else None,
+            'level': _rounded(plan.level[n]) if feasible else None,
+        })
+    return JsonResponse({
+        'zone': zone,
+        'timestamps': [timestamp.isoformat() for timestamp in timestamps],
+        'predicted_price': _rounded(prices),
+        'count': len(results),
+        'results': results,
+    })
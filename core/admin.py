@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import EnergyData, PricePrediction # Додано PricePrediction
+from .models import EnergyData, PricePrediction, ModelVersion, TuningTrial, ForecastRun # Додано PricePrediction
 
 @admin.register(EnergyData)
 class EnergyDataAdmin(admin.ModelAdmin):
@@ -13,8 +13,29 @@ class EnergyDataAdmin(admin.ModelAdmin):
 
 @admin.register(PricePrediction) # Реєструємо нову модель
 class PricePredictionAdmin(admin.ModelAdmin):
-    list_display = ('timestamp', 'predicted_price', 'actual_price', 'recommendation')
+    list_display = ('timestamp', 'predicted_price', 'price_p10', 'price_p90', 'actual_price', 'recommendation', 'run')
     list_filter = ('timestamp',)
     search_fields = ('timestamp',)
     date_hierarchy = 'timestamp'
-    list_per_page = 25
\ No newline at end of file
+    list_per_page = 25
+
+@admin.register(ModelVersion)
+class ModelVersionAdmin(admin.ModelAdmin):
+    list_display = ('id', 'is_active', 'train_start', 'train_end', 'created_at', 'promoted_at')
+    list_filter = ('is_active',)
+    readonly_fields = ('artifact', 'features', 'metrics', 'params', 'created_at', 'promoted_at')
+    list_per_page = 25
+
+@admin.register(TuningTrial)
+class TuningTrialAdmin(admin.ModelAdmin):
+    list_display = ('study', 'number', 'rmse', 'mae', 'seconds', 'created_at')
+    list_filter = ('study',)
+    readonly_fields = ('params', 'fold_rmse', 'best_iterations', 'created_at')
+    list_per_page = 25
+
+@admin.register(ForecastRun)
+class ForecastRunAdmin(admin.ModelAdmin):
+    list_display = ('id', 'zone', 'is_current', 'model_version', 'mode', 'strategy', 'horizon_start', 'horizon_end',
+                    'rows', 'created_at')
+    list_filter = ('zone', 'is_current', 'mode', 'strategy')
+    list_per_page = 25
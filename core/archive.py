@@ -0,0 +1,177 @@
+"""
+Колонковий архів EnergyData.
+
+Копія таблиці у файлах Arrow IPC без стиснення, розбитих на партиції за зоною та роком:
+ENERGY_ARCHIVE_DIR/zone=<зона>/year=<рік>.arrow. Навчання, бектест і підбір параметрів читають
+лише потрібні стовпці й роки через memory map, без Python-об'єкта на кожен рядок, як у ORM.
+
+Імпорт переписує зачеплені партиції після запису в базу. Архів вважається актуальним, лише
+поки версія даних, з якої його зібрано (DataVersion 'energy_archive'), збігається з поточною
+версією EnergyData; інакше читання йде з бази. Перед повною перебудовою версія архіву
+скидається окремим записом, тож під час перебудови читачі теж переходять на базу.
+Без pyarrow архів вимкнений.
+"""
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import ExtractYear
+
+from core.data_access import read_frame
+from core.data_cache import ENERGY_DATA_VERSION, get_data_version, get_data_versions
+from core.models import DataVersion, EnergyData
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import feather
+except ImportError:  # pragma: no cover
+    pa = None
+
+ARCHIVE_VERSION = 'energy_archive'
+ARCHIVE_SUFFIX = '.arrow'
+ARCHIVE_FIELDS = [
+    'price', 'demand', 'supply', 'temperature', 'wind_generation', 'solar_generation',
+    'radiation_direct_horizontal', 'radiation_diffuse_horizontal',
+]
+
+
+def archive_dir():
+    return Path(getattr(settings, 'ENERGY_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'energy_archive'))
+
+
+def partition_path(zone, year):
+    return archive_dir() / f'zone={zone}' / f'year={year}{ARCHIVE_SUFFIX}'
+
+
+def _schema():
+    return pa.schema([
+        ('timestamp', pa.timestamp('us', tz='UTC')),
+        *[(field, pa.float64()) for field in ARCHIVE_FIELDS],
+    ])
+
+
+def _year_bounds(year):
+    return datetime(year, 1, 1, tzinfo=timezone.utc), datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+
+
+def export_partition(zone, year):
+    """
+    Записує рядки зони за рік у файл партиції (або видаляє файл, якщо рядків немає).
+    Файл записується під тимчасовою назвою й перейменовується, тож читачі не бачать частковий файл.
+    Повертає кількість рядків.
+    """
+    year_start, year_end = _year_bounds(year)
+    frame = read_frame(
+        EnergyData.objects.filter(zone=zone, timestamp__gte=year_start, timestamp__lt=year_end).order_by('timestamp'),
+        ['timestamp', *ARCHIVE_FIELDS],
+    )
+    path = partition_path(zone, year)
+    if frame.empty:
+        path.unlink(missing_ok=True)
+        return 0
+
+    table = pa.Table.from_pandas(frame, schema=_schema(), preserve_index=False)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'{path.name}.tmp')
+    # Без стиснення: лише такий файл читається через memory map без копіювання
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    tmp_path.replace(path)
+    return len(frame)
+
+
+def _partitions_in_database():
+    return set(
+        EnergyData.objects.annotate(year=ExtractYear('timestamp'))
+        .values_list('zone', 'year').distinct().order_by()
+    )
+
+
+def sync_archive(partitions=None, since=None):
+    """
+    Переписує партиції partitions (множина пар (зона, рік)) і позначає архів актуальним.
+    Якщо архів не був актуальним на версії даних since (або partitions=None), архів
+    перебудовується повністю. Повертає кількість записаних партицій або None без pyarrow.
+    Викликається поза транзакцією, щоб скидання версії перед перебудовою було зафіксоване.
+    """
+    if pa is None:
+        return None
+
+    rebuild = partitions is None or since is None or get_data_version(ARCHIVE_VERSION) != since
+    if rebuild:
+        # Спершу архів позначається неактуальним (окремою зафіксованою транзакцією), і лише потім
+        # видаляються файли: інакше читачі, для яких версії ще збігаються, бачили б частковий архів
+        with transaction.atomic():
+            DataVersion.objects.update_or_create(name=ARCHIVE_VERSION, defaults={'version': 0})
+        shutil.rmtree(archive_dir(), ignore_errors=True)
+
+    with transaction.atomic():
+        version = get_data_version()
+        if rebuild:
+            partitions = _partitions_in_database()
+        for zone, year in sorted(partitions):
+            export_partition(zone, int(year))
+        DataVersion.objects.update_or_create(name=ARCHIVE_VERSION, defaults={'version': version})
+    return len(partitions)
+
+
+def archive_is_current(zones):
+    """
+    Чи можна читати зони zones з архіву: pyarrow доступний, архів зібрано з поточної
+    версії даних і для кожної зони є файли.
+    """
+    if pa is None:
+        return False
+    data_version, version = get_data_versions((ENERGY_DATA_VERSION, ARCHIVE_VERSION))
+    if not data_version or version != data_version:
+        return False
+    return all(any((archive_dir() / f'zone={zone}').glob(f'year=*{ARCHIVE_SUFFIX}')) for zone in zones)
+
+
+def _read_archive(zones, fields, start, end):
+    tables = []
+    for zone in sorted(zones):
+        paths = sorted(
+            (int(path.stem.split('=', 1)[1]), path)
+            for path in (archive_dir() / f'zone={zone}').glob(f'year=*{ARCHIVE_SUFFIX}')
+        )
+        for year, path in paths:
+            # Партиції поза діапазоном не відкриваються
+            if (start is not None and year < start.year) or (end is not None and year > end.year):
+                continue
+            table = feather.read_table(path, columns=['timestamp', *fields], memory_map=True)
+            if start is not None:
+                table = table.filter(pc.greater_equal(table['timestamp'], pa.scalar(start, type=_schema()[0].type)))
+            if end is not None:
+                table = table.filter(pc.less_equal(table['timestamp'], pa.scalar(end, type=_schema()[0].type)))
+            tables.append(table.add_column(0, 'zone', pa.array([zone] * len(table), type=pa.string())))
+
+    if not tables:
+        return pd.DataFrame(columns=['zone', 'timestamp', *fields])
+    return pa.concat_tables(tables).to_pandas()
+
+
+def _read_database(zones, fields, start, end):
+    queryset = EnergyData.objects.filter(zone__in=zones)
+    if start is not None:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end is not None:
+        queryset = queryset.filter(timestamp__lte=end)
+    return read_frame(queryset.order_by('zone', 'timestamp'), ['zone', 'timestamp', *fields])
+
+
+def load_energy_frame(zones, fields=None, start=None, end=None):
+    """
+    Дані зон zones (стовпці zone, timestamp та fields) за [start, end], відсортовані за зоною й часом.
+    Читає з архіву, якщо він актуальний, інакше з бази; джерело — у frame.attrs['source'].
+    """
+    fields = list(ARCHIVE_FIELDS if fields is None else fields)
+    if archive_is_current(zones):
+        frame, source = _read_archive(zones, fields, start, end), 'archive'
+    else:
+        frame, source = _read_database(zones, fields, start, end), 'database'
+    frame.attrs['source'] = source
+    return frame
@@ -0,0 +1,185 @@
+"""
+Бектестинг моделі прогнозування цін за схемою rolling origin (walk-backward).
+
+Ознаки рахуються один раз для всієї історії, зберігаються у тимчасові .npy і відкриваються
+процесами-воркерами через memmap, тож кожен фолд лише вирізає свої рядки. Фолди (навчання +
+оцінка) виконуються паралельно в пулі процесів.
+
+Опорна ціна правила рекомендацій і цінові ознаки беруться лише з цін до години, що оцінюється:
+перші REFERENCE_WINDOW годин історії, для яких повного вікна ще немає, у бектест не входять.
+
+Модуль не імпортує Django: воркерам не потрібні ні налаштування, ні база даних.
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+from xgboost import XGBRegressor
+
+from core.recommendations import threshold_signals
+
+_ARRAYS = ('X', 'y', 'timestamps', 'reference')
+REFERENCE_WINDOW = 24  # Години до t, за якими рахується опорна середня ціна (як price_rolling_mean_24h)
+_worker_arrays = None  # Масиви, відкриті в процесі-воркері (memmap)
+
+
+class Fold:
+    """
+    Межі одного фолду як позиції рядків: [train_start, validation_start) — навчання,
+    [validation_start, test_start) — рання зупинка, [test_start, test_end) — оцінка.
+    """
+
+    def __init__(self, number, train_start, validation_start, test_start, test_end):
+        self.number = number
+        self.train_start = train_start
+        self.validation_start = validation_start
+        self.test_start = test_start
+        self.test_end = test_end
+
+
+def make_folds(timestamps, folds, test_days=30, step_days=None, validation_days=14, train_days=None,
+               min_train_rows=24 * 90):
+    """
+    Фолди від кінця історії назад: k-й тестовий період закінчується на k * step_days раніше.
+    train_days=None — навчання на всій попередній історії (expanding window).
+    timestamps — відсортований масив datetime64.
+    """
+    step_days = step_days or test_days
+    day = np.timedelta64(1, 'D')
+    end = timestamps[-1] + np.timedelta64(1, 'h')
+
+    result = []
+    for number in range(folds):
+        test_end_time = end - number * step_days * day
+        test_start_time = test_end_time - test_days * day
+        validation_start_time = test_start_time - validation_days * day
+
+        test_end = int(np.searchsorted(timestamps, test_end_time))
+        test_start = int(np.searchsorted(timestamps, test_start_time))
+        validation_start = int(np.searchsorted(timestamps, validation_start_time))
+        train_start = 0
+        if train_days:
+            train_start = int(np.searchsorted(timestamps, validation_start_time - train_days * day))
+
+        if validation_start - train_start < min_train_rows:
+            break  # Далі в минуле навчальні набори лише коротші
+        if test_end <= test_start or test_start <= validation_start:
+            continue
+        result.append(Fold(number + 1, train_start, validation_start, test_start, test_end))
+    return result
+
+
+def prior_mean_reference(prices, window=REFERENCE_WINDOW):
+    """
+    Середня ціна за window годин строго до кожної години (поточна ціна не входить).
+    Для перших window годин повного вікна немає — NaN, і правило за ними не торгує.
+    """
+    prices = np.asarray(prices, dtype=float)
+    reference = np.full(len(prices), np.nan)
+    if len(prices) > window:
+        sums = np.concatenate([[0.0], np.cumsum(prices)])
+        reference[window:] = (sums[window:-1] - sums[:-window - 1]) / window
+    return reference
+
+
+def trading_pnl(actual, predicted, reference, buy_threshold, sell_threshold):
+    """
+    PnL правила generate_recommendations на 1 MWh за годину: КУПУВАТИ, якщо прогноз нижче
+    reference * buy_threshold, ПРОДАВАТИ — якщо вище reference * sell_threshold.
+    Купівля заробляє (reference - фактична ціна), продаж — (фактична ціна - reference),
+    тобто результат порівнюється з торгівлею за середньою ціною за 24 години до угоди
+    (prior_mean_reference); години з reference = NaN не торгуються. Повертає (pnl, кількість угод).
+    """
+    signals = threshold_signals(None, predicted, reference, buy_threshold, sell_threshold)
+    # BUY_SIGNAL = 1, SELL_SIGNAL = -1: купівля заробляє reference - actual, продаж — навпаки
+    pnl = signals * (reference - actual)
+    return float(np.nansum(pnl)), int(np.count_nonzero(signals))
+
+
+def save_arrays(directory, arrays):
+    """
+    Зберігає масиви як .npy, щоб процеси-воркери відкрили їх через memmap без копіювання.
+    """
+    for name, values in arrays.items():
+        np.save(Path(directory) / f'{name}.npy', values)
+
+
+def open_arrays(directory, names):
+    return {name: np.load(Path(directory) / f'{name}.npy', mmap_mode='r') for name in names}
+
+
+def _open_arrays(directory):
+    global _worker_arrays
+    _worker_arrays = open_arrays(directory, _ARRAYS)
+
+
+def _run_fold(fold, params, thresholds):
+    started = time.perf_counter()
+    arrays = _worker_arrays
+    X, y = arrays['X'], arrays['y']
+    train = slice(fold.train_start, fold.validation_start)
+    validation = slice(fold.validation_start, fold.test_start)
+    test = slice(fold.test_start, fold.test_end)
+
+    model = XGBRegressor(**params)
+    model.fit(X[train], y[train], eval_set=[(X[validation], y[validation])], verbose=False)
+
+    predicted = model.predict(X[test])
+    actual = np.asarray(y[test])
+    pnl, trades = trading_pnl(actual, predicted, np.asarray(arrays['reference'][test]), *thresholds)
+    timestamps = arrays['timestamps']
+    return {
+        'fold': fold.number,
+        'train_start': timestamps[fold.train_start].item(),
+        'test_start': timestamps[fold.test_start].item(),
+        'test_end': timestamps[fold.test_end - 1].item(),
+        'train_rows': fold.validation_start - fold.train_start,
+        'test_rows': fold.test_end - fold.test_start,
+        'rmse': float(np.sqrt(mean_squared_error(actual, predicted))),
+        'mae': float(mean_absolute_error(actual, predicted)),
+        'pnl': pnl,
+        'trades': trades,
+        'best_iteration': getattr(model, 'best_iteration', None),
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def run_backtest(X, y, timestamps, reference, folds, params, thresholds, workers=None, on_result=None):
+    """
+    Навчає та оцінює модель на кожному фолді в пулі з workers процесів (за замовчуванням — усі ядра).
+    reference — ряд, з яким правило рекомендацій порівнює прогноз (prior_mean_reference).
+    thresholds — (buy_threshold, sell_threshold). Повертає результати фолдів у порядку folds.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(folds)))
+    # Потоки XGBoost ділять ядра між процесами, щоб пул не перевантажував CPU
+    params = {**params, 'n_jobs': max(1, (os.cpu_count() or 1) // workers)}
+
+    with tempfile.TemporaryDirectory(prefix='backtest-') as directory:
+        save_arrays(directory, {
+            'X': np.ascontiguousarray(X, dtype=np.float32),
+            'y': np.asarray(y, dtype=np.float64),
+            'timestamps': np.asarray(timestamps, dtype='datetime64[s]'),
+            'reference': np.asarray(reference, dtype=np.float64),
+        })
+
+        if workers == 1:
+            _open_arrays(directory)
+            results = []
+            for fold in folds:
+                results.append(_run_fold(fold, params, thresholds))
+                if on_result:
+                    on_result(results[-1])
+            return results
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_arrays, initargs=(directory,)) as pool:
+            futures = [pool.submit(_run_fold, fold, params, thresholds) for fold in folds]
+            results = []
+            for future in futures:
+                results.append(future.result())
+                if on_result:
+                    on_result(results[-1])
+            return results
@@ -0,0 +1,757 @@
+"""
+Бенчмарки продуктивності.
+
+Набори, яким потрібна база даних, запускаються на окремій тестовій базі
+(так само, як test runner), тому робочі дані не змінюються. Запуск: python manage.py run_benchmarks <suite>
+"""
+import asyncio
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from django.contrib.staticfiles import finders
+from django.core.asgi import get_asgi_application
+from django.core.cache import cache
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils.html import escapejs
+
+from core.archive import ARCHIVE_FIELDS, load_energy_frame, sync_archive
+from core.chart_payload import brotli, compress_payload, encode_chart_payload
+from core.data_access import read_frame
+from core.downsampling import lttb_indices
+from core.feature_engine import FeatureEngine
+from core.ingest import peak_memory_mb, upsert_frame
+from core.models import DEFAULT_ZONE, EnergyData, PricePrediction
+from core.forecasting import recursive_forecast
+from core.ml_utils import FEATURES, TARGET, create_features
+from core.pagination import keyset_paginate
+from core.predictions import run_predictions, save_forecast_run
+from core.recommendations import STRATEGIES, recommend
+from core.scheduling import optimize_schedule
+from core.simulation import residual_pools, simulate_prices
+from core.rollups import choose_resolution
+from core.views import RESOLUTION_STEPS, _dashboard_actuals, _dashboard_charts, _dashboard_predictions
+
+HOURS_PER_YEAR = 365 * 24
+
+
+@contextmanager
+def isolated_database():
+    """
+    Створює тимчасову тестову базу з усіма міграціями і видаляє її після виходу.
+    """
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def synthetic_energy_frame(hours, start='2015-01-01', seed=42, zone=DEFAULT_ZONE):
+    """
+    Синтетичний погодинний ряд зони з добовою та сезонною складовими у форматі полів EnergyData.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range(start=start, periods=hours, freq='h', tz='UTC')
+    hour = timestamps.hour.to_numpy()
+    dayofyear = timestamps.dayofyear.to_numpy()
+    daily = np.sin((hour - 6) / 24 * 2 * np.pi)
+    seasonal = np.cos((dayofyear - 15) / 365 * 2 * np.pi)
+
+    solar = np.clip(daily, 0, None) * (300 - 150 * seasonal) + rng.normal(0, 10, hours).clip(0)
+    return pd.DataFrame({
+        'zone': zone,
+        'timestamp': timestamps,
+        'price': 45 + 15 * daily + 10 * seasonal + rng.normal(0, 8, hours),
+        'demand': 2000 + 400 * daily + 300 * seasonal + rng.normal(0, 100, hours),
+        'supply': np.nan,
+        'temperature': 8 - 10 * seasonal + 4 * daily + rng.normal(0, 2, hours),
+        'wind_generation': np.abs(800 + rng.normal(0, 350, hours)),
+        'solar_generation': solar,
+        'radiation_direct_horizontal': solar * 0.8,
+        'radiation_diffuse_horizontal': solar * 0.3,
+    })
+
+
+def load_energy_data(frame, chunksize=50_000):
+    """
+    Записує синтетичні дані в EnergyData тим самим шляхом, що й імпорт CSV.
+    """
+    for start in range(0, len(frame), chunksize):
+        upsert_frame(frame.iloc[start:start + chunksize])
+
+
+def load_predictions(frame):
+    save_forecast_run(pd.DataFrame({
+        'timestamp': frame['timestamp'],
+        'predicted_price': frame['price'],
+        'actual_price': np.nan,
+        'recommendation': 'Нейтрально',
+    }))
+
+
+def timed(fn, repeat):
+    """
+    Виконує fn repeat разів. Повертає (медіана, мінімум) у мілісекундах.
+    """
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations), min(durations)
+
+
+def query_plan(fn):
+    """
+    План виконання (EXPLAIN) останнього SQL-запиту, який виконує fn.
+    """
+    with CaptureQueriesContext(connection) as captured:
+        fn()
+    sql = captured.captured_queries[-1]['sql']
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql)
+        return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+
+
+def _dashboard_queries(last_timestamp):
+    month_start = last_timestamp - timedelta(days=30)
+    year_start = last_timestamp - timedelta(days=365)
+    value_fields = (
+        'timestamp', 'price', 'demand', 'supply', 'temperature', 'wind_generation', 'solar_generation',
+        'radiation_direct_horizontal', 'radiation_diffuse_horizontal',
+    )
+    # Запити дашборду, списку та навчання завжди обмежені однією зоною
+    zone_data = EnergyData.objects.filter(zone=DEFAULT_ZONE)
+    zone_predictions = run_predictions(DEFAULT_ZONE)
+    return [
+        ('latest timestamp',
+         lambda: list(zone_data.order_by('-timestamp').values_list('timestamp', flat=True)[:1])),
+        ('dashboard actuals, 30 days',
+         lambda: read_frame(zone_data.filter(timestamp__gte=month_start, timestamp__lte=last_timestamp)
+                            .order_by('timestamp'), value_fields)),
+        ('dashboard actuals, 1 year',
+         lambda: read_frame(zone_data.filter(timestamp__gte=year_start, timestamp__lte=last_timestamp)
+                            .order_by('timestamp'), value_fields)),
+        ('dashboard predictions, 30 days',
+         lambda: read_frame(zone_predictions.filter(timestamp__gte=month_start, timestamp__lte=last_timestamp)
+                            .order_by('timestamp'), ('timestamp', 'predicted_price', 'recommendation'))),
+        ('list sort -price, page 1',
+         lambda: list(zone_data.order_by('-price')[:50])),
+        ('list sort temperature, page 100',
+         lambda: list(zone_data.order_by('temperature')[4950:5000])),
+        ('list 1 year sort -demand, page 1',
+         lambda: list(zone_data.filter(timestamp__gte=year_start).order_by('-demand')[:50])),
+        ('list count, price filter',
+         lambda: zone_data.filter(price__gte=60, price__lte=80).count()),
+        ('list count, 1 year',
+         lambda: zone_data.filter(timestamp__gte=year_start).count()),
+        ('training scan (timestamp, price)',
+         lambda: list(zone_data.order_by('timestamp').values_list('timestamp', 'price'))),
+    ]
+
+
+def _drop_dashboard_indexes():
+    """
+    Повертає схему до стану без індексів: знімає унікальність (zone, timestamp) та всі Meta.indexes.
+    """
+    with connection.schema_editor() as editor:
+        for model in (EnergyData, PricePrediction):
+            for constraint in model._meta.constraints:
+                editor.remove_constraint(model, constraint)
+            for index in model._meta.indexes:
+                editor.remove_index(model, index)
+
+
+def bench_indexes(write, options):
+    """
+    Плани та затримки запитів дашборду, списку та навчання до і після індексів.
+    """
+    hours = options['years'] * HOURS_PER_YEAR
+    with isolated_database():
+        write(f"Generating {hours} hourly rows ({options['years']} years)...")
+        frame = synthetic_energy_frame(hours)
+        load_energy_data(frame)
+        load_predictions(frame)
+        last_timestamp = frame['timestamp'].iloc[-1].to_pydatetime()
+        queries = _dashboard_queries(last_timestamp)
+
+        results = {}
+        for phase in ('after', 'before'):
+            if phase == 'before':
+                _drop_dashboard_indexes()
+            for name, fn in queries:
+                median_ms, min_ms = timed(fn, options['repeat'])
+                results.setdefault(name, {})[phase] = (median_ms, min_ms, query_plan(fn))
+
+        for name, _ in queries:
+            write(f"\n== {name}")
+            for phase in ('before', 'after'):
+                median_ms, min_ms, plan = results[name][phase]
+                write(f"  {phase:>6}: median {median_ms:9.2f} ms, min {min_ms:9.2f} ms")
+                for line in plan:
+                    write(f"          {line}")
+            speedup = results[name]['before'][0] / max(results[name]['after'][0], 1e-9)
+            write(f"  speedup: x{speedup:.1f}")
+
+
+def bench_downsampling(write, options):
+    """
+    Вартість LTTB проти економії на розмірі та серіалізації JSON-ряду графіка.
+    """
+    rng = np.random.default_rng(42)
+    write(f"{'points':>10} {'target':>7} {'lttb ms':>9} {'full json ms':>13} {'full KB':>10} {'sampled KB':>11} {'saved':>7}")
+    for points in (10_000, 100_000, 1_000_000):
+        y = np.cumsum(rng.normal(size=points)) + 50
+        full_values = y.tolist()
+        full_json_ms, _ = timed(lambda: json.dumps(full_values), options['repeat'])
+        full_kb = len(json.dumps(full_values)) / 1024
+        for target in (500, 1_000, 2_000):
+            lttb_ms, _ = timed(lambda: lttb_indices(y, target), options['repeat'])
+            sampled_kb = len(json.dumps(y[lttb_indices(y, target)].tolist())) / 1024
+            write(f"{points:>10} {target:>7} {lttb_ms:>9.2f} {full_json_ms:>13.2f} {full_kb:>10.1f} "
+                  f"{sampled_kb:>11.1f} {1 - sampled_kb / full_kb:>7.1%}")
+
+
+def load_dashboard_dataset(years):
+    """
+    Фактичні дані за years років, прогнози за останні 30 днів і на 7 днів уперед.
+    Повертає час останнього фактичного запису.
+    """
+    frame = synthetic_energy_frame(years * HOURS_PER_YEAR)
+    load_energy_data(frame)
+    last_timestamp = frame['timestamp'].iloc[-1]
+    future = synthetic_energy_frame(7 * 24, start=last_timestamp + pd.Timedelta(hours=1), seed=7)
+    load_predictions(pd.concat([frame.tail(30 * 24), future]))
+    return last_timestamp
+
+
+def bench_dashboard(write, options):
+    """
+    CPU-час та розмір відповіді energy_dashboard (HTML) і energy_dashboard_chart_data (двійкові ряди
+    графіків, які сторінка завантажує окремим запитом) для діапазонів 1 місяць, 1 рік, 5 років,
+    а також затримка повторного запиту з кешу.
+    """
+    years = max(options['years'], 5)
+    with isolated_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+        write(f"Generating {years} years of hourly data...")
+        end_date = (load_dashboard_dataset(years) + pd.Timedelta(days=7)).date()
+        client = Client()
+        views = {'html': 'energy_dashboard', 'chart data': 'energy_dashboard_chart_data'}
+
+        write(f"{'view':>10} {'range':>8} {'max_points':>10} {'cpu ms':>9} {'wall ms':>9} {'cached ms':>10} {'KB':>8}")
+        for view, url_name in views.items():
+            for label, days in (('1 month', 30), ('1 year', 365), ('5 years', 5 * 365)):
+                for max_points in (1000, 0):
+                    url = (f"{reverse(url_name)}?start_date={end_date - timedelta(days=days)}"
+                           f"&end_date={end_date}&max_points={max_points}")
+                    cpu, wall, cached = [], [], []
+                    for _ in range(options['repeat']):
+                        cache.clear()  # Повне обчислення контексту
+                        cpu_started, wall_started = time.process_time(), time.perf_counter()
+                        response = client.get(url)
+                        cpu.append((time.process_time() - cpu_started) * 1000)
+                        wall.append((time.perf_counter() - wall_started) * 1000)
+                        cached_started = time.perf_counter()
+                        client.get(url)
+                        cached.append((time.perf_counter() - cached_started) * 1000)
+                    write(f"{view:>10} {label:>8} {max_points:>10} {statistics.median(cpu):>9.1f} "
+                          f"{statistics.median(wall):>9.1f} {statistics.median(cached):>10.1f} "
+                          f"{len(response.content) / 1024:>8.1f}")
+
+
+def bench_pagination(write, options):
+    """
+    Затримка глибоких сторінок energy_list: OFFSET проти keyset-курсора.
+    """
+    per_page = 50
+    with isolated_database():
+        hours = options['years'] * HOURS_PER_YEAR
+        write(f"Generating {hours} hourly rows ({options['years']} years)...")
+        load_energy_data(synthetic_energy_frame(hours))
+        queryset = EnergyData.objects.filter(zone=DEFAULT_ZONE)
+
+        write(f"{'sort':>12} {'page':>7} {'offset ms':>10} {'keyset ms':>10}")
+        for sort_by in ('-timestamp', 'price'):
+            ordered = queryset.order_by(sort_by, '-timestamp' if sort_by.startswith('-') else 'timestamp')
+            last_page = hours // per_page
+            for page in sorted({1, min(100, last_page), min(1_000, last_page), last_page}):
+                offset = (page - 1) * per_page
+                # Курсор — останній запис попередньої сторінки (так його передає посилання "Наступна")
+                cursor = None
+                if offset:
+                    previous = ordered[offset - 1]
+                    cursor = (None if sort_by.lstrip('-') == 'timestamp' else getattr(previous, sort_by.lstrip('-')),
+                              previous.timestamp)
+                offset_ms, _ = timed(lambda: list(ordered[offset:offset + per_page]), options['repeat'])
+                keyset_ms, _ = timed(lambda: list(keyset_paginate(queryset, sort_by, per_page, after=cursor)),
+                                     options['repeat'])
+                write(f"{sort_by:>12} {page:>7} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+
+
+def bench_features(write, options):
+    """
+    Вартість ознак для однієї нової години: create_features над усією історією проти FeatureEngine.append.
+    """
+    write(f"{'history h':>10} {'create_features ms':>19} {'append us':>10}")
+    for hours in (1_000, 10_000, 100_000):
+        frame = synthetic_energy_frame(hours + 1)
+        history, new_row = frame.iloc[:-1], frame.iloc[-1]
+        engine = FeatureEngine()
+        engine.transform(history)
+
+        batch_ms, _ = timed(lambda: create_features(frame), options['repeat'])
+        timestamp = new_row['timestamp'].to_pydatetime()
+        values = new_row.to_dict()
+        started = time.perf_counter()
+        for step in range(1_000):
+            engine.append(timestamp + timedelta(hours=step), values)
+        append_us = (time.perf_counter() - started) / 1_000 * 1e6
+        write(f"{hours:>10} {batch_ms:>19.2f} {append_us:>10.1f}")
+
+
+def bench_forecast(write, options):
+    """
+    Рекурсивний прогноз на 7 днів для N сценаріїв: один predict на крок для всіх сценаріїв
+    проти окремого прогнозу кожного сценарію.
+    """
+    from xgboost import XGBRegressor
+
+    frame = synthetic_energy_frame(2 * HOURS_PER_YEAR)
+    features = create_features(frame)
+    model = XGBRegressor(n_estimators=300, max_depth=6, learning_rate=0.1, n_jobs=-1, random_state=42)
+    model.fit(features[FEATURES], features[TARGET])
+    engine = FeatureEngine(features=[])
+    engine.transform(frame.tail(24))
+
+    horizon = 7 * 24
+    rng = np.random.default_rng(1)
+    write(f"{'scenarios':>10} {'batched ms':>11} {'per-scenario ms':>16} {'speedup':>8}")
+    for count in (1, 10, 100, 1_000):
+        demand = frame['demand'].iloc[-1] + rng.normal(0, 150, size=(count, horizon))
+        batched_ms, _ = timed(lambda: recursive_forecast(model, FEATURES, engine, horizon, {'demand': demand}),
+                              options['repeat'])
+        # Окремі прогнози сценаріїв вимірюються на підвибірці, щоб не чекати хвилинами
+        sample = demand[:min(count, 20)]
+        loop_ms, _ = timed(lambda: [recursive_forecast(model, FEATURES, engine, horizon, {'demand': path})
+                                    for path in sample], 1)
+        loop_ms *= count / len(sample)
+        write(f"{count:>10} {batched_ms:>11.1f} {loop_ms:>16.1f} {loop_ms / batched_ms:>7.1f}x")
+
+
+def bench_simulation(write, options):
+    """
+    Симуляція Монте-Карло на 7 днів: час генерації N шляхів ціни та їхніх квантилів
+    в одному процесі й у пулі процесів.
+    """
+    from xgboost import XGBRegressor
+
+    frame = synthetic_energy_frame(2 * HOURS_PER_YEAR)
+    features = create_features(frame)
+    model = XGBRegressor(n_estimators=300, max_depth=6, learning_rate=0.1, n_jobs=1, random_state=42)
+    model.fit(features[FEATURES], features[TARGET])
+    engine = FeatureEngine(features=[])
+    engine.transform(frame.tail(24))
+    pools = residual_pools(model, FEATURES, features)
+
+    horizon = 7 * 24
+    workers = os.cpu_count() or 1
+    write(f"{'paths':>7} {'1 process ms':>13} {f'{workers} processes ms':>16} {'paths/s':>9}")
+    for count in (100, 1_000, 5_000):
+        single_ms, _ = timed(lambda: simulate_prices(model, FEATURES, engine, horizon, pools, count, workers=1),
+                             options['repeat'])
+        pool_ms, _ = timed(lambda: simulate_prices(model, FEATURES, engine, horizon, pools, count, workers=workers),
+                           options['repeat'])
+        write(f"{count:>7} {single_ms:>13.1f} {pool_ms:>16.1f} {count / min(single_ms, pool_ms) * 1000:>9.0f}")
+
+
+def _peak_memory_in_child(fn):
+    """
+    Приріст пікового RSS (МБ) під час fn, виміряний в окремому процесі (fork), щоб виміри
+    різних способів завантаження не впливали один на одного. None, якщо виміряти неможливо.
+    """
+    if not hasattr(os, 'fork') or peak_memory_mb() is None:
+        return None
+    reader, writer = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - дочірній процес
+        try:
+            baseline = peak_memory_mb()
+            fn()
+            os.write(writer, json.dumps(peak_memory_mb() - baseline).encode())
+        finally:
+            os._exit(0)
+    os.close(writer)
+    with os.fdopen(reader) as f:
+        result = f.read()
+    os.waitpid(pid, 0)
+    return json.loads(result) if result else None
+
+
+def bench_archive(write, options):
+    """
+    Завантаження даних для навчання: ORM .values() (попередній шлях) проти колонкового
+    архіву Arrow з memory map — час і приріст пікового RSS, для всіх стовпців і для двох.
+    """
+    with isolated_database(), tempfile.TemporaryDirectory() as archive_dir, \
+            override_settings(ENERGY_ARCHIVE_DIR=archive_dir):
+        hours = options['years'] * HOURS_PER_YEAR
+        write(f"Generating {hours} hourly rows ({options['years']} years)...")
+        load_energy_data(synthetic_energy_frame(hours))
+        started = time.perf_counter()
+        partitions = sync_archive()
+        write(f"Archive of {partitions} partitions written in {time.perf_counter() - started:.2f}s.")
+
+        loaders = {
+            'orm values()': lambda: pd.DataFrame(list(
+                EnergyData.objects.filter(zone=DEFAULT_ZONE).order_by('timestamp').values())),
+            'archive': lambda: load_energy_frame([DEFAULT_ZONE]),
+            'archive 2 cols': lambda: load_energy_frame([DEFAULT_ZONE], ['price', 'demand']),
+        }
+        write(f"{'loader':>15} {'ms':>9} {'peak RSS +MB':>13}")
+        for name, loader in loaders.items():
+            ms, _ = timed(loader, options['repeat'])
+            peak = _peak_memory_in_child(loader)
+            write(f"{name:>15} {ms:>9.1f} {f'{peak:.1f}' if peak is not None else 'n/a':>13}")
+
+
+def bench_data_access(write, options):
+    """
+    Діапазонне читання EnergyData у DataFrame: .values() -> list -> DataFrame -> pd.to_datetime
+    (попередній шлях дашборду та навчання) проти read_frame (курсор -> типізовані масиви NumPy).
+    """
+    sizes = (10_000, 100_000, 1_000_000)
+    fields = ['timestamp', *ARCHIVE_FIELDS]
+    with isolated_database():
+        write(f"Generating {sizes[-1]} hourly rows...")
+        load_energy_data(synthetic_energy_frame(sizes[-1], start='1900-01-01'))
+        ordered = EnergyData.objects.filter(zone=DEFAULT_ZONE).order_by('timestamp')
+
+        def values_frame(queryset):
+            frame = pd.DataFrame(list(queryset.values(*fields)), columns=fields)
+            frame['timestamp'] = pd.to_datetime(frame['timestamp'], utc=True)
+            return frame
+
+        write(f"{'rows':>9} {'values() ms':>12} {'read_frame ms':>14} {'speedup':>8}")
+        for size in sizes:
+            queryset = ordered[:size]
+            values_ms, _ = timed(lambda: values_frame(queryset), options['repeat'])
+            read_ms, _ = timed(lambda: read_frame(queryset, fields), options['repeat'])
+            write(f"{size:>9} {values_ms:>12.1f} {read_ms:>14.1f} {values_ms / read_ms:>7.1f}x")
+
+
+def _wsgi_request(application, path, query):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(), 'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    started = time.perf_counter()
+    status = []
+    body = application(environ, lambda response_status, headers: status.append(response_status))
+    try:
+        b''.join(body)
+    finally:
+        body.close()
+    if not status[0].startswith('200'):
+        raise RuntimeError(f"{path}?{query}: {status[0]}")
+    return time.perf_counter() - started
+
+
+async def _asgi_request(application, path, query):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver')], 'server': ('testserver', 80), 'client': ('127.0.0.1', 50000),
+    }
+    messages = []
+    body_sent = asyncio.Event()
+
+    async def receive():
+        if body_sent.is_set():
+            # Клієнт не відключається; Django скасовує очікування після відповіді
+            await asyncio.Future()
+        body_sent.set()
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    started = time.perf_counter()
+    await application(scope, receive, send)
+    if messages[0]['status'] != 200:
+        raise RuntimeError(f"{path}?{query}: {messages[0]['status']}")
+    return time.perf_counter() - started
+
+
+def _load_test_wsgi(application, requests, concurrency):
+    """
+    requests запитів (path, query) від concurrency одночасних клієнтів (потоки, як у WSGI-сервері).
+    Повертає (тривалість, затримки).
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(lambda request: _wsgi_request(application, *request), requests))
+    return time.perf_counter() - started, latencies
+
+
+def _load_test_asgi(application, requests, concurrency):
+    """
+    Ті самі запити через ASGI-застосунок: concurrency клієнтів-корутин в одному циклі подій.
+    """
+    async def run():
+        queue = list(reversed(requests))
+        latencies = []
+
+        async def client():
+            while queue:
+                latencies.append(await _asgi_request(application, *queue.pop()))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return time.perf_counter() - started, latencies
+
+    return asyncio.run(run())
+
+
+def bench_asgi(write, options):
+    """
+    Навантажувальний тест дашборду, API сторінки ряду та потокового експорту: ASGI-застосунок
+    (async-представлення з одночасними читаннями, експорт асинхронним ітератором) проти WSGI-застосунку
+    з пулом потоків — запити за секунду, p50 та p99. Під WSGI асинхронний експорт Django збирає в пам'ять
+    перед відправкою. Кеш відповідей вимкнений, тож кожен запит читає базу та будує відповідь.
+    """
+    years = min(options['years'], 2)
+    with isolated_database(), override_settings(
+            ALLOWED_HOSTS=['testserver'],
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+        write(f"Generating {years} years of hourly data...")
+        last_timestamp = load_dashboard_dataset(years)
+        start_date = (last_timestamp - pd.Timedelta(days=30)).date()
+        end_date = (last_timestamp + pd.Timedelta(days=7)).date()
+        endpoints = {
+            'dashboard': (reverse('energy_dashboard'), f'start_date={start_date}&end_date={end_date}'),
+            'api page': (reverse('energy_data_api'), f'limit=1000&start={start_date}'),
+            'export': (reverse('energy_data_export_api'), f'format=columnar&start={start_date}'),
+        }
+        applications = {
+            'wsgi': (get_wsgi_application(), _load_test_wsgi),
+            'asgi': (get_asgi_application(), _load_test_asgi),
+        }
+
+        write(f"{'endpoint':>10} {'server':>6} {'clients':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for endpoint, request in endpoints.items():
+            for concurrency in (1, 8, 32):
+                requests = [request] * max(20 * options['repeat'], concurrency * 4)
+                for server, (application, load_test) in applications.items():
+                    load_test(application, requests[:concurrency], concurrency)  # Прогрів
+                    seconds, latencies = load_test(application, requests, concurrency)
+                    p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+                    write(f"{endpoint:>10} {server:>6} {concurrency:>8} {len(requests) / seconds:>8.1f} "
+                          f"{p50:>8.1f} {p99:>8.1f}")
+
+
+def _inline_chart_json(charts):
+    """
+    Ряди графіків так, як їх раніше вбудовував шаблон: JSON-рядок міток і кожного ряду (null замість NaN).
+    """
+    texts = []
+    for timestamps, series in charts.values():
+        texts.append(json.dumps(timestamps.dt.strftime('%Y-%m-%d %H:%M').tolist()))
+        for values in series.values():
+            texts.append(json.dumps(np.where(np.isnan(values), None, values).tolist()))
+    return texts
+
+
+# Розбір у Node.js: JSON.parse вбудованих рядів проти декодера шаблону (core/static/core/chart_payload.js)
+_NODE_DECODE_SCRIPT = """
+const fs = require('fs');
+const vm = require('vm');
+const [decoderPath, textsPath, payloadPath, repeat] = process.argv.slice(2);
+vm.runInThisContext(fs.readFileSync(decoderPath, 'utf8'));
+const texts = JSON.parse(fs.readFileSync(textsPath, 'utf8'));
+const bytes = fs.readFileSync(payloadPath);
+const buffer = bytes.buffer.slice(bytes.byteOffset, bytes.byteOffset + bytes.length);
+function median(fn) {
+    const times = [];
+    for (let i = 0; i < Number(repeat); i++) {
+        const started = process.hrtime.bigint();
+        fn();
+        times.push(Number(process.hrtime.bigint() - started) / 1e6);
+    }
+    return times.sort((a, b) => a - b)[Math.floor(times.length / 2)];
+}
+console.log(JSON.stringify({
+    json: median(() => texts.map(text => JSON.parse(text))),
+    binary: median(() => decodeChartPayload(buffer)),
+}));
+"""
+
+
+def _client_decode_ms(texts, payload, repeat):
+    """
+    Медіанний час розбору рядів на клієнті (мс) у Node.js: (JSON.parse, декодер Float32) або None без node.
+    """
+    node = shutil.which('node')
+    if node is None:
+        return None
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {name: os.path.join(directory, name) for name in ('decode.js', 'texts.json', 'payload.bin')}
+        with open(paths['decode.js'], 'w') as file:
+            file.write(_NODE_DECODE_SCRIPT)
+        with open(paths['texts.json'], 'w') as file:
+            json.dump(texts, file)
+        with open(paths['payload.bin'], 'wb') as file:
+            file.write(payload)
+        output = subprocess.run(
+            [node, paths['decode.js'], finders.find('core/chart_payload.js'), paths['texts.json'],
+             paths['payload.bin'], str(repeat)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+    result = json.loads(output)
+    return result['json'], result['binary']
+
+
+def bench_chart_payload(write, options):
+    """
+    Ряди графіків дашборду: вбудований у HTML JSON (після escapejs) проти двійкового Float32 з
+    окремого запиту — розмір (без стиснення, gzip, brotli), час кодування на сервері та розбору на
+    клієнті (Node.js), а також оцінка часу до першого графіка при 10 Мбіт/с.
+    """
+    years = max(options['years'], 5)
+    bandwidth = 10e6 / 8  # байт/с
+    with isolated_database():
+        write(f"Generating {years} years of hourly data...")
+        end_date = (load_dashboard_dataset(years) + pd.Timedelta(days=7)).date()
+        if brotli is None:
+            write("brotli is not installed: the br column is skipped.")
+
+        write("Sizes in KB, times in ms; TTFC = server encoding + transfer at 10 Mbit/s + client parsing.")
+        sizes = f"{'JSON':>7} {'f32':>6} {'gzip':>6} {'br':>6}"
+        timings = f"{'enc JSON':>8} {'enc f32':>7} {'parse JSON':>10} {'parse f32':>9} {'TTFC JSON':>9} {'TTFC f32':>8}"
+        write(f"{'range':>8} {'max_points':>10} {'points':>7} {sizes} {timings}")
+        for label, days in (('1 month', 30), ('1 year', 365), ('5 years', 5 * 365)):
+            start_date = end_date - timedelta(days=days)
+            resolution = choose_resolution(start_date, end_date)
+            df_actual = _dashboard_actuals(DEFAULT_ZONE, start_date, end_date)
+            df_predictions = _dashboard_predictions(DEFAULT_ZONE, start_date, end_date)
+            for max_points in (1000, 0):
+                charts = _dashboard_charts(resolution, max_points, df_actual, df_predictions)
+                points = sum(len(timestamps) for timestamps, _ in charts.values())
+
+                texts = _inline_chart_json(charts)
+                json_ms, _ = timed(lambda: [escapejs(text) for text in _inline_chart_json(charts)], options['repeat'])
+                inline_size = sum(len(escapejs(text).encode()) for text in texts)
+                payload = encode_chart_payload(charts, RESOLUTION_STEPS[resolution])
+                payload_ms, _ = timed(
+                    lambda: encode_chart_payload(charts, RESOLUTION_STEPS[resolution]), options['repeat'])
+                compressed = {
+                    encoding: compress_payload(payload, encoding)
+                    for encoding in ('gzip', 'br') if encoding != 'br' or brotli is not None
+                }
+                # Стиснення виконується один раз: тіло відповіді кешується вже стисненим
+                wire = compressed.get('br', compressed['gzip'])
+
+                decode = _client_decode_ms(texts, payload, options['repeat'])
+                parse_ms, decode_ms = decode or (float('nan'), float('nan'))
+                ttfc_json = json_ms + inline_size / bandwidth * 1000 + parse_ms
+                ttfc_binary = payload_ms + len(wire) / bandwidth * 1000 + decode_ms
+
+                br_kb = f"{len(compressed['br']) / 1024:>6.1f}" if 'br' in compressed else f"{'-':>6}"
+                write(f"{label:>8} {max_points:>10} {points:>7} {inline_size / 1024:>7.1f} "
+                      f"{len(payload) / 1024:>6.1f} {len(compressed['gzip']) / 1024:>6.1f} {br_kb} "
+                      f"{json_ms:>8.1f} {payload_ms:>7.1f} {parse_ms:>10.2f} {decode_ms:>9.2f} "
+                      f"{ttfc_json:>9.1f} {ttfc_binary:>8.1f}")
+        if decode is None:
+            write("node is not available: client parse times are not measured.")
+
+
+def _iterrows_recommendations(df_predictions, buy_threshold=0.98, sell_threshold=1.02):
+    # Попередня реалізація generate_recommendations (цикл по рядках) для порівняння
+    recommendations = []
+    for _, row in df_predictions.dropna(subset=['price_rolling_mean_24h']).iterrows():
+        rec_text = "Нейтрально"
+        if row['predicted_price'] < row['price_rolling_mean_24h'] * buy_threshold:
+            rec_text = "КУПУВАТИ"
+        elif row['predicted_price'] > row['price_rolling_mean_24h'] * sell_threshold:
+            rec_text = "ПРОДАВАТИ"
+        recommendations.append({
+            'timestamp': row['timestamp'],
+            'predicted_price': row['predicted_price'],
+            'actual_price': row['price'],
+            'recommendation': rec_text,
+        })
+    return recommendations
+
+
+def bench_recommendations(write, options):
+    """
+    Рекомендації для погодинних прогнозів: векторні стратегії проти циклу iterrows.
+    """
+    rng = np.random.default_rng(0)
+    write(f"{'hours':>8} {'strategy':>11} {'vectorized ms':>14} {'iterrows ms':>12}")
+    for years in (1, options['years']):
+        hours = years * HOURS_PER_YEAR
+        frame = pd.DataFrame({
+            'timestamp': pd.date_range('2024-01-01', periods=hours, freq='h', tz='UTC'),
+            'price': np.nan,
+            'predicted_price': rng.normal(50, 10, hours),
+            'price_rolling_mean_24h': rng.normal(50, 2, hours),
+        })
+        loop_ms, _ = timed(lambda: _iterrows_recommendations(frame), 1)
+        for strategy in STRATEGIES:
+            vectorized_ms, _ = timed(lambda: recommend(frame, strategy), options['repeat'])
+            loop = f"{loop_ms:>12.1f}" if strategy == 'threshold' else f"{'-':>12}"
+            write(f"{hours:>8} {strategy:>11} {vectorized_ms:>14.2f} {loop}")
+
+
+def bench_scheduling(write, options):
+    """
+    Оптимальний план купівлі-продажу на 7 днів для N активів одним векторним DP.
+    """
+    rng = np.random.default_rng(0)
+    horizon = 7 * 24
+    prices = 45 + 15 * np.sin(np.arange(horizon) / 24 * 2 * np.pi) + rng.normal(0, 5, horizon)
+    write(f"{'assets':>7} {'levels':>7} {'ms':>9} {'ms/asset':>9}")
+    for count in (1, 10, 100, 500):
+        assets = [
+            {'capacity': float(capacity), 'charge_rate': float(capacity) / 4, 'efficiency': 0.9,
+             'initial_level': float(capacity) / 2, 'daily_volume': float(volume)}
+            for capacity, volume in zip(rng.uniform(5, 50, count), rng.uniform(0, 100, count))
+        ]
+        for levels in (21, 41):
+            ms, _ = timed(lambda: optimize_schedule(prices, assets, levels), options['repeat'])
+            write(f"{count:>7} {levels:>7} {ms:>9.1f} {ms / count:>9.2f}")
+
+
+SUITES = {
+    'indexes': bench_indexes,
+    'downsampling': bench_downsampling,
+    'dashboard': bench_dashboard,
+    'pagination': bench_pagination,
+    'features': bench_features,
+    'forecast': bench_forecast,
+    'recommendations': bench_recommendations,
+    'scheduling': bench_scheduling,
+    'simulation': bench_simulation,
+    'archive': bench_archive,
+    'data_access': bench_data_access,
+    'asgi': bench_asgi,
+    'chart_payload': bench_chart_payload,
+}
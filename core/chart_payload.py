@@ -0,0 +1,145 @@
+"""
+Двійковий формат рядів графіків дашборду.
+
+Замість JSON зі списками чисел і рядком-міткою на кожну точку ряди передаються типізованими
+масивами, які браузер читає без розбору тексту (Float32Array поверх ArrayBuffer відповіді):
+
+    uint32 LE  довжина заголовка в байтах
+    заголовок  JSON (UTF-8), доповнений пробілами до кратної 4 довжини
+    дані       масиви little-endian, кожен з вирівнюванням на 4 байти
+
+Для кожного графіка заголовок містить start (секунди epoch першої точки), length та зсуви масивів
+у секції даних; step (секунди між точками шкали) спільний. Мітка точки i — start + offsets[i] * step,
+де offsets (uint32) — номери кроків відібраних точок; для суцільного ряду offsets не передається
+(offsets[i] = i). Значення рядів — float32, NaN означає відсутнє значення (розрив лінії).
+Клієнтський декодер — core/static/core/chart_payload.js.
+"""
+import gzip
+import json
+import struct
+
+import numpy as np
+import pandas as pd
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+PAYLOAD_VERSION = 1
+CONTENT_TYPE = 'application/octet-stream'
+
+_HEADER_LENGTH = struct.Struct('<I')
+# Підтримувані стиснення в порядку переваги за однакової ваги q
+_ENCODINGS = ('br', 'gzip')
+
+
+def _epoch_seconds(timestamps):
+    return pd.DatetimeIndex(timestamps).as_unit('s').asi8
+
+
+def encode_chart_payload(charts, step):
+    """
+    Кодує графіки {назва: (часові мітки UTC, {назва ряду: значення})} з кроком шкали step секунд.
+    Викликає ValueError, якщо мітки графіка не лежать на шкалі з кроком step від першої мітки.
+    """
+    header = {'version': PAYLOAD_VERSION, 'step': step, 'charts': {}}
+    buffers = []
+    size = 0
+
+    def append(array):
+        nonlocal size
+        offset = size
+        buffers.append(array.tobytes())
+        size += array.nbytes  # Елементи по 4 байти, тож вирівнювання зберігається
+        return offset
+
+    for chart, (timestamps, series) in charts.items():
+        seconds = _epoch_seconds(timestamps)
+        start = int(seconds[0]) if len(seconds) else 0
+        steps, remainder = np.divmod(seconds - start, step)
+        if remainder.any():
+            raise ValueError(f"Timestamps of chart '{chart}' are not aligned to a {step}s step.")
+        regular = np.array_equal(steps, np.arange(len(steps)))
+        header['charts'][chart] = {
+            'start': start,
+            'length': len(seconds),
+            'offsets': None if regular else append(steps.astype('<u4')),
+            'series': {name: append(np.asarray(values, dtype='<f4')) for name, values in series.items()},
+        }
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode()
+    header_bytes += b' ' * (-len(header_bytes) % 4)
+    return b''.join([_HEADER_LENGTH.pack(len(header_bytes)), header_bytes, *buffers])
+
+
+def decode_chart_payload(data):
+    """
+    Розбирає encode_chart_payload: {назва: (DatetimeIndex UTC, {назва ряду: масив float32})}.
+    """
+    (header_length,) = _HEADER_LENGTH.unpack_from(data)
+    data_start = _HEADER_LENGTH.size + header_length
+    header = json.loads(data[_HEADER_LENGTH.size:data_start])
+    if header.get('version') != PAYLOAD_VERSION:
+        raise ValueError(f"Unsupported chart payload version: {header.get('version')!r}.")
+
+    charts = {}
+    for chart, meta in header['charts'].items():
+        length = meta['length']
+        if meta['offsets'] is None:
+            steps = np.arange(length, dtype=np.int64)
+        else:
+            steps = np.frombuffer(data, '<u4', length, data_start + meta['offsets']).astype(np.int64)
+        timestamps = pd.to_datetime(meta['start'] + steps * header['step'], unit='s', utc=True)
+        series = {
+            name: np.frombuffer(data, '<f4', length, data_start + offset)
+            for name, offset in meta['series'].items()
+        }
+        charts[chart] = (timestamps, series)
+    return charts
+
+
+def _encoding_weights(accept_encoding):
+    """
+    Ваги q кодувань із заголовка Accept-Encoding: {кодування: q}; без параметра q вага 1,
+    некоректне значення q вважається нулем (кодування не приймається).
+    """
+    weights = {}
+    for item in (accept_encoding or '').split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.lower()] = weight
+    return weights
+
+
+def accepted_encoding(accept_encoding):
+    """
+    Найкраще стиснення з заголовка Accept-Encoding: 'br' (якщо встановлено brotli), 'gzip' або None.
+    Кодування з найбільшою вагою q; q=0 (явно або через '*;q=0') означає, що кодування не приймається.
+    """
+    weights = _encoding_weights(accept_encoding)
+    best, best_weight = None, 0.0
+    for encoding in _ENCODINGS:
+        if encoding == 'br' and brotli is None:
+            continue
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def compress_payload(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data)
+    if encoding == 'gzip':
+        return gzip.compress(data, mtime=0)
+    return data
@@ -0,0 +1,166 @@
+"""
+Читання діапазонів ORM-запитів у DataFrame напряму з курсора бази.
+
+Замість .values() (словник на кожен рядок), списку й повторного pd.to_datetime рядки
+читаються пакетами fetchmany у заздалегідь виділені типізовані масиви NumPy: числові
+поля — float64 з NaN замість NULL, DateTimeField — int64 мікросекунд від епохи (UTC),
+решта — object. DataFrame будується поверх числових і часових масивів без додаткових копій.
+
+Для async-представлень read_concurrently виконує незалежні читання одночасно в пулі потоків,
+а aiter_batches віддає рядки одного курсора пакетами для потокових відповідей.
+"""
+import asyncio
+from datetime import timezone
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.core.exceptions import EmptyResultSet
+from django.db import close_old_connections, connection, connections, models
+from django.db.models import F
+from django.db.models.functions import Cast
+
+FETCH_SIZE = 10_000
+_NUMERIC_FIELDS = (models.FloatField, models.IntegerField, models.DecimalField)
+
+
+def _field_kind(model, name):
+    field = model._meta.get_field(name)
+    if isinstance(field, models.DateTimeField):
+        return 'datetime'
+    if isinstance(field, _NUMERIC_FIELDS):
+        return 'float'
+    return 'object'
+
+
+def _epoch_microseconds(values):
+    """
+    Значення DateTimeField з курсора (datetime або ISO-рядки, наївні в UTC чи з tzinfo) як int64 мікросекунд.
+    """
+    if values and getattr(values[0], 'tzinfo', None) is not None:
+        values = [value.astimezone(timezone.utc).replace(tzinfo=None) for value in values]
+    return np.array(values, dtype='datetime64[us]').view('int64')
+
+
+def _grow(arrays, capacity):
+    # Розширення на місці (realloc): масиви ще не мають інших посилань
+    for array in arrays:
+        array.resize((capacity, *array.shape[1:]), refcheck=False)
+
+
+def _select(queryset, fields, kinds):
+    """
+    Запит, що вибирає fields у заданому порядку. SQLite зберігає DateTimeField як текст ISO 8601, і без
+    CAST модуль sqlite3 розбирав би кожне значення в Python (parse_datetime); текст розбирає NumPy.
+    """
+    if connections[queryset.db].vendor != 'sqlite' or 'datetime' not in kinds:
+        return queryset.values_list(*fields)
+    # Лише анотації зберігають свій порядок у SELECT, тож вибираються всі поля
+    return queryset.values(**{
+        f'{name}_': Cast(name, models.TextField()) if kind == 'datetime' else F(name)
+        for name, kind in zip(fields, kinds)
+    })
+
+
+def _fetch_batches(queryset, fields, kinds, fetch_size):
+    """
+    Рядки запиту (кортежі значень fields) пакетами по fetch_size через курсор бази.
+    """
+    try:
+        sql, params = _select(queryset, fields, kinds).query.get_compiler(queryset.db).as_sql()
+    except EmptyResultSet:  # Наприклад, filter(zone__in=[]) або .none()
+        return
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        while rows := cursor.fetchmany(fetch_size):
+            yield rows
+
+
+def read_frame(queryset, fields, fetch_size=FETCH_SIZE):
+    """
+    Виконує queryset (з його фільтрами, сортуванням і зрізом) і повертає DataFrame зі стовпцями fields.
+    Числові стовпці лежать в одному блоці float64, часові мітки — datetime64[us, UTC].
+    """
+    fields = list(fields)
+    kinds = [_field_kind(queryset.model, name) for name in fields]
+    float_positions = [i for i, kind in enumerate(kinds) if kind == 'float']
+    other_positions = [i for i, kind in enumerate(kinds) if kind != 'float']
+
+    capacity = fetch_size
+    floats = np.empty((capacity, len(float_positions)))
+    timestamps = {i: np.empty(capacity, dtype='int64') for i in other_positions if kinds[i] == 'datetime'}
+    objects = {i: [] for i in other_positions if kinds[i] == 'object'}
+    size = 0
+
+    for rows in _fetch_batches(queryset, fields, kinds, fetch_size):
+        end = size + len(rows)
+        if end > capacity:
+            capacity = max(end, capacity * 2)
+            _grow([floats, *timestamps.values()], capacity)
+        columns = list(zip(*rows))
+        for column, i in enumerate(float_positions):
+            floats[size:end, column] = np.array(columns[i], dtype=float)  # None -> NaN
+        for i, array in timestamps.items():
+            array[size:end] = _epoch_microseconds(columns[i])
+        for i, values in objects.items():
+            values.extend(columns[i])
+        size = end
+
+    _grow([floats, *timestamps.values()], size)
+    frame = pd.DataFrame(floats, columns=[fields[i] for i in float_positions], copy=False)
+    # Стовпці інших типів вставляються на свої позиції у порядку fields
+    for i in other_positions:
+        if i in timestamps:
+            series = pd.Series(timestamps[i], copy=False).astype('datetime64[us, UTC]')
+        else:
+            series = pd.Series(objects[i], dtype=object)
+        frame.insert(i, fields[i], series)
+    return frame
+
+
+def _in_atomic_block():
+    return connection.in_atomic_block
+
+
+def _read_in_thread(reader):
+    try:
+        return reader()
+    finally:
+        # Потік пулу не обслуговує запит, тож з'єднання закривається за правилами CONN_MAX_AGE тут
+        close_old_connections()
+
+
+async def read_concurrently(*readers):
+    """
+    Виконує незалежні синхронні читання з бази одночасно, кожне в окремому потоці зі своїм з'єднанням.
+    Повертає результати в порядку readers. Усередині транзакції (atomic) читання мають бачити її
+    незафіксовані зміни, тож виконуються послідовно на з'єднанні потоку запиту.
+    """
+    if await sync_to_async(_in_atomic_block)():
+        return [await sync_to_async(reader)() for reader in readers]
+    return await asyncio.gather(*(
+        sync_to_async(_read_in_thread, thread_sensitive=False)(reader) for reader in readers
+    ))
+
+
+async def read_async(reader):
+    """
+    Одне синхронне читання з бази з async-коду, не займаючи спільний потік sync_to_async (див. read_concurrently).
+    """
+    (result,) = await read_concurrently(reader)
+    return result
+
+
+async def aiter_batches(queryset, chunk_size):
+    """
+    Асинхронно генерує результати queryset (наприклад, values_list) списками до chunk_size елементів
+    з одного курсора бази (iterator), тож усі пакети належать одному запиту. Пакети читаються через
+    sync_to_async у потоці запиту (thread_sensitive): курсор прив'язаний до з'єднання цього потоку.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)  # Генератор: запит виконується з першим пакетом
+    try:
+        while batch := await sync_to_async(lambda: list(islice(rows, chunk_size)))():
+            yield batch
+    finally:
+        await sync_to_async(rows.close)()
@@ -0,0 +1,77 @@
+import hashlib
+import json
+
+from functools import partial
+
+from django.core.cache import cache
+from django.db.models import F
+
+from core.data_access import read_async
+from core.models import DataVersion
+
+ENERGY_DATA_VERSION = 'energy_data'
+PREDICTIONS_VERSION = 'predictions'
+CACHE_TIMEOUT = 24 * 60 * 60  # Ключ містить версію даних, тож TTL лише прибирає старі записи
+
+
+def get_data_version(name=ENERGY_DATA_VERSION):
+    """
+    Поточна версія даних (0, якщо дані ще не імпортувалися).
+    """
+    return DataVersion.objects.filter(name=name).values_list('version', flat=True).first() or 0
+
+
+def get_data_versions(names):
+    """
+    Версії кількох наборів даних одним запитом, у порядку names.
+    """
+    versions = dict(DataVersion.objects.filter(name__in=names).values_list('name', 'version'))
+    return tuple(versions.get(name, 0) for name in names)
+
+
+def bump_data_version(name=ENERGY_DATA_VERSION):
+    """
+    Збільшує версію даних; викликається в транзакції запису, тож читачі бачать нову версію
+    разом з новими даними.
+    """
+    updated = DataVersion.objects.filter(name=name).update(version=F('version') + 1)
+    if not updated:
+        DataVersion.objects.get_or_create(name=name, defaults={'version': 1})
+
+
+def cache_key(prefix, params, version):
+    """
+    Ключ кешу з нормалізованих параметрів запиту та версії (або кортежу версій) даних.
+    """
+    if isinstance(version, tuple):
+        version = '.'.join(map(str, version))
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    return f'{prefix}:v{version}:{digest}'
+
+
+def cached_value(prefix, params, builder, names=(ENERGY_DATA_VERSION,), timeout=CACHE_TIMEOUT):
+    """
+    Результат builder() для нормалізованих параметрів, кешований до зміни будь-якого з наборів даних names.
+    Значення має серіалізуватися pickle (вимога і locmem, і файлового кешу).
+    """
+    key = cache_key(prefix, params, get_data_versions(names))
+    return cache.get_or_set(key, builder, timeout)
+
+
+async def acached_value(prefix, params, builder, names=(ENERGY_DATA_VERSION,), timeout=CACHE_TIMEOUT):
+    """
+    Async-варіант cached_value для async-представлень: builder() повертає корутину.
+    """
+    key = cache_key(prefix, params, await read_async(partial(get_data_versions, names)))
+    value = await cache.aget(key)
+    if value is None:
+        value = await builder()
+        await cache.aset(key, value, timeout)
+    return value
+
+
+def cached_count(queryset, prefix, params, timeout=CACHE_TIMEOUT):
+    """
+    COUNT(*) для відфільтрованого queryset, кешований до наступної зміни даних.
+    """
+    return cached_value(f'{prefix}:count', params, queryset.count, timeout=timeout)
@@ -0,0 +1,85 @@
+import numpy as np
+
+
+def lttb_indices(y, threshold, x=None):
+    """
+    Індекси точок, відібраних алгоритмом Largest-Triangle-Three-Buckets.
+
+    Перша та остання точки зберігаються завжди; глобальні мінімум і максимум ряду
+    також гарантовано потрапляють у вибірку (замінюють обрану точку свого кошика; якщо
+    обидва екстремуми припадають на один кошик, вибірка стає на одну точку більшою).
+    NaN ігноруються. Якщо точок не більше за threshold, повертаються всі валідні індекси.
+    """
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    n = len(valid)
+    if threshold <= 0 or n <= max(threshold, 2):
+        return valid
+    threshold = max(threshold, 3)
+
+    ys = y[valid]
+    xs = valid.astype(float) if x is None else np.asarray(x, dtype=float)[valid]
+
+    # Внутрішні точки (без першої та останньої) діляться на threshold - 2 кошиків
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # Середні точки кожного кошика (точка C для попереднього кошика); для останнього — остання точка
+    avg_x = np.append(np.add.reduceat(xs[:-1], edges[:-1]) / counts, xs[-1])
+    avg_y = np.append(np.add.reduceat(ys[:-1], edges[:-1]) / counts, ys[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        cx, cy = avg_x[bucket + 1], avg_y[bucket + 1]
+        ax, ay = xs[a], ys[a]
+        # Подвоєна площа трикутника (A, candidate, C) для всіх кандидатів кошика одразу
+        areas = np.abs((ax - cx) * (ys[start:end] - ay) - (ax - xs[start:end]) * (cy - ay))
+        a = start + int(np.argmax(areas))
+        selected[bucket + 1] = a
+
+    for extreme in (int(np.argmin(ys)), int(np.argmax(ys))):
+        if extreme in selected:
+            continue
+        slot = int(np.searchsorted(edges, extreme, side='right'))  # позиція кошика у selected
+        if ys[selected[slot]] in (ys.min(), ys.max()):
+            selected = np.sort(np.append(selected, extreme))
+        else:
+            selected[slot] = extreme
+
+    return valid[selected]
+
+
+def lttb(x, y, threshold):
+    """
+    Зменшує ряд (x, y) до threshold точок. Повертає (x, y) відібраних точок.
+    """
+    idx = lttb_indices(y, threshold, x=x)
+    return np.asarray(x)[idx], np.asarray(y, dtype=float)[idx]
+
+
+def downsample_group(series_list, threshold):
+    """
+    Спільні індекси для групи рядів на одному графіку: об'єднання LTTB-вибірок кожного ряду,
+    тож піки кожного ряду зберігаються, а всі ряди мають однакові мітки осі X.
+    Бюджет threshold ділиться між рядами й зменшується, доки об'єднання не вкладеться в threshold точок.
+    """
+    if not series_list:
+        return np.array([], dtype=np.int64)
+    length = len(series_list[0])
+    if threshold <= 0 or length <= threshold:
+        return np.arange(length)
+
+    budget = threshold // len(series_list)
+    while budget >= 3:
+        indices = [lttb_indices(series, budget) for series in series_list]
+        union = np.unique(np.concatenate([[0, length - 1], *indices]).astype(np.int64))
+        if len(union) <= threshold:
+            return union
+        # Вибірка ряду може бути на точку більшою за бюджет (екстремуми в одному кошику) — зменшуємо бюджет
+        # кожного ряду на його частку надлишку
+        budget -= -(-(len(union) - threshold) // len(series_list))
+    # Менше трьох точок на ряд: LTTB не працює, беремо рівномірні мітки
+    return np.unique(np.linspace(0, length - 1, threshold).round().astype(np.int64))
@@ -0,0 +1,219 @@
+"""
+Інкрементальний обчислювач ознак.
+
+Дає ті самі значення, що й ml_utils.create_features, але рахує їх по одному рядку:
+лаги та 24-годинні ковзні середні оновлюються через кільцеві буфери з поточною сумою,
+тож додавання нової години коштує O(1) незалежно від довжини історії.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from core.ml_utils import FEATURES
+
+ROLLING_WINDOW = 24
+
+# Ряди з лагом і ковзним середнім та префікси їхніх ознак у create_features
+LAGGED_SERIES = {
+    'price': 'price',
+    'demand': 'demand',
+    'wind_generation': 'wind_gen',
+    'solar_generation': 'solar_gen',
+}
+RAW_FIELDS = [
+    'price', 'demand', 'temperature', 'wind_generation', 'solar_generation',
+    'radiation_direct_horizontal', 'radiation_diffuse_horizontal',
+]
+# Ряди, ковзне середнє яких береться за 24 години до поточної (без неї): поточна ціна — ціль моделі
+PRIOR_WINDOW_SERIES = ('price',)
+# Екзогенні ряди: відомі (або задані сценарієм) для майбутніх годин, на відміну від ціни
+EXOGENOUS_FIELDS = [field for field in RAW_FIELDS if field != 'price']
+# Ознаки, які create_features заповнює через bfill: пропуск отримує наступне відоме значення
+BACKFILLED_FEATURES = (
+    [f'{prefix}_lag1' for prefix in LAGGED_SERIES.values()]
+    + [f'{prefix}_rolling_mean_24h' for prefix in LAGGED_SERIES.values()]
+)
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class RollingWindow:
+    """
+    Кільцевий буфер фіксованої довжини з поточною сумою (сума Ноймаєра, без накопичення похибки).
+    Як rolling(window).mean() у pandas, середнє визначене лише для повного вікна без пропусків.
+    """
+    __slots__ = ('size', '_buffer', '_position', '_filled', '_missing', '_sum', '_compensation')
+
+    def __init__(self, size, values=()):
+        self.size = size
+        self._buffer = [math.nan] * size
+        self._position = 0
+        self._filled = 0
+        self._missing = 0
+        self._sum = 0.0
+        self._compensation = 0.0
+        for value in values:
+            self.push(value)
+
+    def _add(self, value):
+        total = self._sum + value
+        if abs(self._sum) >= abs(value):
+            self._compensation += (self._sum - total) + value
+        else:
+            self._compensation += (value - total) + self._sum
+        self._sum = total
+
+    def push(self, value):
+        value = math.nan if _is_missing(value) else float(value)
+        if self._filled == self.size:
+            leaving = self._buffer[self._position]
+            if math.isnan(leaving):
+                self._missing -= 1
+            else:
+                self._add(-leaving)
+        else:
+            self._filled += 1
+
+        self._buffer[self._position] = value
+        self._position = (self._position + 1) % self.size
+        if math.isnan(value):
+            self._missing += 1
+        else:
+            self._add(value)
+
+    @property
+    def last(self):
+        return self._buffer[self._position - 1] if self._filled else math.nan
+
+    @property
+    def sum(self):
+        if self._filled < self.size or self._missing:
+            return math.nan
+        return self._sum + self._compensation
+
+    def mean(self):
+        return self.sum / self.size
+
+    def values(self):
+        """
+        Значення від найстарішого до найновішого.
+        """
+        if self._filled < self.size:
+            return self._buffer[:self._filled]
+        return self._buffer[self._position:] + self._buffer[:self._position]
+
+
+class FeatureEngine:
+    """
+    Станний обчислювач ознак create_features для рядків, що надходять у порядку часу.
+
+    append() повертає рядок ознак (масив у порядку features). Ознаки, які create_features
+    заповнює через bfill (лаги та ковзні середні), можуть бути NaN у щойно виданому рядку —
+    наприклад, у перші 23 години історії; їх буде дописано в той самий масив, щойно надійде
+    наступне відоме значення, так само як bfill у пакетному розрахунку.
+    """
+
+    def __init__(self, features=FEATURES, window=ROLLING_WINDOW):
+        unknown = [feature for feature in features if feature not in _FEATURE_BUILDERS]
+        if unknown:
+            raise ValueError(f"FeatureEngine cannot compute features: {unknown}")
+        self.features = list(features)
+        self.window = window
+        self.last_timestamp = None
+        self.last_values = {}
+        self._windows = {field: RollingWindow(window) for field in LAGGED_SERIES}
+        self._index = {feature: i for i, feature in enumerate(self.features)}
+        self._pending = {feature: [] for feature in BACKFILLED_FEATURES if feature in self._index}
+
+    @classmethod
+    def from_history(cls, rows, features=FEATURES, window=ROLLING_WINDOW):
+        """
+        Відновлює стан з останніх window рядків історії (словники з timestamp та RAW_FIELDS).
+        """
+        engine = cls(features, window)
+        for row in rows:
+            engine.append(row['timestamp'], row)
+        # Рядки історії вже мають свої ознаки; незаповнені bfill-значення їх не стосуються
+        engine._pending = {feature: [] for feature in engine._pending}
+        return engine
+
+    def window_values(self, field):
+        return self._windows[field].values()
+
+    def rolling_sum(self, field):
+        return self._windows[field].sum
+
+    def append(self, timestamp, values, out=None):
+        """
+        Додає годину з сирими значеннями (словник полів EnergyData) і повертає рядок її ознак.
+        """
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            raise ValueError(f"Rows must be appended in time order: {timestamp} <= {self.last_timestamp}")
+
+        lagged = {field: self._windows[field].last for field in LAGGED_SERIES}
+        prior_means = {field: self._windows[field].mean() for field in PRIOR_WINDOW_SERIES}
+        for field, rolling in self._windows.items():
+            rolling.push(values.get(field))
+        self.last_timestamp = timestamp
+        self.last_values = {field: values.get(field) for field in RAW_FIELDS}
+
+        context = (timestamp, values, lagged, self._windows, prior_means)
+        row = np.empty(len(self.features)) if out is None else out
+        for feature, i in self._index.items():
+            value = _FEATURE_BUILDERS[feature](*context)
+            value = math.nan if _is_missing(value) else float(value)
+            row[i] = value
+            pending = self._pending.get(feature)
+            if pending is None:
+                continue
+            if math.isnan(value):
+                pending.append(row)
+            elif pending:
+                for earlier in pending:
+                    earlier[i] = value
+                pending.clear()
+        return row
+
+    def transform(self, frame):
+        """
+        Ознаки для всіх рядків DataFrame (відсортованого за timestamp) як матриця n x len(features).
+        """
+        matrix = np.empty((len(frame), len(self.features)))
+        timestamps = pd.to_datetime(frame['timestamp']).dt.to_pydatetime()
+        columns = {field: frame[field].to_numpy(dtype=float) for field in RAW_FIELDS if field in frame}
+        for n, timestamp in enumerate(timestamps):
+            self.append(timestamp, {field: column[n] for field, column in columns.items()}, out=matrix[n])
+        return matrix
+
+
+def _lag(field):
+    return lambda timestamp, values, lagged, windows, prior_means: lagged[field]
+
+
+def _rolling_mean(field):
+    if field in PRIOR_WINDOW_SERIES:
+        return lambda timestamp, values, lagged, windows, prior_means: prior_means[field]
+    return lambda timestamp, values, lagged, windows, prior_means: windows[field].mean()
+
+
+def _raw(field):
+    return lambda timestamp, values, lagged, windows, prior_means: values.get(field)
+
+
+_FEATURE_BUILDERS = {
+    'hour': lambda timestamp, *_: timestamp.hour,
+    'dayofweek': lambda timestamp, *_: timestamp.weekday(),
+    'dayofyear': lambda timestamp, *_: timestamp.timetuple().tm_yday,
+    'weekofyear': lambda timestamp, *_: timestamp.isocalendar()[1],
+    'month': lambda timestamp, *_: timestamp.month,
+    'quarter': lambda timestamp, *_: (timestamp.month - 1) // 3 + 1,
+    'year': lambda timestamp, *_: timestamp.year,
+    'is_peak_hour': lambda timestamp, *_: int(7 <= timestamp.hour <= 22),
+    'is_weekend': lambda timestamp, *_: int(timestamp.weekday() >= 5),
+    **{field: _raw(field) for field in RAW_FIELDS},
+    **{f'{prefix}_lag1': _lag(field) for field, prefix in LAGGED_SERIES.items()},
+    **{f'{prefix}_rolling_mean_24h': _rolling_mean(field) for field, prefix in LAGGED_SERIES.items()},
+}
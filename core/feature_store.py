@@ -0,0 +1,227 @@
+"""
+Online-сховище ознак для прогнозування.
+
+Стан (FeatureState) містить останні ROLLING_WINDOW годин рядів, з яких create_features будує
+лаги та ковзні середні, їхні суми та останні екзогенні значення. Імпорт оновлює стан у тій же
+транзакції, що й дані (через кільцеві буфери FeatureEngine), тож на шляху запиту ознаки для майбутніх годин обчислюються
+кількома векторними операціями NumPy без побудови DataFrame з історії.
+"""
+import math
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from core.feature_engine import EXOGENOUS_FIELDS, PRIOR_WINDOW_SERIES, ROLLING_WINDOW, FeatureEngine
+from core.forecasting import default_paths, recursive_forecast
+from core.models import DEFAULT_ZONE, EnergyData, FeatureState
+
+DEFAULT_STATE_KEY = DEFAULT_ZONE  # Стан зберігається окремо для кожної зони під її назвою
+MAX_HORIZON_HOURS = 7 * 24
+
+# Ряди, для яких зберігається вікно: лаг-1 та ковзна сума за 24 години
+WINDOW_FIELDS = ['price', 'demand', 'wind_generation', 'solar_generation']
+FORECAST_MODES = ('direct', 'recursive')
+# Назви лагових і ковзних ознак create_features для кожного ряду вікна
+_FEATURE_PREFIX = {
+    'price': 'price',
+    'demand': 'demand',
+    'wind_generation': 'wind_gen',
+    'solar_generation': 'solar_gen',
+}
+
+
+def _json_values(values):
+    # JSON не має NaN: пропуски зберігаються як null
+    return [None if value is None or math.isnan(value) else float(value) for value in values]
+
+
+def _save_state(engine, key):
+    state, _ = FeatureState.objects.update_or_create(
+        key=key,
+        defaults={
+            'as_of': engine.last_timestamp,
+            'window': {field: _json_values(engine.window_values(field)) for field in WINDOW_FIELDS},
+            # Як і rolling(window=24).mean(), сума невизначена, поки у вікні менше 24 значень або є пропуски
+            'rolling_sums': {field: _json_values([engine.rolling_sum(field)])[0] for field in WINDOW_FIELDS},
+            'last_values': {field: _json_values([engine.last_values.get(field)])[0] for field in EXOGENOUS_FIELDS},
+        },
+    )
+    return state
+
+
+def engine_from_state(state):
+    """
+    Відновлює FeatureEngine з вікна збереженого стану (години до as_of включно).
+    """
+    size = len(state.window['price'])
+    rows = []
+    for i in range(size):
+        row = {field: state.window[field][i] for field in WINDOW_FIELDS}
+        row['timestamp'] = state.as_of - timedelta(hours=size - 1 - i)
+        rows.append(row)
+    engine = FeatureEngine.from_history(rows, features=[])
+    engine.last_values = dict(state.last_values)
+    return engine
+
+
+def refresh_feature_state(key=DEFAULT_STATE_KEY):
+    """
+    Перераховує стан зони key з її останніх ROLLING_WINDOW записів EnergyData (пошук за індексом (zone, timestamp)).
+    """
+    fields = ['timestamp'] + sorted(set(WINDOW_FIELDS) | set(EXOGENOUS_FIELDS))
+    rows = list(EnergyData.objects.filter(zone=key).order_by('-timestamp').values(*fields)[:ROLLING_WINDOW])
+    if not rows:
+        FeatureState.objects.filter(key=key).delete()
+        return None
+    rows.reverse()
+    return _save_state(FeatureEngine.from_history(rows, features=[]), key)
+
+
+def update_feature_state(frame, key=DEFAULT_STATE_KEY):
+    """
+    Оновлює стан зони key після запису її рядків frame у EnergyData. Нові години після as_of
+    проштовхуються в кільцеві буфери (не більше ROLLING_WINDOW останніх рядків, тож вартість
+    не залежить ні від розміру frame, ні від історії). Якщо frame змінює години до as_of
+    (дозавантаження або виправлення), стан перераховується з бази.
+    """
+    state = FeatureState.objects.filter(key=key).first()
+    first_timestamp = frame['timestamp'].min()
+    if state is None or state.as_of is None or first_timestamp <= state.as_of:
+        return refresh_feature_state(key)
+
+    tail = frame.sort_values('timestamp').tail(ROLLING_WINDOW)
+    # Якщо нових рядків не менше за вікно, попередній стан уже не впливає на ознаки
+    engine = FeatureEngine(features=[]) if len(tail) == ROLLING_WINDOW else engine_from_state(state)
+    timestamps = pd.to_datetime(tail['timestamp'], utc=True).dt.to_pydatetime()
+    columns = {field: tail[field].to_numpy(dtype=float) for field in set(WINDOW_FIELDS) | set(EXOGENOUS_FIELDS)}
+    for n, timestamp in enumerate(timestamps):
+        engine.append(timestamp, {field: column[n] for field, column in columns.items()})
+    return _save_state(engine, key)
+
+
+def get_feature_state(key=DEFAULT_STATE_KEY):
+    state = FeatureState.objects.filter(key=key).first()
+    if state is None or state.as_of is None:
+        raise LookupError("Feature state is empty. Import data with 'python manage.py fetch_energy_data' first.")
+    return state
+
+
+def forecast_hours(state, start=None, end=None):
+    """
+    Годинні мітки прогнозу в межах (as_of, as_of + MAX_HORIZON_HOURS].
+    start/end округлюються до годин; за замовчуванням — наступні 24 години.
+    """
+    as_of = pd.Timestamp(state.as_of).tz_convert('UTC')
+    first = pd.Timestamp(start).tz_convert('UTC').ceil('h') if start is not None else as_of + pd.Timedelta(hours=1)
+    last = pd.Timestamp(end).tz_convert('UTC').floor('h') if end is not None else first + pd.Timedelta(hours=23)
+    if first <= as_of:
+        raise ValueError(f"Forecast range must start after the last actual hour ({as_of.isoformat()}).")
+    if last < first:
+        raise ValueError("Forecast range is empty: 'end' is before 'start'.")
+    if last > as_of + pd.Timedelta(hours=MAX_HORIZON_HOURS):
+        raise ValueError(f"Forecast horizon is limited to {MAX_HORIZON_HOURS} hours after {as_of.isoformat()}.")
+    return pd.date_range(as_of + pd.Timedelta(hours=1), last, freq='h'), first
+
+
+def _persistence_paths(state, horizon):
+    """
+    Екзогенні ряди за замовчуванням для прямого прогнозу: останнє відоме значення
+    (як у пакетному прогнозі train_predict_model).
+    """
+    return {
+        field: np.full(horizon, np.nan if state.last_values.get(field) is None else float(state.last_values[field]))
+        for field in EXOGENOUS_FIELDS
+    }
+
+
+def _apply_overrides(paths, requested, overrides):
+    """
+    Override — число для всіх запитаних годин або масив довжиною requested (останні requested годин горизонту).
+    """
+    for field, value in overrides.items():
+        override = np.array(value, dtype=float)
+        if override.ndim > 1:
+            raise ValueError(f"Override '{field}' must be a number or a flat list of numbers.")
+        if override.ndim == 1 and len(override) != requested:
+            raise ValueError(f"Override '{field}' must be a number or a list of {requested} hourly values.")
+        path = paths[field].copy()
+        path[len(path) - requested:] = override
+        paths[field] = path
+    return paths
+
+
+def build_feature_matrix(state, timestamps, features, overrides=None, requested=None):
+    """
+    Матриця ознак (len(timestamps) x len(features)) для годин одразу після state.as_of.
+    Семантика збігається з create_features над історією, доповненою майбутніми рядками:
+    майбутня ціна невідома (NaN), тож price_lag1 відомий лише для першої години.
+    requested — кількість останніх годин, до яких застосовуються overrides (за замовчуванням усі).
+    """
+    horizon = len(timestamps)
+    paths = _apply_overrides(_persistence_paths(state, horizon), horizon if requested is None else requested,
+                             overrides or {})
+    paths['price'] = np.full(horizon, np.nan)
+
+    columns = {
+        'hour': timestamps.hour,
+        'dayofweek': timestamps.dayofweek,
+        'dayofyear': timestamps.dayofyear,
+        'weekofyear': timestamps.isocalendar().week.to_numpy(dtype=int),
+        'month': timestamps.month,
+        'quarter': timestamps.quarter,
+        'year': timestamps.year,
+        'is_peak_hour': ((timestamps.hour >= 7) & (timestamps.hour <= 22)).astype(int),
+        'is_weekend': (timestamps.dayofweek >= 5).astype(int),
+    }
+    for field in ('demand', 'temperature', 'wind_generation', 'solar_generation',
+                  'radiation_direct_horizontal', 'radiation_diffuse_horizontal'):
+        columns[field] = paths[field]
+
+    for field, prefix in _FEATURE_PREFIX.items():
+        window = np.array(state.window[field], dtype=float)
+        path = paths[field]
+        # lag1: остання фактична година, далі — попередня година горизонту
+        columns[f'{prefix}_lag1'] = np.concatenate([window[-1:], path[:-1]])
+        # Ковзна сума оновлюється як sum + (нове значення - значення, що виходить з вікна)
+        rolling_sum = state.rolling_sums.get(field)
+        if rolling_sum is None or len(window) < ROLLING_WINDOW:
+            columns[f'{prefix}_rolling_mean_24h'] = np.full(horizon, np.nan)
+            continue
+        leaving = np.concatenate([window, path])[:horizon]
+        means = (rolling_sum + np.cumsum(path - leaving)) / ROLLING_WINDOW
+        if field in PRIOR_WINDOW_SERIES:
+            # Середнє без поточної години: для години t це середнє вікна після години t-1
+            means = np.concatenate([[rolling_sum / ROLLING_WINDOW], means[:-1]])
+        columns[f'{prefix}_rolling_mean_24h'] = means
+
+    missing = [feature for feature in features if feature not in columns]
+    if missing:
+        raise ValueError(f"Feature store cannot compute model features: {missing}")
+    return np.column_stack([np.asarray(columns[feature], dtype=float) for feature in features])
+
+
+def predict_online(loaded_model, start=None, end=None, overrides=None, mode='direct', key=DEFAULT_STATE_KEY):
+    """
+    Прогноз цін для годин [start, end] після останньої фактичної години.
+    mode='direct' — усі години однією матрицею ознак (майбутня ціна невідома, як у пакетному прогнозі);
+    mode='recursive' — покроково, з прогнозом ціни в лагах і ковзному середньому (core.forecasting).
+    Повертає (timestamps, predicted_prices, state).
+    """
+    if mode not in FORECAST_MODES:
+        raise ValueError(f"Invalid mode '{mode}': expected one of {list(FORECAST_MODES)}.")
+    state = get_feature_state(key)
+    timestamps, first = forecast_hours(state, start, end)
+    # Ознаки рахуються від as_of, а у відповідь потрапляють лише запитані години
+    selected = timestamps >= first
+    requested = int(selected.sum())
+
+    if mode == 'recursive':
+        engine = engine_from_state(state)
+        paths = _apply_overrides(default_paths(engine, len(timestamps)), requested, overrides or {})
+        result = recursive_forecast(loaded_model.model, loaded_model.features, engine, len(timestamps), paths)
+        predictions = result.predicted_prices[0]
+    else:
+        X = build_feature_matrix(state, timestamps, loaded_model.features, overrides, requested=requested)
+        predictions = loaded_model.model.predict(X)
+    return timestamps[selected], predictions[selected], state
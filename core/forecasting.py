@@ -0,0 +1,185 @@
+"""
+Рекурсивне багатокрокове прогнозування.
+
+Кожен крок горизонту прогнозується окремо, а прогноз ціни повертається в price_lag1 та
+ковзне середнє ціни наступних кроків. Сценарії (різні шляхи попиту, погоди, генерації)
+обробляються разом: на кожному кроці формується одна матриця ознак для всіх сценаріїв
+і виконується один векторний predict.
+"""
+import numpy as np
+import pandas as pd
+
+from core.feature_engine import EXOGENOUS_FIELDS, LAGGED_SERIES, ROLLING_WINDOW
+
+HOURLY = pd.Timedelta(hours=1)
+
+
+class ForecastResult:
+    """
+    Результат рекурсивного прогнозу: мітки горизонту, ціни та ковзні середні ціни (сценарії x години).
+    """
+
+    def __init__(self, timestamps, predicted_prices, price_rolling_means):
+        self.timestamps = timestamps
+        self.predicted_prices = predicted_prices
+        self.price_rolling_means = price_rolling_means
+
+    def to_frame(self, scenario=0):
+        """
+        Один сценарій у форматі predict_prices: timestamp, price, predicted_price, price_rolling_mean_24h.
+        """
+        return pd.DataFrame({
+            'timestamp': self.timestamps,
+            'price': np.nan,
+            'predicted_price': self.predicted_prices[scenario],
+            'price_rolling_mean_24h': self.price_rolling_means[scenario],
+        })
+
+
+class _Window:
+    """
+    Кільцеві буфери одного ряду для всіх сценаріїв: масив (сценарії x вікно), суми без пропусків
+    та кількість пропусків у вікні.
+    """
+
+    def __init__(self, history, scenarios, size=ROLLING_WINDOW):
+        values = np.full(size, np.nan)
+        history = np.asarray(history, dtype=float)[-size:]
+        if len(history):
+            values[size - len(history):] = history
+        self.buffer = np.tile(values, (scenarios, 1))
+        self.size = size
+        self.position = 0  # Індекс найстарішого значення
+        self.sums = np.tile(np.nansum(values), scenarios)
+        self.missing = np.tile(np.isnan(values).sum(), scenarios)
+
+    @property
+    def last(self):
+        return self.buffer[:, self.position - 1]
+
+    def mean(self):
+        return np.where(self.missing == 0, self.sums / self.size, np.nan)
+
+    def push(self, values):
+        leaving = self.buffer[:, self.position]
+        self.sums += np.nan_to_num(values) - np.nan_to_num(leaving)
+        self.missing += np.isnan(values).astype(int) - np.isnan(leaving).astype(int)
+        self.buffer[:, self.position] = values
+        self.position = (self.position + 1) % self.size
+
+
+def default_paths(engine, horizon):
+    """
+    Екзогенні шляхи за замовчуванням. Для рядів з вікном (попит, вітер, сонце) — сезонний наївний
+    прогноз: значення тієї ж години попередньої доби. Для інших — останнє відоме значення.
+    """
+    paths = {}
+    for field in EXOGENOUS_FIELDS:
+        last_value = engine.last_values.get(field)
+        last_value = np.nan if last_value is None else float(last_value)
+        path = np.full(horizon, last_value)
+        if field in LAGGED_SERIES:
+            window = np.asarray(engine.window_values(field), dtype=float)
+            if len(window) == ROLLING_WINDOW and not np.isnan(window).any():
+                path = np.resize(window, horizon)
+        paths[field] = path
+    return paths
+
+
+def _scenario_paths(engine, horizon, scenarios):
+    """
+    Зводить шляхи сценаріїв до масивів (сценарії x години). Значення scenarios — число,
+    масив довжини horizon (спільний для всіх сценаріїв) або масив (сценарії x horizon).
+    """
+    paths = default_paths(engine, horizon)
+    for field, value in (scenarios or {}).items():
+        if field not in paths:
+            raise ValueError(f"Unknown scenario field '{field}'. Available fields: {EXOGENOUS_FIELDS}")
+        value = np.asarray(value, dtype=float)
+        if value.ndim == 0:
+            value = np.full(horizon, float(value))
+        if value.shape[-1] != horizon or value.ndim > 2:
+            raise ValueError(f"Scenario '{field}' must have {horizon} hourly values per scenario.")
+        paths[field] = value
+
+    count = max(path.shape[0] if path.ndim == 2 else 1 for path in paths.values())
+    for field, path in paths.items():
+        if path.ndim == 2 and path.shape[0] not in (1, count):
+            raise ValueError(f"Scenario '{field}' has {path.shape[0]} scenarios, expected {count}.")
+        paths[field] = np.broadcast_to(path, (count, horizon))
+    return paths, count
+
+
+def recursive_forecast(model, features, engine, horizon, scenarios=None, noise=None):
+    """
+    Рекурсивний прогноз на horizon годин після engine.last_timestamp для всіх сценаріїв.
+    noise — необов'язкові збурення ціни (сценарії x години): додаються до прогнозу кожного кроку
+    до того, як він потрапить у лаги наступних (симуляція Монте-Карло, core.simulation).
+
+    engine — FeatureEngine зі станом історії (останні 24 години), model — будь-який об'єкт
+    з predict(X), features — порядок стовпців X. На кроці t:
+      * price_lag1 — ціна кроку t-1 (фактична для першого кроку, далі прогнозована);
+      * price_rolling_mean_24h — середнє 24 годин до t, як у create_features (поточна ціна і є ціллю прогнозу);
+      * лаги та ковзні середні екзогенних рядів — як у create_features, з поточною годиною.
+    """
+    if engine.last_timestamp is None:
+        raise ValueError("Feature engine has no history to forecast from.")
+
+    timestamps = pd.date_range(pd.Timestamp(engine.last_timestamp) + HOURLY, periods=horizon, freq='h')
+    paths, count = _scenario_paths(engine, horizon, scenarios)
+
+    calendar = {
+        'hour': timestamps.hour,
+        'dayofweek': timestamps.dayofweek,
+        'dayofyear': timestamps.dayofyear,
+        'weekofyear': timestamps.isocalendar().week.to_numpy(dtype=int),
+        'month': timestamps.month,
+        'quarter': timestamps.quarter,
+        'year': timestamps.year,
+        'is_peak_hour': ((timestamps.hour >= 7) & (timestamps.hour <= 22)).astype(int),
+        'is_weekend': (timestamps.dayofweek >= 5).astype(int),
+    }
+    lagged_features = {
+        name for prefix in LAGGED_SERIES.values() for name in (f'{prefix}_lag1', f'{prefix}_rolling_mean_24h')
+    }
+    unknown = [feature for feature in features if feature not in calendar.keys() | paths.keys() | lagged_features]
+    if unknown:
+        raise ValueError(f"Recursive forecast cannot compute features: {unknown}")
+
+    if noise is not None:
+        noise = np.asarray(noise, dtype=float)
+        if noise.shape[-1] != horizon or noise.ndim > 2:
+            raise ValueError(f"Price noise must have {horizon} hourly values per scenario.")
+        count = max(count, noise.shape[0] if noise.ndim == 2 else 1)
+        paths = {field: np.broadcast_to(path, (count, horizon)) for field, path in paths.items()}
+        noise = np.broadcast_to(noise, (count, horizon))
+
+    windows = {field: _Window(engine.window_values(field), count) for field in LAGGED_SERIES}
+    predicted_prices = np.empty((count, horizon))
+    price_rolling_means = np.empty((count, horizon))
+    X = np.empty((count, len(features)))
+    columns = {}
+
+    for step in range(horizon):
+        for field, window in windows.items():
+            prefix = LAGGED_SERIES[field]
+            columns[f'{prefix}_lag1'] = window.last.copy()
+            if field != 'price':
+                window.push(paths[field][:, step])
+            columns[f'{prefix}_rolling_mean_24h'] = window.mean()
+        for field, path in paths.items():
+            columns[field] = path[:, step]
+        for name, values in calendar.items():
+            columns[name] = values[step]
+
+        for i, feature in enumerate(features):
+            X[:, i] = columns[feature]
+        prices = np.asarray(model.predict(X), dtype=float)
+        if noise is not None:
+            prices = prices + noise[:, step]
+
+        predicted_prices[:, step] = prices
+        price_rolling_means[:, step] = columns['price_rolling_mean_24h']
+        windows['price'].push(prices)
+
+    return ForecastResult(timestamps, predicted_prices, price_rolling_means)
@@ -0,0 +1,386 @@
+import hashlib
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+
+from core.archive import sync_archive
+from core.data_cache import bump_data_version, get_data_version
+from core.feature_store import update_feature_state
+from core.models import DEFAULT_ZONE, ZONE_MAX_LENGTH, EnergyData, IngestCheckpoint
+from core.rollups import refresh_rollups
+
+try:
+    import resource  # Немає на Windows
+except ImportError:  # pragma: no cover
+    resource = None
+
+TIMESTAMP_COL = 'utc_timestamp'
+
+# Широкий CSV OPSD містить групу стовпців на кожну торгову зону: <зона>_<суфікс>.
+# Відповідність суфіксів полям моделі EnergyData.
+ZONE_COLUMN_SUFFIXES = {
+    'price_day_ahead': 'price',
+    'load_actual_entsoe_transparency': 'demand',
+    'wind_generation_actual': 'wind_generation',
+    'solar_generation_actual': 'solar_generation',
+}
+# Погода: стовпець зони (<зона>_temperature), якщо він є, інакше спільний для всіх зон
+WEATHER_FIELDS = ['temperature', 'radiation_direct_horizontal', 'radiation_diffuse_horizontal']
+# Прямого стовпця 'Supply' у датасеті немає, тому supply залишається None.
+
+# Поля, для яких рядок з NaN відкидається (пропусків для DK_1 дуже мало: 0.00% - 0.03%)
+REQUIRED_FIELDS = [*ZONE_COLUMN_SUFFIXES.values(), *WEATHER_FIELDS]
+
+VALUE_FIELDS = [
+    'price', 'demand', 'supply', 'temperature', 'wind_generation', 'solar_generation',
+    'radiation_direct_horizontal', 'radiation_diffuse_horizontal',
+]
+
+DEFAULT_CHUNKSIZE = 50_000
+DEFAULT_BATCH_SIZE = 5_000
+TAIL_BLOCK_SIZE = 64 * 1024  # Розмір блоку для пошуку кінця останнього рядка
+
+
+def zone_columns(zone, header=()):
+    """
+    Відповідність стовпців CSV полям EnergyData для зони: {поле: стовпець}.
+    """
+    columns = {field: f'{zone}_{suffix}' for suffix, field in ZONE_COLUMN_SUFFIXES.items()}
+    for field in WEATHER_FIELDS:
+        columns[field] = f'{zone}_{field}' if f'{zone}_{field}' in header else field
+    return columns
+
+
+def detect_zones(header):
+    """
+    Зони, для яких у заголовку є повна група стовпців, у порядку заголовка.
+    """
+    suffix = f'_{next(iter(ZONE_COLUMN_SUFFIXES))}'
+    candidates = [column[:-len(suffix)] for column in header if column.endswith(suffix)]
+    return [zone for zone in candidates if not _missing_columns(zone, header)]
+
+
+def _missing_columns(zone, header):
+    return [column for column in zone_columns(zone, header).values() if column not in header]
+
+
+def source_columns(zones, header):
+    """
+    Перелік стовпців CSV, які читаються під час імпорту зон (кожен один раз).
+    """
+    columns = [TIMESTAMP_COL]
+    for zone in zones:
+        columns.extend(column for column in zone_columns(zone, header).values() if column not in columns)
+    return columns
+
+
+def validate_columns(csv_path, zones=None):
+    """
+    Читає лише заголовок CSV. Повертає (зони, відсутні обов'язкові стовпці, усі стовпці файлу).
+    Без zones імпортуються всі зони з повною групою стовпців; якщо таких немає,
+    відсутні стовпці наводяться для DEFAULT_ZONE.
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns.tolist()
+    if zones is None:
+        zones = detect_zones(header) or [DEFAULT_ZONE]
+    too_long = [zone for zone in zones if len(zone) > ZONE_MAX_LENGTH]
+    if too_long:
+        raise ValueError(f"Zone name(s) {too_long} are longer than {ZONE_MAX_LENGTH} characters.")
+    missing = [] if TIMESTAMP_COL in header else [TIMESTAMP_COL]
+    for zone in zones:
+        missing.extend(column for column in _missing_columns(zone, header) if column not in missing)
+    return list(zones), missing, header
+
+
+def prepare_chunk(chunk, zones=(DEFAULT_ZONE,)):
+    """
+    Векторно перетворює сирий широкий шматок CSV у довгий DataFrame з полями моделі EnergyData:
+    рядок на кожну пару (година, зона). Стовпці всіх зон читаються одним масивом (години x зони),
+    тож вартість не залежить від кількості зон. Повертає (DataFrame, кількість відкинутих рядків).
+    """
+    header = chunk.columns
+    groups = [zone_columns(zone, header) for zone in zones]
+    frame = pd.DataFrame({
+        'zone': np.tile(np.asarray(zones, dtype=object), len(chunk)),
+        'timestamp': pd.DatetimeIndex(pd.to_datetime(chunk[TIMESTAMP_COL], utc=True, errors='coerce')).repeat(len(zones)),
+    })
+    for field in VALUE_FIELDS:
+        if field in groups[0]:
+            frame[field] = chunk[[group[field] for group in groups]].to_numpy(dtype=float).ravel()
+        else:
+            frame[field] = np.nan
+
+    initial_rows = len(frame)
+    frame = frame.dropna(subset=['timestamp', *REQUIRED_FIELDS])
+    # У межах одного шматка залишаємо останнє значення для кожної години зони
+    frame = frame.drop_duplicates(subset=['zone', 'timestamp'], keep='last')
+
+    return frame[['zone', 'timestamp', *VALUE_FIELDS]], initial_rows - len(frame)
+
+
+def _column_values(series):
+    """
+    Перетворює стовпець у список Python-значень, замінюючи NaN на None.
+    """
+    values = series.to_numpy(dtype=float)
+    if np.isnan(values).any():
+        return np.where(np.isnan(values), None, values).tolist()
+    return values.tolist()
+
+
+def upsert_frame(frame, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Записує підготовлений DataFrame (усіх зон) одним bulk-запитом з upsert за (zone, timestamp)
+    і оновлює агрегати зачеплених періодів, стан online-ознак кожної зони та версію даних
+    в межах однієї транзакції. Повертає кількість записаних рядків.
+    """
+    if frame.empty:
+        return 0
+
+    columns = {field: _column_values(frame[field]) for field in VALUE_FIELDS}
+    zones = frame['zone'].tolist()
+    timestamps = frame['timestamp'].tolist()
+    objs = [
+        EnergyData(zone=zones[i], timestamp=ts, **{field: columns[field][i] for field in VALUE_FIELDS})
+        for i, ts in enumerate(timestamps)
+    ]
+
+    with transaction.atomic():
+        EnergyData.objects.bulk_create(
+            objs,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=['zone', 'timestamp'],
+            update_fields=VALUE_FIELDS,
+        )
+        refresh_rollups(frame['timestamp'].min(), frame['timestamp'].max(), zones=frame['zone'].unique().tolist())
+        for zone, zone_frame in frame.groupby('zone', sort=False):
+            update_feature_state(zone_frame, key=zone)
+        bump_data_version()
+    return len(objs)
+
+
+def peak_memory_mb():
+    """
+    Пікове використання пам'яті процесом (RSS) у мегабайтах або None, якщо недоступно.
+    """
+    if resource is None:
+        return None
+    # На Linux ru_maxrss у кілобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _ingest_chunks(chunks, zones, batch_size, progress, after=None):
+    """
+    Обробляє послідовність сирих шматків CSV для зон zones. Якщо задано after, рядки з
+    timestamp <= after відкидаються ще до запису. Окрім статистики, відстежує
+    максимальний timestamp і те, чи йдуть рядки у зростаючому порядку.
+    """
+    stats = {'rows_read': 0, 'rows_written': 0, 'rows_dropped': 0, 'rows_skipped': 0,
+             'chunks': 0, 'seconds': 0.0, 'max_timestamp': None, 'is_sorted': True}
+    started = time.perf_counter()
+    version_before = get_data_version()
+    partitions = set()  # (зона, рік) записаних рядків — партиції колонкового архіву
+
+    for chunk in chunks:
+        frame, dropped = prepare_chunk(chunk, zones)
+        stats['rows_read'] += len(chunk)
+        stats['rows_dropped'] += dropped
+
+        if not frame.empty:
+            chunk_sorted = frame['timestamp'].is_monotonic_increasing
+            if stats['max_timestamp'] is not None and frame['timestamp'].iloc[0] <= stats['max_timestamp']:
+                chunk_sorted = False
+            stats['is_sorted'] = stats['is_sorted'] and chunk_sorted
+            chunk_max = frame['timestamp'].max()
+            if stats['max_timestamp'] is None or chunk_max > stats['max_timestamp']:
+                stats['max_timestamp'] = chunk_max
+
+        if after is not None:
+            new_rows = frame['timestamp'] > after
+            stats['rows_skipped'] += int((~new_rows).sum())
+            frame = frame[new_rows]
+
+        stats['rows_written'] += upsert_frame(frame, batch_size=batch_size)
+        partitions.update(zip(frame['zone'], frame['timestamp'].dt.year))
+        stats['chunks'] += 1
+        stats['seconds'] = time.perf_counter() - started
+        if progress:
+            progress(stats['chunks'], stats)
+
+    stats['archive_partitions'] = sync_archive(partitions, since=version_before) if stats['rows_written'] else 0
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_second'] = stats['rows_written'] / stats['seconds'] if stats['seconds'] else 0.0
+    stats['peak_memory_mb'] = peak_memory_mb()
+    return stats
+
+
+def import_csv(csv_path, chunksize=DEFAULT_CHUNKSIZE, batch_size=DEFAULT_BATCH_SIZE, progress=None, source=None,
+               zones=None):
+    """
+    Потоково імпортує CSV шматками по chunksize рядків: кожен шматок векторно
+    обробляється (усі зони за один прохід) і записується окремою транзакцією з upsert за (zone, timestamp).
+    zones — зони для імпорту (за замовчуванням усі, знайдені в заголовку).
+    progress(chunk_index, stats) викликається після кожного шматка.
+    Якщо задано source, після імпорту оновлюється його IngestCheckpoint.
+    """
+    zones, columns = _import_columns(csv_path, zones)
+    with open(csv_path, 'rb') as f:
+        end_offset = _complete_end(f)
+
+    stats = _ingest_chunks(_read_chunks(csv_path, 0, end_offset, chunksize, columns), zones, batch_size, progress)
+    stats['zones'] = zones
+
+    if source:
+        _save_checkpoint(csv_path, source, end_offset, stats)
+    return stats
+
+
+def import_csv_incremental(csv_path, source, chunksize=DEFAULT_CHUNKSIZE, batch_size=DEFAULT_BATCH_SIZE,
+                           progress=None, zones=None):
+    """
+    Імпортує лише рядки, новіші за high-water mark джерела.
+
+    Якщо під час попереднього імпорту файл був відсортований за часом і його вже
+    прочитана частина не змінилася, читання починається з збереженого байтового
+    зсуву, тож вартість пропорційна кількості нових рядків. Інакше файл
+    перечитується повністю, але записуються лише рядки після high-water mark.
+    High-water mark спільний для зон, з якими його записано: для іншого набору зон
+    (нова зона ще без історії або частина зон, решта яких відстала б) файл імпортується повністю.
+    """
+    zones, columns = _import_columns(csv_path, zones)
+    checkpoint = IngestCheckpoint.objects.filter(source=source).first()
+    if checkpoint is None or checkpoint.last_timestamp is None or sorted(checkpoint.zones) != sorted(zones):
+        stats = import_csv(csv_path, chunksize=chunksize, batch_size=batch_size, progress=progress, source=source,
+                           zones=zones)
+        stats['mode'] = 'full'
+        return stats
+
+    with open(csv_path, 'rb') as f:
+        end_offset = _complete_end(f)
+        can_seek = checkpoint.is_sorted and _tail_matches(f, checkpoint)
+
+    start_offset = checkpoint.byte_offset if can_seek else 0
+    chunks = _read_chunks(csv_path, start_offset, end_offset, chunksize, columns)
+
+    stats = _ingest_chunks(chunks, zones, batch_size, progress, after=checkpoint.last_timestamp)
+    stats['zones'] = zones
+    stats['mode'] = 'seek' if can_seek else 'scan'
+    # Відсортованість нового хвоста має продовжувати вже імпортовану частину
+    if can_seek and stats['max_timestamp'] is not None:
+        stats['is_sorted'] = stats['is_sorted'] and stats['rows_skipped'] == 0
+    elif can_seek:
+        stats['is_sorted'] = True
+    _save_checkpoint(csv_path, source, end_offset, stats, previous=checkpoint)
+    return stats
+
+
+class _BoundedReader(io.RawIOBase):
+    """
+    Файловий об'єкт, що віддає не більше limit байтів із поточної позиції f.
+    """
+
+    def __init__(self, f, limit):
+        self._f = f
+        self._remaining = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._f.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+def _import_columns(csv_path, zones):
+    zones, missing, header = validate_columns(csv_path, zones)
+    if missing:
+        raise ValueError(f"Required column(s) {missing} not found in the CSV file.")
+    return zones, source_columns(zones, header)
+
+
+def _read_chunks(csv_path, start, end, chunksize, columns):
+    """
+    Генерує шматки CSV з байтового діапазону [start, end). Якщо start > 0,
+    назви стовпців беруться із заголовка файлу.
+    """
+    header = pd.read_csv(csv_path, nrows=0).columns.tolist()
+    with open(csv_path, 'rb') as f:
+        if start > 0:
+            f.seek(start)
+        if end <= f.tell():
+            return
+        stream = io.BufferedReader(_BoundedReader(f, end - f.tell()))
+        options = {'header': None, 'names': header} if start > 0 else {}
+        yield from pd.read_csv(stream, usecols=columns, chunksize=chunksize, **options)
+
+
+def _complete_end(f):
+    """
+    Байтовий зсув одразу після останнього символу нового рядка у файлі.
+    Недописаний останній рядок (якщо файл зараз доповнюється) не враховується.
+    """
+    size = f.seek(0, os.SEEK_END)
+    position = size
+    while position > 0:
+        block_start = max(0, position - TAIL_BLOCK_SIZE)
+        f.seek(block_start)
+        block = f.read(position - block_start)
+        newline = block.rfind(b'\n')
+        if newline != -1:
+            return block_start + newline + 1
+        position = block_start
+    return 0
+
+
+def _tail_hash(f, offset):
+    """
+    sha1 останнього повного рядка, що закінчується на offset.
+    """
+    if offset <= 0:
+        return ''
+    block_start = max(0, offset - TAIL_BLOCK_SIZE)
+    f.seek(block_start)
+    block = f.read(offset - block_start)
+    line_start = block.rfind(b'\n', 0, len(block) - 1) + 1
+    return hashlib.sha1(block[line_start:]).hexdigest()
+
+
+def _tail_matches(f, checkpoint):
+    """
+    Перевіряє, що вже імпортована частина файлу не була переписана.
+    """
+    size = f.seek(0, os.SEEK_END)
+    if checkpoint.byte_offset <= 0 or checkpoint.byte_offset > size:
+        return False
+    return _tail_hash(f, checkpoint.byte_offset) == checkpoint.tail_hash
+
+
+def _save_checkpoint(csv_path, source, end_offset, stats, previous=None):
+    last_timestamp = stats['max_timestamp']
+    if previous is not None and previous.last_timestamp is not None:
+        if last_timestamp is None or last_timestamp < previous.last_timestamp:
+            last_timestamp = previous.last_timestamp
+
+    with open(csv_path, 'rb') as f:
+        tail_hash = _tail_hash(f, end_offset)
+
+    IngestCheckpoint.objects.update_or_create(
+        source=source,
+        defaults={
+            'last_timestamp': last_timestamp,
+            'byte_offset': end_offset,
+            'tail_hash': tail_hash,
+            'is_sorted': stats['is_sorted'],
+            'zones': stats['zones'],
+        },
+    )
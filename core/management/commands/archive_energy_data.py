@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.archive import archive_dir, sync_archive
+
+
+class Command(BaseCommand):
+    help = ("Rebuilds the columnar Arrow archive of EnergyData (one file per zone and year) that training, "
+            "backtesting and tuning read instead of the database. Imports keep it in sync automatically.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE(f"Rebuilding EnergyData archive in {archive_dir()}..."))
+        partitions = sync_archive()
+        if partitions is None:
+            raise CommandError("pyarrow is not installed; the columnar archive is disabled.")
+        self.stdout.write(self.style.SUCCESS(f"Successfully wrote {partitions} archive partitions."))
@@ -0,0 +1,119 @@
+import os
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from core.archive import load_energy_frame
+from core.models import DEFAULT_ZONE
+from core.backtesting import REFERENCE_WINDOW, make_folds, prior_mean_reference, run_backtest
+from core.ml_utils import FEATURES, TARGET, MODEL_PARAMS, create_features
+from core.recommendations import RECOMMENDATION_THRESHOLD_BUY, RECOMMENDATION_THRESHOLD_SELL
+
+ML_RELEVANT_COLUMNS = [
+    'price', 'demand', 'temperature', 'wind_generation', 'solar_generation',
+    'radiation_direct_horizontal', 'radiation_diffuse_horizontal'
+]
+
+
+class Command(BaseCommand):
+    help = ("Backtests the price model with rolling-origin folds over the full EnergyData history: "
+            "per-fold RMSE/MAE and PnL of the BUY/SELL recommendation rule.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zone', default=DEFAULT_ZONE, help='Bidding zone whose history is used.')
+        parser.add_argument('--folds', type=int, default=12, help='Maximum number of folds, walking back from the latest data.')
+        parser.add_argument('--test-days', type=int, default=30, help='Length of each evaluation period in days.')
+        parser.add_argument(
+            '--step-days',
+            type=int,
+            default=None,
+            help='Distance between consecutive fold origins in days (default: --test-days).',
+        )
+        parser.add_argument(
+            '--validation-days',
+            type=int,
+            default=14,
+            help='Days before each test period used for early stopping (not for evaluation).',
+        )
+        parser.add_argument(
+            '--train-days',
+            type=int,
+            default=None,
+            help='Length of a rolling training window in days (default: all earlier history).',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of worker processes (default: all CPU cores).',
+        )
+
+    def handle(self, *args, **options):
+        for name in ('folds', 'test_days', 'validation_days', 'workers', 'step_days', 'train_days'):
+            if options[name] is not None and options[name] <= 0:
+                raise CommandError(f"--{name.replace('_', '-')} must be a positive integer.")
+
+        zone = options['zone']
+        self.stdout.write(self.style.NOTICE(f"Loading {zone} data..."))
+        df_full = load_energy_frame([zone], ML_RELEVANT_COLUMNS)
+        if df_full.empty:
+            raise CommandError(f"No data found in EnergyData model for zone {zone}. Please import data first.")
+        self.stdout.write(f"Read {len(df_full)} rows from the {df_full.attrs['source']}.")
+        df_full = df_full.drop(columns='zone').dropna(subset=ML_RELEVANT_COLUMNS).reset_index(drop=True)
+
+        # Ознаки рахуються один раз; фолди лише вирізають свої рядки
+        started = time.perf_counter()
+        df_features = create_features(df_full)
+        reference = prior_mean_reference(df_features['price'])
+        # Перші години без повного вікна цін пропускаються: їхні цінові ознаки заповнені bfill
+        # з цін цієї ж або пізніших годин
+        df_features = df_features.iloc[REFERENCE_WINDOW:].reset_index(drop=True)
+        reference = reference[REFERENCE_WINDOW:]
+        if df_features.empty:
+            raise CommandError("Not enough history for a single fold. Reduce --test-days/--validation-days.")
+        timestamps = df_features['timestamp'].dt.tz_localize(None).to_numpy(dtype='datetime64[s]')
+        self.stdout.write(f"Features for {len(df_features)} rows computed in {time.perf_counter() - started:.2f}s.")
+
+        folds = make_folds(
+            timestamps, options['folds'],
+            test_days=options['test_days'],
+            step_days=options['step_days'],
+            validation_days=options['validation_days'],
+            train_days=options['train_days'],
+        )
+        if not folds:
+            raise CommandError("Not enough history for a single fold. Reduce --test-days/--validation-days.")
+
+        workers = min(options['workers'] or os.cpu_count() or 1, len(folds))
+        self.stdout.write(self.style.NOTICE(f"Running {len(folds)} folds on {workers} worker process(es)..."))
+        self.stdout.write(f"{'fold':>4} {'test period':>23} {'train rows':>10} {'rmse':>7} {'mae':>7} "
+                          f"{'pnl EUR':>10} {'trades':>6} {'sec':>6}")
+
+        def report(result):
+            period = f"{result['test_start']:%Y-%m-%d} .. {result['test_end']:%Y-%m-%d}"
+            self.stdout.write(
+                f"{result['fold']:>4} {period:>23} {result['train_rows']:>10} {result['rmse']:>7.2f} "
+                f"{result['mae']:>7.2f} {result['pnl']:>10.2f} {result['trades']:>6} {result['seconds']:>6.1f}"
+            )
+
+        started = time.perf_counter()
+        results = run_backtest(
+            df_features[FEATURES].to_numpy(dtype=np.float32),
+            df_features[TARGET].to_numpy(dtype=float),
+            timestamps,
+            reference,
+            folds,
+            MODEL_PARAMS,
+            (RECOMMENDATION_THRESHOLD_BUY, RECOMMENDATION_THRESHOLD_SELL),
+            workers=workers,
+            on_result=report,
+        )
+
+        rmse = np.array([result['rmse'] for result in results])
+        mae = np.array([result['mae'] for result in results])
+        self.stdout.write(self.style.SUCCESS(
+            f"Backtest completed in {time.perf_counter() - started:.1f}s: "
+            f"RMSE {rmse.mean():.2f} ± {rmse.std():.2f}, MAE {mae.mean():.2f} ± {mae.std():.2f}, "
+            f"total PnL {sum(result['pnl'] for result in results):.2f} EUR "
+            f"over {sum(result['trades'] for result in results)} trades."
+        ))
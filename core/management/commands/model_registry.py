@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import ModelVersion
+from core.model_registry import promote_model
+
+
+class Command(BaseCommand):
+    help = "Lists registered model versions or promotes a version to be the active serving model."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--promote',
+            type=int,
+            metavar='VERSION',
+            help='Make the given model version active in its zone. Serving processes reload it on their next check.',
+        )
+
+    def handle(self, *args, **options):
+        if options['promote'] is not None:
+            try:
+                version = promote_model(options['promote'])
+            except ModelVersion.DoesNotExist:
+                raise CommandError(f"Model version {options['promote']} does not exist.")
+            self.stdout.write(self.style.SUCCESS(f"Model v{version.pk} promoted."))
+            return
+
+        versions = ModelVersion.objects.all()
+        if not versions:
+            self.stdout.write(self.style.WARNING("No model versions registered yet."))
+            return
+
+        self.stdout.write(f"{'version':>8} {'zone':>8} {'active':>6} {'training':>11} {'rmse':>8} {'mae':>8}  train window")
+        for version in versions:
+            window = ''
+            if version.train_start and version.train_end:
+                window = f"{version.train_start:%Y-%m-%d} .. {version.train_end:%Y-%m-%d}"
+            self.stdout.write(
+                f"{version.pk:>8} {version.zone:>8} {'*' if version.is_active else '':>6} {version.metrics.get('training', 'full'):>11} "
+                f"{version.metrics.get('rmse', float('nan')):>8.2f} {version.metrics.get('mae', float('nan')):>8.2f}  {window}"
+            )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from core.models import EnergyRollup
+from core.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuilds daily and weekly EnergyRollup aggregates from all EnergyData records."
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE("Rebuilding EnergyRollup aggregates..."))
+        rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"Successfully rebuilt {EnergyRollup.objects.count()} rollup records."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.benchmarks import SUITES
+
+
+class Command(BaseCommand):
+    help = "Runs performance benchmarks on a temporary database (working data is not touched)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('suite', type=str, choices=sorted(SUITES), help='Benchmark suite to run.')
+        parser.add_argument(
+            '--years',
+            type=int,
+            default=10,
+            help='Years of synthetic hourly data to generate.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Number of timed repetitions per measurement.',
+        )
+
+    def handle(self, *args, **options):
+        if options['years'] <= 0 or options['repeat'] <= 0:
+            raise CommandError("--years and --repeat must be positive integers.")
+
+        self.stdout.write(self.style.NOTICE(f"--- Running '{options['suite']}' benchmark ---"))
+        SUITES[options['suite']](self.stdout.write, options)
+        self.stdout.write(self.style.SUCCESS("--- Benchmark completed ---"))
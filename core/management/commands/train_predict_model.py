@@ -1,14 +1,34 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
 import numpy as np
 from django.core.management.base import BaseCommand, CommandError
-from core.models import EnergyData, PricePrediction
-from core.ml_utils import train_model, load_model, predict_prices, generate_recommendations, MODEL_PATH, create_features
+from django.db import connections
+from core.archive import load_energy_frame
+from core.models import EnergyData, ModelVersion
+from core.predictions import save_forecast_run
+from core.ml_utils import (
+    create_features, fit_model, registry_params, update_model, predict_prices, generate_recommendations,
+)
+from core.model_registry import get_active_model, register_model
+from core.recommendations import DEFAULT_STRATEGY, STRATEGIES
+from core.feature_engine import ROLLING_WINDOW, FeatureEngine
+from core.forecasting import recursive_forecast
+from core.simulation import RESIDUAL_DAYS, residual_pools, simulate_prices
 from django.utils import timezone
 from datetime import timedelta, datetime
 
+ML_RELEVANT_COLUMNS = [
+    'price', 'demand', 'temperature', 'wind_generation', 'solar_generation',
+    'radiation_direct_horizontal', 'radiation_diffuse_horizontal'
+]
+
 
 class Command(BaseCommand):
-    help = "Trains the energy price prediction model, generates predictions, and saves them."
+    help = ("Trains the energy price prediction model of each bidding zone, generates predictions, and saves them. "
+            "Zones are trained and forecast in parallel worker processes.")
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -16,158 +36,337 @@ class Command(BaseCommand):
             action='store_true',
             help='Force retraining of the model even if one exists.',
         )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Retrain by continuing to boost the active model on data after its training window. '
+                 'Falls back to a full retrain on feature/parameter changes, holdout drift or model size limits.',
+        )
         parser.add_argument(
             '--predict-period-days',
             type=int,
             default=7,  # Прогнозуємо на 7 днів вперед після останньої доступної дати
             help='Number of days to predict into the future from the last available data point.',
         )
+        parser.add_argument(
+            '--mode',
+            choices=['recursive', 'batch'],
+            default='recursive',
+            help='recursive: feed each hourly prediction back into price lags and rolling means; '
+                 'batch: predict all hours at once with unknown future prices (previous behaviour).',
+        )
+        parser.add_argument(
+            '--strategy',
+            choices=list(STRATEGIES),
+            default=DEFAULT_STRATEGY,
+            help='Recommendation strategy: threshold (vs. 24h rolling mean), spread (vs. daily mean), '
+                 'percentile (daily percentile bands) or top_n (cheapest/most expensive hours of each day).',
+        )
+        parser.add_argument(
+            '--simulations',
+            type=int,
+            default=0,
+            help='Number of Monte Carlo price paths (recursive mode only). Stores P10/P50/P90 per hour; 0 disables.',
+        )
+        parser.add_argument(
+            '--zones',
+            type=str,
+            default=None,
+            help='Comma-separated bidding zones to process, e.g. DK_1,DK_2 (default: every zone with data).',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of worker processes (default: all CPU cores). Zones are processed in parallel; '
+                 'with a single zone the workers run the simulation.',
+        )
 
     def handle(self, *args, **options):
-        retrain = options['retrain']
         predict_period_days = options['predict_period_days']
+        for name in ('simulations', 'workers'):
+            if options[name] is not None and options[name] < 0:
+                raise CommandError(f"--{name} cannot be negative.")
+        if options['simulations'] and options['mode'] != 'recursive':
+            raise CommandError("--simulations requires --mode recursive.")
 
         self.stdout.write(self.style.NOTICE("--- Starting ML Model Operations ---"))
 
         # --- 1. Завантаження даних з бази даних ---
-        self.stdout.write(self.style.NOTICE("Loading data from EnergyData model..."))
-        energy_data_qs = EnergyData.objects.all().order_by('timestamp')
-        if not energy_data_qs.exists():
-            raise CommandError("No data found in EnergyData model. Please import data first.")
+        zones = self._zones(options['zones'])
+        self.stdout.write(self.style.NOTICE(f"Loading data for zone(s) {', '.join(zones)}..."))
+        frames = self._load_zones(zones)
 
-        df_full = pd.DataFrame(list(energy_data_qs.values()))
-        df_full['timestamp'] = pd.to_datetime(df_full['timestamp'])
+        # --- 2. Модель кожної зони: активна, донавчена або ще не навчена (навчається у пулі) ---
+        models = {}
+        for zone, df_full in frames.items():
+            try:
+                if options['incremental']:
+                    self.stdout.write(self.style.WARNING(f"[{zone}] Retraining model incrementally as requested..."))
+                    models[zone] = self._update(df_full, zone)
+                elif options['retrain']:
+                    self.stdout.write(self.style.WARNING(f"[{zone}] Retraining model as requested..."))
+                    models[zone] = None
+                else:
+                    active = get_active_model(zone)
+                    # Список ознак зберігається разом з версією моделі
+                    models[zone] = (active.model, active.features, active.version)
+                    self.stdout.write(self.style.SUCCESS(f"[{zone}] Model v{active.version} loaded successfully."))
+            except FileNotFoundError:
+                self.stdout.write(self.style.WARNING(f"[{zone}] Model not found. Training new model..."))
+                models[zone] = None
+            except Exception as e:
+                raise CommandError(f"Error loading or training model for zone {zone}: {e}")
 
-        initial_rows_ml = len(df_full)
-        ml_relevant_cols = [
-            'price', 'demand', 'temperature', 'wind_generation', 'solar_generation',
-            'radiation_direct_horizontal', 'radiation_diffuse_horizontal'
+        # --- 3-4. Навчання, прогнози та рекомендації зон у пулі процесів ---
+        cpu_count = os.cpu_count() or 1
+        workers = min(options['workers'] or cpu_count, len(frames))
+        self.stdout.write(self.style.NOTICE(
+            f"Generating {options['mode']} predictions for the next {predict_period_days} days "
+            f"for {len(frames)} zone(s) in {workers} worker process(es)..."))
+        jobs = [
+            dict(
+                zone=zone,
+                df_full=df_full,
+                model=models[zone],
+                mode=options['mode'],
+                predict_period_days=predict_period_days,
+                strategy=options['strategy'],
+                simulations=options['simulations'],
+                # Потоки XGBoost і процеси симуляції діляться між паралельними зонами
+                n_jobs=max(1, cpu_count // workers) if workers > 1 else None,
+                simulation_workers=1 if workers > 1 else options['workers'],
+            )
+            for zone, df_full in frames.items()
         ]
-        df_full.dropna(subset=ml_relevant_cols, inplace=True)
-        rows_after_dropna_ml = len(df_full)
-        if initial_rows_ml - rows_after_dropna_ml > 0:
-            self.stdout.write(self.style.WARNING(
-                f"Removed {initial_rows_ml - rows_after_dropna_ml} rows with NaN in ML-relevant columns."))
-
-        if df_full.empty:
-            raise CommandError("No valid data remaining after cleaning for ML training.")
 
-        self.stdout.write(self.style.SUCCESS(f"Successfully loaded {len(df_full)} records for ML."))
-
-        # --- 2. Навчання або завантаження моделі ---
-        model = None
-        features = None
+        # --- 5. Збереження: реєстрація моделей і прогнозів виконується лише в цьому процесі ---
         try:
-            if retrain:
-                self.stdout.write(self.style.WARNING("Retraining model as requested..."))
-                model, features = train_model(df_full)
+            if workers == 1:
+                for job in jobs:
+                    self._save_zone(forecast_zone(**job), options)
             else:
-                self.stdout.write(self.style.NOTICE("Attempting to load existing model..."))
-                model = load_model()
-                # Перестворюємо ознаки для визначення features
-                temp_df_for_features = create_features(df_full.copy())
-                # Використовуємо той самий список features, що і в train_model
-                features = [
-                    'hour', 'dayofweek', 'dayofyear', 'weekofyear', 'month', 'quarter', 'year',
-                    'demand', 'temperature', 'wind_generation', 'solar_generation',
-                    'radiation_direct_horizontal', 'radiation_diffuse_horizontal',
-                    'price_lag1', 'demand_lag1', 'wind_gen_lag1', 'solar_gen_lag1',
-                    'price_rolling_mean_24h', 'demand_rolling_mean_24h', 'wind_gen_rolling_mean_24h',
-                    'solar_gen_rolling_mean_24h',
-                    'is_peak_hour', 'is_weekend'
-                ]
-                self.stdout.write(self.style.SUCCESS("Model loaded successfully."))
-
-        except FileNotFoundError:
-            self.stdout.write(self.style.WARNING("Model not found. Training new model..."))
-            model, features = train_model(df_full)
+                # Дочірні процеси не звертаються до бази; з'єднання не повинні успадковуватися
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(forecast_zone, **job) for job in jobs]
+                    for future in as_completed(futures):
+                        self._save_zone(future.result(), options)
+        except CommandError:
+            raise
         except Exception as e:
-            raise CommandError(f"Error loading or training model: {e}")
+            raise CommandError(f"Error training or forecasting: {e}")
+
+        self.stdout.write(self.style.NOTICE("--- ML Model Operations Completed ---"))
 
-        # --- 3. Генерація прогнозів ---
-        self.stdout.write(self.style.NOTICE(f"Generating predictions for the next {predict_period_days} days..."))
+    def _zones(self, value):
+        available = list(EnergyData.objects.order_by('zone').values_list('zone', flat=True).distinct())
+        if not available:
+            raise CommandError("No data found in EnergyData model. Please import data first.")
+        if not value:
+            return available
+        zones = [zone.strip() for zone in value.split(',') if zone.strip()]
+        unknown = [zone for zone in zones if zone not in available]
+        if unknown:
+            raise CommandError(f"No data found for zone(s) {unknown}. Zones with data: {available}")
+        return zones
 
-        last_timestamp_actual = df_full['timestamp'].max()
+    def _load_zones(self, zones):
+        """
+        Дані всіх зон з колонкового архіву (або одним запитом до бази), розділені за зонами й очищені від NaN.
+        """
+        df_all = load_energy_frame(zones)
+        self.stdout.write(f"Read {len(df_all)} rows from the {df_all.attrs['source']}.")
 
-        # Створюємо майбутні часові мітки для прогнозування
-        future_timestamps = pd.date_range(
-            start=last_timestamp_actual + timedelta(hours=1),  # Починаємо з години після останніх фактичних даних
-            periods=predict_period_days * 24,  # Кількість годин для прогнозування
-            freq='h',  # Годинна частота
-            tz='UTC'
-        )
+        frames = {}
+        for zone, df_full in df_all.groupby('zone', sort=False):
+            initial_rows_ml = len(df_full)
+            df_full = df_full.dropna(subset=ML_RELEVANT_COLUMNS).reset_index(drop=True)
+            if initial_rows_ml - len(df_full) > 0:
+                self.stdout.write(self.style.WARNING(
+                    f"[{zone}] Removed {initial_rows_ml - len(df_full)} rows with NaN in ML-relevant columns."))
+            if df_full.empty:
+                raise CommandError(f"No valid data remaining for zone {zone} after cleaning for ML training.")
+            self.stdout.write(self.style.SUCCESS(f"[{zone}] Successfully loaded {len(df_full)} records for ML."))
+            frames[zone] = df_full
+        return {zone: frames[zone] for zone in zones}
+
+    def _update(self, df_full, zone):
+        started = time.perf_counter()
+        active_before = ModelVersion.objects.filter(zone=zone, is_active=True).values_list('pk', flat=True).first()
+        model, features, model_version = update_model(df_full, zone=zone)
+        if model_version.pk == active_before:
+            self.stdout.write(self.style.SUCCESS(
+                f"[{zone}] Model v{model_version.pk} is up to date: "
+                f"no new training rows since {model_version.train_end}."))
+        else:
+            self._report_training(zone, model_version, time.perf_counter() - started)
+        return model, features, model_version.pk
 
-        # Створюємо DataFrame для майбутніх даних, заповнюючи відомі ознаки
-        # Тут ми робимо спрощення: майбутні погодні дані та попит дорівнюють останнім відомим фактичним значенням.
-        # У реальному проекті тут потрібні були б прогнози.
-        last_row_actual = df_full.iloc[-1]
-
-        df_future_data = pd.DataFrame({
-            'timestamp': future_timestamps,
-            'price': np.nan,  # Цільова змінна, яку прогнозуємо
-            'demand': last_row_actual['demand'],
-            'temperature': last_row_actual['temperature'],
-            'wind_generation': last_row_actual['wind_generation'],
-            'solar_generation': last_row_actual['solar_generation'],
-            'radiation_direct_horizontal': last_row_actual['radiation_direct_horizontal'],
-            'radiation_diffuse_horizontal': last_row_actual['radiation_diffuse_horizontal'],
-            'supply': last_row_actual['supply'] if 'supply' in last_row_actual else np.nan,  # Якщо supply є, включаємо
-        })
-
-        # --- Важливо: Об'єднуємо останні N фактичних рядків з майбутніми для розрахунку лагів та ковзних середніх ---
-        # Кількість рядків для tail має бути принаймні window (24 для rolling mean) + max_lag (1 для lag1)
-        # Або просто візьміть достатньо велику кількість, щоб перекрити всі залежності
-        # Для rolling(window=24) потрібно 24 попередні точки.
-        # Для predict_prices, create_features робить .dropna()
-        # Тому потрібно, щоб df_for_prediction_features мав достатньо повних даних на початку.
-
-        # Візьмемо останній місяць фактичних даних для допомоги в розрахунку лагів
-        df_recent_actual = df_full[df_full['timestamp'] >= (df_full['timestamp'].max() - timedelta(days=30))].copy()
-
-        # Об'єднуємо актуальні дані з майбутніми для створення ознак
-        # Це дозволяє лаговим ознакам "перетікати" з фактичних даних до прогнозованих
-        df_for_prediction_features_raw = pd.concat([df_recent_actual, df_future_data], ignore_index=True)
-        df_for_prediction_features_raw.sort_values(by='timestamp', inplace=True)  # Важливо для лагів
-
-        # Генеруємо прогнози для об'єднаного датафрейму
-        df_predictions_with_features = predict_prices(model, df_for_prediction_features_raw, features)
-
-        # Вибираємо тільки ті прогнози, які стосуються МАЙБУТНІХ часових міток (future_timestamps)
-        # Або ті, що знаходяться після останньої фактичної дати
-        df_final_predictions = df_predictions_with_features[
-            df_predictions_with_features['timestamp'] > last_timestamp_actual
-            ].copy()
-
-        if df_final_predictions.empty:
+    def _save_zone(self, result, options):
+        zone = result['zone']
+        if result['trained'] is not None:
+            metrics, train_start, train_end = result['trained']
+            model_version = register_model(
+                result['model'], result['features'], metrics=metrics, params=registry_params(),
+                train_start=train_start, train_end=train_end, zone=zone,
+            )
+            self._report_training(zone, model_version, result['training_seconds'])
+            model_version_id = model_version.pk
+        else:
+            model_version_id = result['model_version_id']
+
+        recommendations = result['recommendations']
+        if recommendations is None:
             self.stdout.write(self.style.WARNING(
-                "No future predictions generated. Check date ranges or data availability in df_full after cleaning."))
+                f"[{zone}] No future predictions generated. "
+                f"Check date ranges or data availability in df_full after cleaning."))
             return
+        if result['simulation_seconds'] is not None:
+            self.stdout.write(f"[{zone}] Simulated {options['simulations']} price paths for P10/P50/P90 bands "
+                              f"in {result['simulation_seconds']:.1f}s")
+
+        # Один bulk upsert у транзакції: дашборд не бачить частково записаного набору
+        run = save_forecast_run(recommendations, model_version_id, options['mode'], options['strategy'], zone=zone)
+        self.stdout.write(self.style.SUCCESS(
+            f"[{zone}] Successfully saved {run.rows} predictions and recommendations as forecast run {run.pk} "
+            f"(model v{model_version_id})."))
 
-        # --- 4. Генерація рекомендацій ---
-        self.stdout.write(self.style.NOTICE("Generating recommendations..."))
-        # Для рекомендацій потрібні price_rolling_mean_24h, які є NaN на початку прогнозу.
-        # Ми їх залишаємо None в базі даних, але для рекомендацій може знадобитися імпутація.
-        # generate_recommendations вже використовує dropna для price_rolling_mean_24h,
-        # тому для перших 24 годин прогнозу їх не буде.
+    def _report_training(self, zone, model_version, seconds):
+        metrics = model_version.metrics
+        if 'full_retrain_reason' in metrics:
+            self.stdout.write(self.style.WARNING(f"[{zone}] Full retrain required: {metrics['full_retrain_reason']}."))
+        elif metrics.get('training') == 'incremental':
+            self.stdout.write(
+                f"[{zone}] Continued boosting v{metrics['base_version']} on {metrics['new_rows']} new rows "
+                f"({metrics['best_iteration'] + 1} trees in total)."
+            )
+        self.stdout.write(
+            f"[{zone}] Train rows: {metrics['train_rows']}, test rows: {metrics['test_rows']}, "
+            f"RMSE: {metrics['rmse']:.2f}, MAE: {metrics['mae']:.2f}, "
+            f"training time: {seconds:.1f}s"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"[{zone}] Model v{model_version.pk} registered and promoted ({model_version.artifact})."))
 
-        recommendations = generate_recommendations(df_final_predictions)
 
-        # --- 5. Збереження прогнозів та рекомендацій в базу даних ---
-        self.stdout.write(self.style.NOTICE("Saving predictions and recommendations to database..."))
+def forecast_zone(zone, df_full, model, mode, predict_period_days, strategy, simulations, n_jobs=None,
+                  simulation_workers=None):
+    """
+    Навчання (якщо model=None), прогноз, рекомендації та симуляція однієї зони без звернень до бази,
+    тож виконується в процесі пулу. model — (регресор, ознаки, id версії) або None.
+    Повертає словник результатів; реєстрацію моделі та запис прогнозів виконує батьківський процес.
+    """
+    result = {'zone': zone, 'trained': None, 'training_seconds': None, 'simulation_seconds': None,
+              'recommendations': None}
+    if model is None:
+        started = time.perf_counter()
+        regressor, features, metrics, train_start, train_end = fit_model(df_full, n_jobs=n_jobs)
+        result.update(trained=(metrics, train_start, train_end), training_seconds=time.perf_counter() - started,
+                      model=regressor, features=features)
+    else:
+        regressor, features, result['model_version_id'] = model
+        if n_jobs is not None:
+            regressor.set_params(n_jobs=n_jobs)
 
-        PricePrediction.objects.all().delete()
-        self.stdout.write(self.style.WARNING("Existing PricePrediction records deleted."))
+    if mode == 'recursive':
+        df_final_predictions = _recursive_predictions(regressor, features, df_full, predict_period_days * 24)
+    else:
+        df_final_predictions = _batch_predictions(regressor, features, df_full, predict_period_days)
+    if df_final_predictions.empty:
+        return result
 
-        saved_count = 0
-        for rec in recommendations:
-            PricePrediction.objects.create(
-                timestamp=rec['timestamp'],
-                predicted_price=rec['predicted_price'],
-                actual_price=rec['actual_price'] if pd.notna(rec['actual_price']) else None,
-                recommendation=rec['recommendation']
-            )
-            saved_count += 1
+    # Рекомендації порівнюють прогноз з price_rolling_mean_24h — середньою ціною за 24 години до кожної
+    # години. У рекурсивному режимі її заповнюють фактичні ціни й попередні прогнози, тож рекомендації
+    # є для всього горизонту; у пакетному майбутні ціни невідомі, і стратегія threshold пропускає рядки без неї
+    recommendations = generate_recommendations(df_final_predictions, strategy)
+
+    if simulations:
+        started = time.perf_counter()
+        df_quantiles = _simulated_quantiles(
+            regressor, features, df_full, predict_period_days * 24, simulations, simulation_workers)
+        recommendations = recommendations.merge(df_quantiles, on='timestamp', how='left')
+        result['simulation_seconds'] = time.perf_counter() - started
+
+    result['recommendations'] = recommendations
+    return result
+
+
+def _batch_predictions(model, features, df_full, predict_period_days):
+    """
+    Пакетний прогноз: усі майбутні години однією матрицею, ціна в майбутньому невідома (NaN).
+    """
+    last_timestamp_actual = df_full['timestamp'].max()
+
+    # Створюємо майбутні часові мітки для прогнозування
+    future_timestamps = pd.date_range(
+        start=last_timestamp_actual + timedelta(hours=1),  # Починаємо з години після останніх фактичних даних
+        periods=predict_period_days * 24,  # Кількість годин для прогнозування
+        freq='h',  # Годинна частота
+        tz='UTC'
+    )
+
+    # Створюємо DataFrame для майбутніх даних, заповнюючи відомі ознаки
+    # Тут ми робимо спрощення: майбутні погодні дані та попит дорівнюють останнім відомим фактичним значенням.
+    # У реальному проекті тут потрібні були б прогнози.
+    last_row_actual = df_full.iloc[-1]
+
+    df_future_data = pd.DataFrame({
+        'timestamp': future_timestamps,
+        'price': np.nan,  # Цільова змінна, яку прогнозуємо
+        'demand': last_row_actual['demand'],
+        'temperature': last_row_actual['temperature'],
+        'wind_generation': last_row_actual['wind_generation'],
+        'solar_generation': last_row_actual['solar_generation'],
+        'radiation_direct_horizontal': last_row_actual['radiation_direct_horizontal'],
+        'radiation_diffuse_horizontal': last_row_actual['radiation_diffuse_horizontal'],
+        'supply': last_row_actual['supply'] if 'supply' in last_row_actual else np.nan,  # Якщо supply є, включаємо
+    })
+
+    # --- Важливо: Об'єднуємо останні N фактичних рядків з майбутніми для розрахунку лагів та ковзних середніх ---
+    # Кількість рядків для tail має бути принаймні window (24 для rolling mean) + max_lag (1 для lag1)
+    # Або просто візьміть достатньо велику кількість, щоб перекрити всі залежності
+    # Для rolling(window=24) потрібно 24 попередні точки.
+    # Для predict_prices, create_features робить .dropna()
+    # Тому потрібно, щоб df_for_prediction_features мав достатньо повних даних на початку.
+
+    # Візьмемо останній місяць фактичних даних для допомоги в розрахунку лагів
+    df_recent_actual = df_full[df_full['timestamp'] >= (df_full['timestamp'].max() - timedelta(days=30))].copy()
+
+    # Об'єднуємо актуальні дані з майбутніми для створення ознак
+    # Це дозволяє лаговим ознакам "перетікати" з фактичних даних до прогнозованих
+    df_for_prediction_features_raw = pd.concat([df_recent_actual, df_future_data], ignore_index=True)
+    df_for_prediction_features_raw.sort_values(by='timestamp', inplace=True)  # Важливо для лагів
+
+    # Генеруємо прогнози для об'єднаного датафрейму
+    df_predictions_with_features = predict_prices(model, df_for_prediction_features_raw, features)
+
+    # Вибираємо тільки ті прогнози, які стосуються МАЙБУТНІХ часових міток (future_timestamps)
+    # Або ті, що знаходяться після останньої фактичної дати
+    df_final_predictions = df_predictions_with_features[
+        df_predictions_with_features['timestamp'] > last_timestamp_actual
+        ].copy()
+    return df_final_predictions
+
+
+def _recursive_predictions(model, features, df_full, horizon):
+    """
+    Рекурсивний прогноз: прогноз кожної години подається в price_lag1 та ковзне середнє наступної.
+    Стан ознак відновлюється з останніх 24 годин історії.
+    """
+    history = df_full.tail(ROLLING_WINDOW).to_dict('records')
+    engine = FeatureEngine.from_history(history, features=[])
+    result = recursive_forecast(model, features, engine, horizon)
+    return result.to_frame()
 
-        self.stdout.write(self.style.SUCCESS(f"Successfully saved {saved_count} predictions and recommendations."))
 
-        self.stdout.write(self.style.NOTICE("--- ML Model Operations Completed ---"))
\ No newline at end of file
+def _simulated_quantiles(model, features, df_full, horizon, simulations, workers):
+    """
+    Квантилі шляхів ціни симуляції Монте-Карло (бутстреп залишків за останні RESIDUAL_DAYS днів).
+    """
+    # Доба для добових змін і доба, на якій create_features заповнює лаги через bfill
+    df_features = create_features(df_full.tail((RESIDUAL_DAYS + 2) * ROLLING_WINDOW))
+    pools = residual_pools(model, features, df_features)
+    engine = FeatureEngine.from_history(df_full.tail(ROLLING_WINDOW).to_dict('records'), features=[])
+    result = simulate_prices(model, features, engine, horizon, pools, simulations, workers=workers)
+    return result.to_frame()
@@ -0,0 +1,106 @@
+import os
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+from core.archive import load_energy_frame
+from core.models import DEFAULT_ZONE, TuningTrial
+from core.backtesting import make_folds
+from core.ml_utils import FEATURES, TARGET, MODEL_PARAMS, create_features
+from core.tuning import SEARCH_SPACE, run_search, sample_params
+
+ML_RELEVANT_COLUMNS = [
+    'price', 'demand', 'temperature', 'wind_generation', 'solar_generation',
+    'radiation_direct_horizontal', 'radiation_diffuse_horizontal'
+]
+
+
+class Command(BaseCommand):
+    help = ("Searches XGBoost hyperparameters (depth, learning rate, subsampling, histogram bins) "
+            "on time-series folds in a process pool and stores every trial in the TuningTrial table.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zone', default=DEFAULT_ZONE, help='Bidding zone whose history is used.')
+        parser.add_argument('--trials', type=int, default=20, help='Number of random-search trials.')
+        parser.add_argument('--study', default='default', help='Study name; new trials continue its numbering.')
+        parser.add_argument('--folds', type=int, default=3, help='Number of time-series folds per trial.')
+        parser.add_argument('--test-days', type=int, default=30, help='Length of each evaluation period in days.')
+        parser.add_argument(
+            '--validation-days',
+            type=int,
+            default=14,
+            help='Days before each test period used for early stopping.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of worker processes (default: all CPU cores). Threads per trial = cores / workers.',
+        )
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for sampling trial parameters.')
+
+    def handle(self, *args, **options):
+        for name in ('trials', 'folds', 'test_days', 'validation_days', 'workers'):
+            if options[name] is not None and options[name] <= 0:
+                raise CommandError(f"--{name.replace('_', '-')} must be a positive integer.")
+
+        zone = options['zone']
+        self.stdout.write(self.style.NOTICE(f"Loading {zone} data..."))
+        df_full = load_energy_frame([zone], ML_RELEVANT_COLUMNS)
+        if df_full.empty:
+            raise CommandError(f"No data found in EnergyData model for zone {zone}. Please import data first.")
+        self.stdout.write(f"Read {len(df_full)} rows from the {df_full.attrs['source']}.")
+        df_full = df_full.drop(columns='zone').dropna(subset=ML_RELEVANT_COLUMNS).reset_index(drop=True)
+
+        df_features = create_features(df_full)
+        timestamps = df_features['timestamp'].dt.tz_localize(None).to_numpy(dtype='datetime64[s]')
+        folds = make_folds(timestamps, options['folds'], test_days=options['test_days'],
+                           validation_days=options['validation_days'])
+        if not folds:
+            raise CommandError("Not enough history for a single fold. Reduce --test-days/--validation-days.")
+
+        study = options['study']
+        first_number = (TuningTrial.objects.filter(study=study).aggregate(last=Max('number'))['last'] or 0) + 1
+        rng = np.random.default_rng(options['seed'])
+        trials = [(first_number + n, sample_params(rng)) for n in range(options['trials'])]
+
+        workers = min(options['workers'] or os.cpu_count() or 1, len(trials))
+        self.stdout.write(self.style.NOTICE(
+            f"Study '{study}': {len(trials)} trials on {len(folds)} folds, {workers} worker process(es)..."))
+        header = ' '.join(f"{name:>16}" for name in SEARCH_SPACE)
+        self.stdout.write(f"{'trial':>5} {header} {'rmse':>7} {'mae':>7} {'sec':>6}")
+
+        def save(result):
+            TuningTrial.objects.create(
+                study=study,
+                number=result['number'],
+                params=result['params'],
+                rmse=result['rmse'],
+                mae=result['mae'],
+                fold_rmse=result['fold_rmse'],
+                best_iterations=result['best_iterations'],
+                seconds=result['seconds'],
+            )
+            values = ' '.join(f"{result['params'][name]:>16.4g}" for name in SEARCH_SPACE)
+            self.stdout.write(
+                f"{result['number']:>5} {values} {result['rmse']:>7.3f} {result['mae']:>7.3f} {result['seconds']:>6.1f}")
+
+        started = time.perf_counter()
+        run_search(
+            df_features[FEATURES].to_numpy(dtype=np.float32),
+            df_features[TARGET].to_numpy(dtype=float),
+            folds,
+            trials,
+            MODEL_PARAMS,
+            workers=workers,
+            on_result=save,
+        )
+
+        best = TuningTrial.objects.filter(study=study).order_by('rmse').first()
+        self.stdout.write(self.style.SUCCESS(
+            f"Search completed in {time.perf_counter() - started:.1f}s. Best trial of study '{study}': "
+            f"#{best.number}, RMSE {best.rmse:.3f}, MAE {best.mae:.3f}, "
+            f"trees {int(np.mean(best.best_iterations)) + 1} on average."
+        ))
+        self.stdout.write(f"Parameters to merge into MODEL_PARAMS: {best.params}")
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:49
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def remove_duplicate_timestamps(apps, schema_editor):
+    # Попередні імпорти могли залишити дублікати — залишаємо останній запис для кожної години
+    EnergyData = apps.get_model('core', 'EnergyData')
+    keep_ids = EnergyData.objects.values('timestamp').annotate(max_id=Max('id')).values('max_id')
+    EnergyData.objects.exclude(id__in=keep_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricePrediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField(unique=True)),
+                ('predicted_price', models.FloatField()),
+                ('actual_price', models.FloatField(blank=True, null=True)),
+                ('recommendation', models.CharField(blank=True, max_length=255, null=True)),
+            ],
+            options={
+                'ordering': ['timestamp'],
+            },
+        ),
+        migrations.AddField(
+            model_name='energydata',
+            name='radiation_diffuse_horizontal',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='energydata',
+            name='radiation_direct_horizontal',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='energydata',
+            name='supply',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(remove_duplicate_timestamps, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='energydata',
+            name='timestamp',
+            field=models.DateTimeField(unique=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_priceprediction_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=512, unique=True)),
+                ('last_timestamp', models.DateTimeField(blank=True, null=True)),
+                ('byte_offset', models.BigIntegerField(default=0)),
+                ('tail_hash', models.CharField(blank=True, max_length=64)),
+                ('is_sorted', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
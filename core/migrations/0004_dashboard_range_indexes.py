@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_ingestcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['price', 'timestamp'], name='energy_price_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['demand', 'timestamp'], name='energy_demand_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['temperature', 'timestamp'], name='energy_temp_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['wind_generation', 'timestamp'], name='energy_wind_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['solar_generation', 'timestamp'], name='energy_solar_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['radiation_direct_horizontal', 'timestamp'], name='energy_rad_direct_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['radiation_diffuse_horizontal', 'timestamp'], name='energy_rad_diffuse_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='priceprediction',
+            index=models.Index(fields=['timestamp', 'predicted_price', 'recommendation'], name='prediction_ts_cover_idx'),
+        ),
+    ]
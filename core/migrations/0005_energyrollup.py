@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_dashboard_range_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnergyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=8)),
+                ('period_start', models.DateTimeField()),
+                ('sample_count', models.IntegerField()),
+                ('price_min', models.FloatField(blank=True, null=True)),
+                ('price_mean', models.FloatField(blank=True, null=True)),
+                ('price_max', models.FloatField(blank=True, null=True)),
+                ('demand_min', models.FloatField(blank=True, null=True)),
+                ('demand_mean', models.FloatField(blank=True, null=True)),
+                ('demand_max', models.FloatField(blank=True, null=True)),
+                ('supply_min', models.FloatField(blank=True, null=True)),
+                ('supply_mean', models.FloatField(blank=True, null=True)),
+                ('supply_max', models.FloatField(blank=True, null=True)),
+                ('temperature_min', models.FloatField(blank=True, null=True)),
+                ('temperature_mean', models.FloatField(blank=True, null=True)),
+                ('temperature_max', models.FloatField(blank=True, null=True)),
+                ('wind_generation_min', models.FloatField(blank=True, null=True)),
+                ('wind_generation_mean', models.FloatField(blank=True, null=True)),
+                ('wind_generation_max', models.FloatField(blank=True, null=True)),
+                ('solar_generation_min', models.FloatField(blank=True, null=True)),
+                ('solar_generation_mean', models.FloatField(blank=True, null=True)),
+                ('solar_generation_max', models.FloatField(blank=True, null=True)),
+                ('radiation_direct_horizontal_min', models.FloatField(blank=True, null=True)),
+                ('radiation_direct_horizontal_mean', models.FloatField(blank=True, null=True)),
+                ('radiation_direct_horizontal_max', models.FloatField(blank=True, null=True)),
+                ('radiation_diffuse_horizontal_min', models.FloatField(blank=True, null=True)),
+                ('radiation_diffuse_horizontal_mean', models.FloatField(blank=True, null=True)),
+                ('radiation_diffuse_horizontal_max', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['resolution', 'period_start'],
+                'constraints': [models.UniqueConstraint(fields=('resolution', 'period_start'), name='unique_rollup_period')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_dataversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('artifact', models.CharField(max_length=255)),
+                ('features', models.JSONField()),
+                ('train_start', models.DateTimeField(blank=True, null=True)),
+                ('train_end', models.DateTimeField(blank=True, null=True)),
+                ('metrics', models.JSONField(default=dict)),
+                ('params', models.JSONField(default=dict)),
+                ('is_active', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('promoted_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-pk'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('is_active',), name='single_active_model_version')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_modelversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeatureState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(default='default', max_length=64, unique=True)),
+                ('as_of', models.DateTimeField(blank=True, null=True)),
+                ('window', models.JSONField(default=dict)),
+                ('rolling_sums', models.JSONField(default=dict)),
+                ('last_values', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_featurestate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TuningTrial',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('study', models.CharField(max_length=64)),
+                ('number', models.PositiveIntegerField()),
+                ('params', models.JSONField()),
+                ('rmse', models.FloatField()),
+                ('mae', models.FloatField()),
+                ('fold_rmse', models.JSONField(default=list)),
+                ('best_iterations', models.JSONField(default=list)),
+                ('seconds', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['study', 'rmse'],
+                'constraints': [models.UniqueConstraint(fields=('study', 'number'), name='unique_tuning_trial')],
+            },
+        ),
+    ]
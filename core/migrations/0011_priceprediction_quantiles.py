@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_forecastrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='priceprediction',
+            name='price_p10',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='priceprediction',
+            name='price_p50',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='priceprediction',
+            name='price_p90',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,160 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:35
+
+from django.db import migrations, models
+
+
+def rename_default_feature_state(apps, schema_editor):
+    # Стан ознак тепер зберігається під ключем зони; дані до цієї міграції належать DK_1
+    FeatureState = apps.get_model('core', 'FeatureState')
+    FeatureState.objects.filter(key='default').update(key='DK_1')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_priceprediction_quantiles'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='energydata',
+            options={'ordering': ['zone', 'timestamp']},
+        ),
+        migrations.AlterModelOptions(
+            name='energyrollup',
+            options={'ordering': ['zone', 'resolution', 'period_start']},
+        ),
+        migrations.AlterModelOptions(
+            name='priceprediction',
+            options={'ordering': ['zone', 'timestamp']},
+        ),
+        migrations.RemoveConstraint(
+            model_name='energyrollup',
+            name='unique_rollup_period',
+        ),
+        migrations.RemoveConstraint(
+            model_name='modelversion',
+            name='single_active_model_version',
+        ),
+        migrations.RemoveIndex(
+            model_name='energydata',
+            name='energy_price_ts_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='energydata',
+            name='energy_demand_ts_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='energydata',
+            name='energy_temp_ts_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='energydata',
+            name='energy_wind_ts_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='energydata',
+            name='energy_solar_ts_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='energydata',
+            name='energy_rad_direct_ts_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='energydata',
+            name='energy_rad_diffuse_ts_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='priceprediction',
+            name='prediction_ts_cover_idx',
+        ),
+        migrations.AddField(
+            model_name='energydata',
+            name='zone',
+            field=models.CharField(default='DK_1', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='energyrollup',
+            name='zone',
+            field=models.CharField(default='DK_1', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='forecastrun',
+            name='zone',
+            field=models.CharField(default='DK_1', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='modelversion',
+            name='zone',
+            field=models.CharField(default='DK_1', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='priceprediction',
+            name='zone',
+            field=models.CharField(default='DK_1', max_length=16),
+        ),
+        migrations.AlterField(
+            model_name='energydata',
+            name='timestamp',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='featurestate',
+            name='key',
+            field=models.CharField(default='DK_1', max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='priceprediction',
+            name='timestamp',
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['zone', 'price', 'timestamp'], name='energy_price_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['zone', 'demand', 'timestamp'], name='energy_demand_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['zone', 'temperature', 'timestamp'], name='energy_temp_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['zone', 'wind_generation', 'timestamp'], name='energy_wind_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['zone', 'solar_generation', 'timestamp'], name='energy_solar_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['zone', 'radiation_direct_horizontal', 'timestamp'], name='energy_rad_direct_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='energydata',
+            index=models.Index(fields=['zone', 'radiation_diffuse_horizontal', 'timestamp'], name='energy_rad_diffuse_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='priceprediction',
+            index=models.Index(fields=['zone', 'timestamp', 'predicted_price', 'recommendation'], name='prediction_ts_cover_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='energydata',
+            constraint=models.UniqueConstraint(fields=('zone', 'timestamp'), name='unique_energy_zone_timestamp'),
+        ),
+        migrations.AddConstraint(
+            model_name='energyrollup',
+            constraint=models.UniqueConstraint(fields=('zone', 'resolution', 'period_start'), name='unique_rollup_period'),
+        ),
+        migrations.AddConstraint(
+            model_name='modelversion',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('zone',), name='single_active_model_version'),
+        ),
+        migrations.AddConstraint(
+            model_name='priceprediction',
+            constraint=models.UniqueConstraint(fields=('zone', 'timestamp'), name='unique_prediction_zone_timestamp'),
+        ),
+        migrations.RunPython(rename_default_feature_state, migrations.RunPython.noop),
+    ]
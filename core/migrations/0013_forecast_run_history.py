@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def assign_runs(apps, schema_editor):
+    # Прогнози без запуску (записані до ForecastRun) отримують окремий запуск своєї зони;
+    # поточним стає останній запуск кожної зони
+    ForecastRun = apps.get_model('core', 'ForecastRun')
+    PricePrediction = apps.get_model('core', 'PricePrediction')
+    orphans = (
+        PricePrediction.objects.filter(run__isnull=True).values('zone')
+        .annotate(rows=Count('pk'), horizon_start=Min('timestamp'), horizon_end=Max('timestamp')).order_by('zone')
+    )
+    for group in orphans:
+        run = ForecastRun.objects.create(
+            zone=group['zone'], rows=group['rows'],
+            horizon_start=group['horizon_start'], horizon_end=group['horizon_end'],
+        )
+        PricePrediction.objects.filter(run__isnull=True, zone=group['zone']).update(run=run)
+
+    latest = ForecastRun.objects.values('zone').annotate(latest=Max('pk')).values_list('latest', flat=True)
+    ForecastRun.objects.filter(pk__in=list(latest)).update(is_current=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_zones'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='priceprediction',
+            name='unique_prediction_zone_timestamp',
+        ),
+        migrations.RemoveIndex(
+            model_name='priceprediction',
+            name='prediction_ts_cover_idx',
+        ),
+        migrations.AddField(
+            model_name='forecastrun',
+            name='is_current',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(assign_runs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='priceprediction',
+            name='run',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='predictions', to='core.forecastrun'),
+        ),
+        migrations.AddIndex(
+            model_name='priceprediction',
+            index=models.Index(fields=['run', 'timestamp', 'predicted_price', 'recommendation'], name='prediction_run_ts_cover_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='forecastrun',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current', True)), fields=('zone',), name='single_current_forecast_run'),
+        ),
+        migrations.AddConstraint(
+            model_name='priceprediction',
+            constraint=models.UniqueConstraint(fields=('run', 'zone', 'timestamp'), name='unique_prediction_run_zone_timestamp'),
+        ),
+    ]
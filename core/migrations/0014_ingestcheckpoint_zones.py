@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_forecast_run_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestcheckpoint',
+            name='zones',
+            field=models.JSONField(default=list),
+        ),
+    ]
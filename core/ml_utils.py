@@ -3,19 +3,48 @@ import numpy as np
 from sklearn.model_selection import train_test_split
 from xgboost import XGBRegressor
 from sklearn.metrics import mean_squared_error, mean_absolute_error
-import joblib
 from datetime import datetime, timedelta
-import os
+
+from core.model_registry import get_active_model, register_model
+from core.models import DEFAULT_ZONE, ModelVersion
+from core.recommendations import DEFAULT_STRATEGY, recommend
 
 # Налаштування (можна винести в settings.py або окремий конфіг)
-MODEL_PATH = 'price_prediction_model.pkl'  # Шлях для збереження моделі
-RECOMMENDATION_THRESHOLD_BUY = 0.98  # Купувати, якщо прогнозована ціна на 2% нижче середньої за 24 години
-RECOMMENDATION_THRESHOLD_SELL = 1.02  # Продавати, якщо прогнозована ціна на 2% вище середньої за 24 години
+# Ознаки моделі в порядку стовпців матриці; зберігаються разом з кожною версією в реєстрі
+FEATURES = [
+    'hour', 'dayofweek', 'dayofyear', 'weekofyear', 'month', 'quarter', 'year',
+    'demand', 'temperature', 'wind_generation', 'solar_generation',
+    'radiation_direct_horizontal', 'radiation_diffuse_horizontal',
+    'price_lag1', 'demand_lag1', 'wind_gen_lag1', 'solar_gen_lag1',
+    'price_rolling_mean_24h', 'demand_rolling_mean_24h', 'wind_gen_rolling_mean_24h', 'solar_gen_rolling_mean_24h',
+    'is_peak_hour', 'is_weekend'
+]
+TARGET = 'price'
+# Версія визначень ознак у create_features: змінюється разом з ними, і моделі, навчені на іншій
+# версії, перенавчаються повністю (донавчання на ознаках з іншим змістом змішало б два розподіли)
+FEATURE_VERSION = 2
+MODEL_PARAMS = {
+    'objective': 'reg:squarederror',
+    'n_estimators': 1000,
+    'learning_rate': 0.05,
+    'early_stopping_rounds': 50,
+    'eval_metric': 'rmse',
+    'n_jobs': -1,
+    'random_state': 42,
+}
+HOLDOUT_DAYS = 30  # Останні дні історії, на яких модель оцінюється (і зупиняється рано), але не навчається
+# Донавчання (warm start): бустинг продовжується від активної моделі лише на нових рядках
+INCREMENTAL_ROUNDS = 100  # Максимум нових дерев за одне донавчання
+INCREMENTAL_EARLY_STOPPING_ROUNDS = 10
+DRIFT_TOLERANCE = 1.25  # Повне перенавчання, якщо RMSE активної моделі на holdout зросла більше ніж у 1.25 раза
+MAX_TREES = 3000  # Повне перенавчання, коли донавчання розростає модель понад цю кількість дерев
 
 
 def create_features(df):
     """
     Створює додаткові ознаки з часового штампу та існуючих даних.
+    Вхідний DataFrame не змінюється (працюємо з копією), тож викликачам не потрібно копіювати його самим.
+    Для рядків, що надходять по одному, ті самі значення дає core.feature_engine.FeatureEngine.
     """
     df_copy = df.copy()
 
@@ -36,7 +65,9 @@ def create_features(df):
 
     # Ковзні середні (наприклад, середня ціна за останні 24 години)
     # ВИПРАВЛЕНО: замінено .fillna(method='bfill') на .bfill()
-    df_copy['price_rolling_mean_24h'] = df_copy['price'].rolling(window=24).mean().bfill()
+    # Середня ціна — за 24 години до поточної: поточна ціна є ціллю, тож не може входити в ознаку.
+    # Так само її рахує рекурсивний прогноз, де ціна кроку ще невідома
+    df_copy['price_rolling_mean_24h'] = df_copy['price'].shift(1).rolling(window=24).mean().bfill()
     df_copy['demand_rolling_mean_24h'] = df_copy['demand'].rolling(window=24).mean().bfill()
     df_copy['wind_gen_rolling_mean_24h'] = df_copy['wind_generation'].rolling(window=24).mean().bfill()
     df_copy['solar_gen_rolling_mean_24h'] = df_copy['solar_generation'].rolling(window=24).mean().bfill()
@@ -47,42 +78,56 @@ def create_features(df):
     return df_copy
 
 
-def train_model(df_full_data):
+def _split_holdout(df_features):
+    """
+    Ділить ознаки на навчальні рядки та holdout (останні HOLDOUT_DAYS днів).
+    """
+    df_features = df_features.sort_values(by='timestamp')
+    split_point_date = df_features['timestamp'].max() - timedelta(days=HOLDOUT_DAYS)
+    is_train = df_features['timestamp'] <= split_point_date
+    return df_features[is_train], df_features[~is_train], split_point_date
+
+
+def _holdout_metrics(model, X_test, y_test):
+    y_pred = model.predict(X_test)
+    return {
+        'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        'mae': float(mean_absolute_error(y_test, y_pred)),
+        'test_rows': len(X_test),
+    }
+
+
+def registry_params():
     """
-    Навчає модель градієнтного бустингу (XGBoost) та зберігає її.
-    Приймає повний датафрейм, розділяє його, створює ознаки.
+    Параметри, з якими модель реєструється: MODEL_PARAMS і версія визначень ознак,
+    за якими full_retrain_reason вирішує, чи можна продовжити бустинг.
     """
-    df_features = create_features(df_full_data.copy())
+    return {**MODEL_PARAMS, 'feature_version': FEATURE_VERSION}
 
-    features = [
-        'hour', 'dayofweek', 'dayofyear', 'weekofyear', 'month', 'quarter', 'year',
-        'demand', 'temperature', 'wind_generation', 'solar_generation',
-        'radiation_direct_horizontal', 'radiation_diffuse_horizontal',
-        'price_lag1', 'demand_lag1', 'wind_gen_lag1', 'solar_gen_lag1',
-        'price_rolling_mean_24h', 'demand_rolling_mean_24h', 'wind_gen_rolling_mean_24h', 'solar_gen_rolling_mean_24h',
-        'is_peak_hour', 'is_weekend'
-    ]
-    target = 'price'
+
+def fit_model(df_full_data, n_jobs=None):
+    """
+    Навчає модель градієнтного бустингу (XGBoost) без звернень до бази, тож її можна викликати
+    в процесі пулу. Приймає повний датафрейм, розділяє його, створює ознаки.
+    n_jobs — кількість потоків XGBoost (за замовчуванням MODEL_PARAMS).
+    Повертає (model, features, metrics, train_start, train_end).
+    """
+    df_features = create_features(df_full_data)
+
+    features = FEATURES
+    target = TARGET
 
     missing_features_in_df = [f for f in features if f not in df_features.columns]
     if missing_features_in_df:
         raise ValueError(
             f"Відсутні необхідні ознаки для навчання моделі: {missing_features_in_df}. Доступні: {df_features.columns.tolist()}")
 
-    X = df_features[features]
-    y = df_features[target]
-
     if df_features.empty:
         raise ValueError("DataFrame порожній після створення ознак.")
 
-    df_features.sort_values(by='timestamp', inplace=True)
-
-    split_point_date = df_features['timestamp'].max() - timedelta(days=30)
-
-    X_train = X[df_features['timestamp'] <= split_point_date]
-    y_train = y[df_features['timestamp'] <= split_point_date]
-    X_test = X[df_features['timestamp'] > split_point_date]
-    y_test = y[df_features['timestamp'] > split_point_date]
+    df_train, df_test, split_point_date = _split_holdout(df_features)
+    X_train, y_train = df_train[features], df_train[target]
+    X_test, y_test = df_test[features], df_test[target]
 
     if X_train.empty or y_train.empty:
         raise ValueError(
@@ -91,47 +136,140 @@ def train_model(df_full_data):
         raise ValueError(
             f"Тестовий набір даних порожній. Перевірте діапазон даних. Max timestamp: {df_features['timestamp'].max()}, Split date: {split_point_date}")
 
-    model = XGBRegressor(
-        objective='reg:squarederror',
-        n_estimators=1000,
-        learning_rate=0.05,
-        early_stopping_rounds=50,
-        eval_metric='rmse',
-        n_jobs=-1,
-        random_state=42
-    )
+    model = XGBRegressor(**MODEL_PARAMS)
+    if n_jobs is not None:
+        model.set_params(n_jobs=n_jobs)
 
     model.fit(X_train, y_train,
               eval_set=[(X_test, y_test)],
               verbose=False)
 
-    y_pred = model.predict(X_test)
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-    mae = mean_absolute_error(y_test, y_pred)
+    metrics = {
+        **_holdout_metrics(model, X_test, y_test),
+        'train_rows': len(X_train),
+        'best_iteration': int(model.best_iteration),
+        'training': 'full',
+    }
+    return (model, features, metrics,
+            df_train['timestamp'].min().to_pydatetime(), df_train['timestamp'].max().to_pydatetime())
 
-    print(f"\n--- Оцінка моделі на тестових даних ---")
-    print(f"Розмір тренувального набору: {len(X_train)}")
-    print(f"Розмір тестового набору: {len(X_test)}")
-    print(f"RMSE (Root Mean Squared Error): {rmse:.2f}")
-    print(f"MAE (Mean Absolute Error): {mae:.2f}")
 
-    joblib.dump(model, MODEL_PATH)
-    print(f"Модель успішно збережена за шляхом: {MODEL_PATH}")
+def train_model(df_full_data, promote=True, zone=DEFAULT_ZONE):
+    """
+    Навчає модель зони (fit_model) та зберігає її як нову версію в реєстрі.
+    Повертає (model, features, model_version).
+    """
+    model, features, metrics, train_start, train_end = fit_model(df_full_data)
+    model_version = register_model(
+        model,
+        features,
+        metrics=metrics,
+        params=registry_params(),
+        train_start=train_start,
+        train_end=train_end,
+        promote=promote,
+        zone=zone,
+    )
 
-    return model, features
+    return model, features, model_version
 
 
-def load_model():
+def full_retrain_reason(active, df_test):
+    """
+    Політика донавчання: повертає причину, з якої активну модель треба перенавчити з нуля,
+    або None, якщо бустинг можна продовжити. active — LoadedModel, df_test — поточний holdout.
+    """
+    version = ModelVersion.objects.get(pk=active.version)
+    if list(version.features) != FEATURES:
+        return "feature schema changed"
+    if version.params.get('feature_version') != FEATURE_VERSION:
+        return "feature definitions changed"
+    if {key: value for key, value in version.params.items() if key in MODEL_PARAMS} != MODEL_PARAMS:
+        return "model parameters changed"
+    if version.train_end is None or 'rmse' not in version.metrics:
+        return "active model has no recorded training window or metrics"
+    if active.model.get_booster().num_boosted_rounds() + INCREMENTAL_ROUNDS > MAX_TREES:
+        return f"model would exceed {MAX_TREES} trees"
+
+    holdout_rmse = _holdout_metrics(active.model, df_test[FEATURES], df_test[TARGET])['rmse']
+    if holdout_rmse > version.metrics['rmse'] * DRIFT_TOLERANCE:
+        return f"holdout RMSE drifted from {version.metrics['rmse']:.2f} to {holdout_rmse:.2f}"
+    return None
+
+
+def update_model(df_full_data, promote=True, zone=DEFAULT_ZONE):
     """
-    Завантажує збережену модель машинного навчання.
+    Інкрементальне навчання: продовжує бустинг активної моделі зони на рядках, що з'явилися після
+    її вікна навчання (до початку holdout), замість побудови 1000 дерев з нуля.
+    Якщо активної моделі немає або full_retrain_reason() вимагає, виконує train_model().
+    Повертає (model, features, model_version); model_version.metrics['training'] — 'full' або 'incremental',
+    а за повного перенавчання metrics['full_retrain_reason'] пояснює причину.
+    Якщо нових навчальних рядків немає, повертає активну версію без змін.
     """
-    if not os.path.exists(MODEL_PATH):
-        raise FileNotFoundError(
-            f"Модель не знайдена за шляхом: {MODEL_PATH}. Будь ласка, спочатку натренуйте модель за допомогою 'python manage.py train_predict_model --retrain'.")
+    try:
+        active = get_active_model(zone)
+    except FileNotFoundError:
+        active = None
 
-    model = joblib.load(MODEL_PATH)
-    print(f"Модель успішно завантажена з: {MODEL_PATH}")
-    return model
+    df_features = create_features(df_full_data)
+    if df_features.empty:
+        raise ValueError("DataFrame порожній після створення ознак.")
+    df_train, df_test, split_point_date = _split_holdout(df_features)
+    if df_test.empty:
+        raise ValueError(f"Тестовий набір даних порожній. Split date: {split_point_date}")
+
+    reason = "no active model" if active is None else full_retrain_reason(active, df_test)
+    if reason is not None:
+        model, features, model_version = train_model(df_full_data, promote=promote, zone=zone)
+        model_version.metrics['full_retrain_reason'] = reason
+        model_version.save(update_fields=['metrics'])
+        return model, features, model_version
+
+    version = ModelVersion.objects.get(pk=active.version)
+    df_new = df_train[df_train['timestamp'] > version.train_end]
+    if df_new.empty:
+        return active.model, active.features, version
+
+    # Дерева після best_iteration не використовуються в прогнозі, тож бустинг продовжується від найкращої ітерації
+    booster = active.model.get_booster()
+    best_iteration = version.metrics.get('best_iteration')
+    if best_iteration is not None and best_iteration + 1 < booster.num_boosted_rounds():
+        booster = booster[:best_iteration + 1]
+
+    X_test, y_test = df_test[FEATURES], df_test[TARGET]
+    model = XGBRegressor(**{
+        **MODEL_PARAMS,
+        'n_estimators': INCREMENTAL_ROUNDS,
+        'early_stopping_rounds': INCREMENTAL_EARLY_STOPPING_ROUNDS,
+    })
+    model.fit(df_new[FEATURES], df_new[TARGET], eval_set=[(X_test, y_test)], verbose=False, xgb_model=booster)
+
+    model_version = register_model(
+        model,
+        FEATURES,
+        metrics={
+            **_holdout_metrics(model, X_test, y_test),
+            'train_rows': version.metrics.get('train_rows', 0) + len(df_new),
+            'new_rows': len(df_new),
+            'best_iteration': int(model.best_iteration),
+            'training': 'incremental',
+            'base_version': version.pk,
+        },
+        params=registry_params(),
+        train_start=version.train_start,
+        train_end=df_new['timestamp'].max().to_pydatetime(),
+        promote=promote,
+        zone=zone,
+    )
+    return model, FEATURES, model_version
+
+
+def load_model(zone=DEFAULT_ZONE):
+    """
+    Повертає активну модель зони з реєстру. Модель кешується в процесі,
+    тож повторні виклики не читають файл.
+    """
+    return get_active_model(zone).model
 
 
 def predict_prices(model, df_to_predict_raw, features):
@@ -139,7 +277,7 @@ def predict_prices(model, df_to_predict_raw, features):
     Генерує прогнозовані ціни для нових даних.
     Очікує сирий DataFrame з timestamp та основними даними.
     """
-    df_to_predict_features = create_features(df_to_predict_raw.copy())
+    df_to_predict_features = create_features(df_to_predict_raw)
 
     missing_features_in_df = [f for f in features if f not in df_to_predict_features.columns]
     if missing_features_in_df:
@@ -153,24 +291,11 @@ def predict_prices(model, df_to_predict_raw, features):
     return df_to_predict_features[['timestamp', 'price', 'predicted_price', 'price_rolling_mean_24h']]
 
 
-def generate_recommendations(df_predictions):
+def generate_recommendations(df_predictions, strategy=DEFAULT_STRATEGY, **params):
     """
     Генерує рекомендації (купівля/продаж) на основі прогнозованих цін.
+    Сигнали рахуються векторно для всього горизонту (core.recommendations); strategy — одна з
+    threshold (пороги відносно середньої за 24 години), spread, percentile, top_n.
+    Повертає стовпчиковий DataFrame: timestamp, predicted_price, actual_price, recommendation, signal.
     """
-    recommendations = []
-    df_predictions_filtered = df_predictions.dropna(subset=['price_rolling_mean_24h'])
-
-    for index, row in df_predictions_filtered.iterrows():
-        rec_text = "Нейтрально"
-        if row['predicted_price'] < row['price_rolling_mean_24h'] * RECOMMENDATION_THRESHOLD_BUY:
-            rec_text = "КУПУВАТИ"
-        elif row['predicted_price'] > row['price_rolling_mean_24h'] * RECOMMENDATION_THRESHOLD_SELL:
-            rec_text = "ПРОДАВАТИ"
-
-        recommendations.append({
-            'timestamp': row['timestamp'],
-            'predicted_price': row['predicted_price'],
-            'actual_price': row['price'],
-            'recommendation': rec_text
-        })
-    return recommendations
\ No newline at end of file
+    return recommend(df_predictions, strategy, **params)
@@ -0,0 +1,138 @@
+"""
+Реєстр моделей прогнозування.
+
+Кожна натренована модель зберігається як окрема версія: бустер у нативному форматі XGBoost (UBJSON)
+у MODEL_REGISTRY_DIR та запис ModelVersion з ознаками, вікном навчання й метриками.
+Кожна торгова зона має власні версії та власну активну модель. Процеси, що обслуговують прогнози,
+тримають завантажені активні моделі зон у пам'яті й перезавантажують модель зони лише після
+просування (promote) нової версії.
+"""
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from xgboost import XGBRegressor
+
+from core.models import DEFAULT_ZONE, ModelVersion
+
+ARTIFACT_SUFFIX = '.ubj'
+
+_lock = threading.Lock()
+_loaded = {}  # {зона: активна модель, завантажена в цьому процесі}
+_checked_at = {}  # {зона: time.monotonic() останньої перевірки активної версії в базі}
+
+
+class LoadedModel:
+    """
+    Завантажена версія моделі: регресор XGBoost та метадані, потрібні для прогнозування.
+    """
+
+    def __init__(self, version, model, features):
+        self.version = version
+        self.model = model
+        self.features = features
+
+    def predict(self, X):
+        return self.model.predict(X[self.features])
+
+
+def registry_dir():
+    return Path(getattr(settings, 'MODEL_REGISTRY_DIR', Path(settings.BASE_DIR) / 'model_registry'))
+
+
+def _reload_check_seconds():
+    return getattr(settings, 'MODEL_RELOAD_CHECK_SECONDS', 5)
+
+
+def register_model(model, features, metrics=None, params=None, train_start=None, train_end=None, promote=True,
+                   zone=DEFAULT_ZONE):
+    """
+    Зберігає модель зони як нову версію реєстру та (за замовчуванням) робить її активною.
+    Повертає ModelVersion.
+    """
+    directory = registry_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    with transaction.atomic():
+        version = ModelVersion.objects.create(
+            zone=zone,
+            artifact='',
+            features=list(features),
+            train_start=train_start,
+            train_end=train_end,
+            metrics=metrics or {},
+            params=params or {},
+        )
+        version.artifact = f'price_model_v{version.pk}{ARTIFACT_SUFFIX}'
+        # Файл записується під тимчасовою назвою й перейменовується, тож читачі не бачать частковий файл
+        tmp_path = directory / f'{version.artifact}.tmp{ARTIFACT_SUFFIX}'
+        model.save_model(tmp_path)
+        tmp_path.replace(directory / version.artifact)
+        version.save(update_fields=['artifact'])
+
+    if promote:
+        promote_model(version.pk)
+        version.refresh_from_db()
+    return version
+
+
+def promote_model(version_id):
+    """
+    Робить версію активною у її зоні. Інші процеси підхоплять її під час наступної перевірки
+    (MODEL_RELOAD_CHECK_SECONDS).
+    """
+    with transaction.atomic():
+        version = ModelVersion.objects.select_for_update().get(pk=version_id)
+        ModelVersion.objects.filter(zone=version.zone, is_active=True).exclude(pk=version_id).update(is_active=False)
+        if not version.is_active:
+            version.is_active = True
+            version.promoted_at = timezone.now()
+            version.save(update_fields=['is_active', 'promoted_at'])
+    clear_model_cache()
+    return version
+
+
+def load_version(version):
+    """
+    Завантажує файл моделі для ModelVersion (без кешування).
+    """
+    path = registry_dir() / version.artifact
+    if not path.exists():
+        raise FileNotFoundError(f"Model artifact for v{version.pk} not found: {path}")
+    model = XGBRegressor()
+    model.load_model(path)
+    return LoadedModel(version.pk, model, version.features)
+
+
+def get_active_model(zone=DEFAULT_ZONE):
+    """
+    Активна модель зони із кешу процесу. Версія в базі перевіряється не частіше ніж раз на
+    MODEL_RELOAD_CHECK_SECONDS, а файл читається лише тоді, коли активна версія змінилася.
+    """
+    now = time.monotonic()
+    loaded = _loaded.get(zone)
+    if loaded is not None and now - _checked_at.get(zone, 0.0) < _reload_check_seconds():
+        return loaded
+
+    with _lock:
+        active = ModelVersion.objects.filter(zone=zone, is_active=True).first()
+        if active is None:
+            raise FileNotFoundError(
+                f"No active model for zone {zone} in the registry. "
+                f"Train one with 'python manage.py train_predict_model --retrain --zones {zone}'.")
+        if zone not in _loaded or _loaded[zone].version != active.pk:
+            _loaded[zone] = load_version(active)
+        _checked_at[zone] = now
+        return _loaded[zone]
+
+
+def clear_model_cache():
+    """
+    Скидає кеш процесу; наступний get_active_model() звернеться до бази.
+    """
+    with _lock:
+        _loaded.clear()
+        _checked_at.clear()
@@ -1,6 +1,11 @@
 from django.db import models
 
+DEFAULT_ZONE = 'DK_1'  # Торгова зона (bidding zone) OPSD за замовчуванням
+ZONE_MAX_LENGTH = 16
+
+
 class EnergyData(models.Model):
+    zone = models.CharField(max_length=ZONE_MAX_LENGTH, default=DEFAULT_ZONE)
     timestamp = models.DateTimeField()
     price = models.FloatField()
     demand = models.FloatField()
@@ -15,18 +20,226 @@ class EnergyData(models.Model):
         return f"{self.timestamp.strftime('%Y-%m-%d %H:%M')} - Price: {self.price} EUR/MWh"
 
     class Meta:
-        ordering = ['timestamp']
-        # Додайте індекс на timestamp, якщо працюєте з дуже великими даними
-        # indexes = [models.Index(fields=['timestamp'])]
+        ordering = ['zone', 'timestamp']
+        # Усі запити обмежені однією зоною, тож зона — перший ключ кожного індексу: рядки зони
+        # утворюють суцільний діапазон індексу (логічна партиція), і зони не заважають одна одній.
+        # Діапазони за часом обслуговує унікальний індекс (zone, timestamp), він же ключ upsert.
+        # Складені індекси (zone, стовпець, timestamp) обслуговують сортування energy_list
+        # (в обох напрямках, з timestamp як другим ключем) і фільтровані COUNT(*)
+        # за ціною/температурою без звернення до таблиці.
+        constraints = [
+            models.UniqueConstraint(fields=['zone', 'timestamp'], name='unique_energy_zone_timestamp'),
+        ]
+        indexes = [
+            models.Index(fields=['zone', 'price', 'timestamp'], name='energy_price_ts_idx'),
+            models.Index(fields=['zone', 'demand', 'timestamp'], name='energy_demand_ts_idx'),
+            models.Index(fields=['zone', 'temperature', 'timestamp'], name='energy_temp_ts_idx'),
+            models.Index(fields=['zone', 'wind_generation', 'timestamp'], name='energy_wind_ts_idx'),
+            models.Index(fields=['zone', 'solar_generation', 'timestamp'], name='energy_solar_ts_idx'),
+            models.Index(fields=['zone', 'radiation_direct_horizontal', 'timestamp'], name='energy_rad_direct_ts_idx'),
+            models.Index(fields=['zone', 'radiation_diffuse_horizontal', 'timestamp'], name='energy_rad_diffuse_ts_idx'),
+        ]
 
 class PricePrediction(models.Model):
-    timestamp = models.DateTimeField(unique=True) # Кожен прогноз має бути унікальним за часом
+    zone = models.CharField(max_length=ZONE_MAX_LENGTH, default=DEFAULT_ZONE)
+    timestamp = models.DateTimeField() # Кожен прогноз має бути унікальним за часом у межах запуску та зони
     predicted_price = models.FloatField()
     actual_price = models.FloatField(null=True, blank=True) # Для порівняння з фактичною ціною, якщо доступно
     recommendation = models.CharField(max_length=255, blank=True, null=True) # Рекомендація (купувати/продавати)
+    # Запуск прогнозу, що записав рядок; кожен запуск зберігає власні прогнози, тож запуски можна порівнювати
+    run = models.ForeignKey('ForecastRun', on_delete=models.CASCADE, related_name='predictions')
+    # Квантилі симуляції Монте-Карло (P10/P50/P90), якщо запуск її виконував
+    price_p10 = models.FloatField(null=True, blank=True)
+    price_p50 = models.FloatField(null=True, blank=True)
+    price_p90 = models.FloatField(null=True, blank=True)
 
     def __str__(self):
         return f"Прогноз на {self.timestamp.strftime('%Y-%m-%d %H:%M')}: {self.predicted_price:.2f} EUR/MWh ({self.recommendation})"
 
     class Meta:
-        ordering = ['timestamp']
\ No newline at end of file
+        ordering = ['zone', 'timestamp']
+        constraints = [
+            models.UniqueConstraint(fields=['run', 'zone', 'timestamp'], name='unique_prediction_run_zone_timestamp'),
+        ]
+        # Покриваючий індекс для дашборду: діапазон запуску за часом читається без звернення до таблиці
+        indexes = [
+            models.Index(fields=['run', 'timestamp', 'predicted_price', 'recommendation'],
+                         name='prediction_run_ts_cover_idx'),
+        ]
+
+class IngestCheckpoint(models.Model):
+    """
+    High-water mark інкрементального імпорту для одного джерела (CSV-файлу).
+    Позначка спільна для зон zones, з якими її записано.
+    """
+    source = models.CharField(max_length=512, unique=True)  # Абсолютний шлях або назва джерела
+    last_timestamp = models.DateTimeField(null=True, blank=True)  # Остання імпортована година
+    byte_offset = models.BigIntegerField(default=0)  # Кінець останнього повністю прочитаного рядка
+    tail_hash = models.CharField(max_length=64, blank=True)  # sha1 останнього рядка для перевірки файлу
+    is_sorted = models.BooleanField(default=False)  # Чи були рядки файлу відсортовані за часом
+    zones = models.JSONField(default=list)  # Зони, імпортовані до last_timestamp
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} @ {self.last_timestamp} (offset {self.byte_offset})"
+
+
+class EnergyRollup(models.Model):
+    """
+    Попередньо агреговані (денні/тижневі) значення EnergyData для дашборду.
+    Оновлюються інкрементально під час імпорту (див. core.rollups.refresh_rollups).
+    """
+    RESOLUTION_CHOICES = [
+        ('day', 'Day'),
+        ('week', 'Week'),
+    ]
+
+    zone = models.CharField(max_length=ZONE_MAX_LENGTH, default=DEFAULT_ZONE)
+    resolution = models.CharField(max_length=8, choices=RESOLUTION_CHOICES)
+    period_start = models.DateTimeField()  # Початок доби / тижня (понеділок) в UTC
+    sample_count = models.IntegerField()  # Кількість погодинних записів у періоді
+
+    price_min = models.FloatField(null=True, blank=True)
+    price_mean = models.FloatField(null=True, blank=True)
+    price_max = models.FloatField(null=True, blank=True)
+    demand_min = models.FloatField(null=True, blank=True)
+    demand_mean = models.FloatField(null=True, blank=True)
+    demand_max = models.FloatField(null=True, blank=True)
+    supply_min = models.FloatField(null=True, blank=True)
+    supply_mean = models.FloatField(null=True, blank=True)
+    supply_max = models.FloatField(null=True, blank=True)
+    temperature_min = models.FloatField(null=True, blank=True)
+    temperature_mean = models.FloatField(null=True, blank=True)
+    temperature_max = models.FloatField(null=True, blank=True)
+    wind_generation_min = models.FloatField(null=True, blank=True)
+    wind_generation_mean = models.FloatField(null=True, blank=True)
+    wind_generation_max = models.FloatField(null=True, blank=True)
+    solar_generation_min = models.FloatField(null=True, blank=True)
+    solar_generation_mean = models.FloatField(null=True, blank=True)
+    solar_generation_max = models.FloatField(null=True, blank=True)
+    radiation_direct_horizontal_min = models.FloatField(null=True, blank=True)
+    radiation_direct_horizontal_mean = models.FloatField(null=True, blank=True)
+    radiation_direct_horizontal_max = models.FloatField(null=True, blank=True)
+    radiation_diffuse_horizontal_min = models.FloatField(null=True, blank=True)
+    radiation_diffuse_horizontal_mean = models.FloatField(null=True, blank=True)
+    radiation_diffuse_horizontal_max = models.FloatField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_resolution_display()} {self.period_start.strftime('%Y-%m-%d')} - Price: {self.price_mean} EUR/MWh"
+
+    class Meta:
+        ordering = ['zone', 'resolution', 'period_start']
+        constraints = [
+            models.UniqueConstraint(fields=['zone', 'resolution', 'period_start'], name='unique_rollup_period'),
+        ]
+
+
+class DataVersion(models.Model):
+    """
+    Лічильник версії даних: збільшується щоразу, коли імпорт або прогнозування змінює таблиці.
+    Використовується як частина ключів кешу, тож зміна даних автоматично інвалідовує кеш.
+    """
+    name = models.CharField(max_length=64, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+
+class ModelVersion(models.Model):
+    """
+    Версія моделі прогнозування в реєстрі: файл бустера у нативному форматі XGBoost,
+    список ознак, вікно навчання та метрики. Кожна зона має власні моделі;
+    активною (promoted) може бути лише одна версія на зону.
+    """
+    zone = models.CharField(max_length=ZONE_MAX_LENGTH, default=DEFAULT_ZONE)
+    artifact = models.CharField(max_length=255)  # Шлях до файлу моделі відносно MODEL_REGISTRY_DIR
+    features = models.JSONField()  # Ознаки в тому порядку, в якому модель їх очікує
+    train_start = models.DateTimeField(null=True, blank=True)
+    train_end = models.DateTimeField(null=True, blank=True)
+    metrics = models.JSONField(default=dict)  # rmse, mae, розміри наборів, best_iteration
+    params = models.JSONField(default=dict)  # Гіперпараметри XGBoost
+    is_active = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    promoted_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Model v{self.pk} [{self.zone}]{' (active)' if self.is_active else ''}"
+
+    class Meta:
+        ordering = ['-pk']
+        constraints = [
+            models.UniqueConstraint(fields=['zone'], condition=models.Q(is_active=True),
+                                    name='single_active_model_version'),
+        ]
+
+
+class ForecastRun(models.Model):
+    """
+    Запуск прогнозу train_predict_model: версія моделі, режим, стратегія рекомендацій і горизонт.
+    Кожен запуск зберігає всі свої прогнози, тож запуски та версії моделей можна порівнювати між собою
+    і з фактом. Дашборд і планування читають поточний (is_current) запуск — один на зону.
+    """
+    zone = models.CharField(max_length=ZONE_MAX_LENGTH, default=DEFAULT_ZONE)
+    model_version = models.ForeignKey(ModelVersion, null=True, blank=True, on_delete=models.SET_NULL,
+                                      related_name='forecast_runs')
+    mode = models.CharField(max_length=16, blank=True)  # recursive / batch
+    strategy = models.CharField(max_length=16, blank=True)  # Стратегія рекомендацій
+    horizon_start = models.DateTimeField(null=True, blank=True)
+    horizon_end = models.DateTimeField(null=True, blank=True)
+    rows = models.PositiveIntegerField(default=0)
+    is_current = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return (f"Forecast run {self.pk} [{self.zone}] ({self.rows} hours, model v{self.model_version_id})"
+                f"{' (current)' if self.is_current else ''}")
+
+    class Meta:
+        ordering = ['-pk']
+        constraints = [
+            models.UniqueConstraint(fields=['zone'], condition=models.Q(is_current=True),
+                                    name='single_current_forecast_run'),
+        ]
+
+
+class FeatureState(models.Model):
+    """
+    Стан online-ознак для прогнозування: останні 24 години рядів, потрібних для лагів і
+    ковзних середніх, їхні суми та останні екзогенні значення. Оновлюється під час імпорту.
+    key — зона, дані якої описує стан.
+    """
+    key = models.CharField(max_length=64, unique=True, default=DEFAULT_ZONE)
+    as_of = models.DateTimeField(null=True, blank=True)  # Час останнього запису EnergyData
+    window = models.JSONField(default=dict)  # {поле: [значення за 24 години, від старого до нового]}
+    rolling_sums = models.JSONField(default=dict)  # {поле: сума window}
+    last_values = models.JSONField(default=dict)  # {поле: значення останнього запису}
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Feature state '{self.key}' as of {self.as_of}"
+
+
+class TuningTrial(models.Model):
+    """
+    Спроба пошуку гіперпараметрів (tune_model): параметри та метрики на фолдах часового ряду.
+    """
+    study = models.CharField(max_length=64)  # Назва пошуку; номери спроб рахуються в його межах
+    number = models.PositiveIntegerField()
+    params = models.JSONField()  # Параметри спроби поверх MODEL_PARAMS
+    rmse = models.FloatField()  # Середня RMSE тестових періодів фолдів
+    mae = models.FloatField()
+    fold_rmse = models.JSONField(default=list)
+    best_iterations = models.JSONField(default=list)  # Кількість дерев після ранньої зупинки на кожному фолді
+    seconds = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Trial {self.study}#{self.number}: RMSE {self.rmse:.3f}"
+
+    class Meta:
+        ordering = ['study', 'rmse']
+        constraints = [
+            models.UniqueConstraint(fields=['study', 'number'], name='unique_tuning_trial'),
+        ]
@@ -0,0 +1,130 @@
+from django.core.paginator import Paginator
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator, якому кількість записів передається ззовні (з кешу) замість COUNT(*) на кожен запит.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._known_count = count
+
+    @cached_property
+    def count(self):
+        return self._known_count
+
+
+class KeysetPage:
+    """
+    Сторінка keyset-пагінації: записи та курсори для сусідніх сторінок.
+    """
+
+    def __init__(self, object_list, sort_field, has_next, has_previous):
+        self.object_list = object_list
+        self.sort_field = sort_field
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.object_list[-1], self.sort_field) if self.has_next else None
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(self.object_list[0], self.sort_field) if self.has_previous else None
+
+
+def encode_cursor(obj, sort_field):
+    """
+    Курсор "значення|timestamp"; порожнє значення означає NULL.
+    repr(float) відновлюється без втрати точності, тож рівність зі значенням у базі зберігається.
+    """
+    value = None if sort_field == 'timestamp' else getattr(obj, sort_field)
+    return f"{'' if value is None else repr(value)}|{obj.timestamp.isoformat()}"
+
+
+def decode_cursor(cursor):
+    """
+    Розбирає курсор у (значення, timestamp). Викликає ValueError для некоректного курсора.
+    """
+    value_text, _, timestamp_text = cursor.partition('|')
+    timestamp = parse_datetime(timestamp_text)
+    if timestamp is None:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return (float(value_text) if value_text else None), timestamp
+
+
+def _segment(queryset, field, desc, is_null, bound):
+    """
+    Один сегмент порядку сортування: лише NULL або лише не-NULL значення поля.
+    Умова bound записана як діапазон по першому стовпцю індексу (field, timestamp)
+    плюс уточнення для однакових значень, тож база виконує пошук за індексом, а не сканування.
+    """
+    ts_lookup = 'lt' if desc else 'gt'
+    if is_null:
+        queryset = queryset.filter(**{f'{field}__isnull': True})
+        if bound is not None:
+            queryset = queryset.filter(**{f'timestamp__{ts_lookup}': bound[1]})
+        return queryset.order_by('-timestamp' if desc else 'timestamp')
+
+    queryset = queryset.filter(**{f'{field}__isnull': False})
+    if bound is not None:
+        value, timestamp = bound
+        value_lookup = 'lte' if desc else 'gte'
+        queryset = queryset.filter(**{f'{field}__{value_lookup}': value}).exclude(
+            **{field: value, f'timestamp__{"gte" if desc else "lte"}': timestamp}
+        )
+    return queryset.order_by(f'-{field}' if desc else field, '-timestamp' if desc else 'timestamp')
+
+
+def _fetch(queryset, field, desc, cursor, limit):
+    """
+    До limit записів після курсора в заданому напрямку.
+    NULL-и йдуть першими при зростанні і останніми при спаданні (порядок SQLite за замовчуванням).
+    Порядок розбивається на два сегменти, кожен з яких читається окремим запитом за індексом.
+    """
+    if field == 'timestamp':
+        if cursor is not None:
+            queryset = queryset.filter(**{f'timestamp__{"lt" if desc else "gt"}': cursor[1]})
+        return list(queryset.order_by('-timestamp' if desc else 'timestamp')[:limit])
+
+    segments = [False, True] if desc else [True, False]  # is_null для кожного сегмента
+    if cursor is not None:
+        segments = segments[segments.index(cursor[0] is None):]
+
+    rows = []
+    for position, is_null in enumerate(segments):
+        bound = cursor if (cursor is not None and position == 0) else None
+        rows.extend(_segment(queryset, field, desc, is_null, bound)[:limit - len(rows)])
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+def keyset_paginate(queryset, sort_by, per_page, after=None, before=None, last=False):
+    """
+    Сторінка відсортованого queryset без OFFSET. sort_by — поле з необов'язковим '-',
+    timestamp використовується як другий ключ сортування для однакових значень.
+    after/before — курсори (значення, timestamp); last=True повертає останню сторінку.
+    """
+    field = sort_by.lstrip('-')
+    desc = sort_by.startswith('-')
+    backwards = before is not None or last
+
+    rows = _fetch(queryset, field, desc != backwards, before if backwards else after, per_page + 1)
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if backwards:
+        rows.reverse()
+        return KeysetPage(rows, field, has_next=before is not None, has_previous=has_more)
+    return KeysetPage(rows, field, has_next=has_more, has_previous=after is not None)
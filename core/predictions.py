@@ -0,0 +1,113 @@
+"""
+Збереження прогнозів і рекомендацій.
+
+Кожен запуск прогнозу стає записом ForecastRun і зберігає всі свої рядки PricePrediction
+(унікальні за запуском, зоною й часом), тож кілька запусків можна порівнювати на тих самих годинах.
+Дашборд і планування читають поточний запуск зони. Новий запуск записується й стає поточним в одній
+транзакції зі зміною версії даних, тож читачі бачать або попередній, або новий запуск повністю.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+
+from core.data_cache import PREDICTIONS_VERSION, bump_data_version
+from core.models import DEFAULT_ZONE, ForecastRun, PricePrediction
+
+DEFAULT_BATCH_SIZE = 5_000
+DEFAULT_PLAN_HOURS = 7 * 24
+QUANTILE_FIELDS = ['price_p10', 'price_p50', 'price_p90']
+
+
+def _nullable(values):
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def save_forecast_run(recommendations, model_version_id=None, mode='', strategy='', batch_size=DEFAULT_BATCH_SIZE,
+                      zone=DEFAULT_ZONE):
+    """
+    Записує стовпчиковий DataFrame рекомендацій (timestamp, predicted_price, actual_price, recommendation
+    і, якщо є, квантилі симуляції QUANTILE_FIELDS) як новий ForecastRun зони і робить його поточним.
+    Прогнози попередніх запусків не змінюються. Повертає ForecastRun.
+    """
+    timestamps = recommendations['timestamp'].tolist()
+    predicted = recommendations['predicted_price'].to_numpy(dtype=float).tolist()
+    actual = _nullable(recommendations['actual_price'])
+    # Відсутня рекомендація зберігається як NULL, а не як рядок 'nan'
+    labels = recommendations['recommendation'].astype(object)
+    labels = labels.where(labels.notna(), None).tolist()
+    quantiles = {
+        field: _nullable(recommendations[field]) if field in recommendations else [None] * len(timestamps)
+        for field in QUANTILE_FIELDS
+    }
+
+    with transaction.atomic():
+        run = ForecastRun.objects.create(
+            zone=zone,
+            model_version_id=model_version_id,
+            mode=mode,
+            strategy=strategy,
+            horizon_start=min(timestamps) if timestamps else None,
+            horizon_end=max(timestamps) if timestamps else None,
+            rows=len(timestamps),
+        )
+        PricePrediction.objects.bulk_create(
+            [
+                PricePrediction(zone=zone, timestamp=ts, predicted_price=predicted[i], actual_price=actual[i],
+                                recommendation=labels[i], run=run,
+                                **{field: values[i] for field, values in quantiles.items()})
+                for i, ts in enumerate(timestamps)
+            ],
+            batch_size=batch_size,
+        )
+        set_current_run(run)
+    return run
+
+
+def set_current_run(run):
+    """
+    Робить run поточним запуском його зони (наприклад, повертає попередній запуск для порівняння).
+    Перемикання й зміна версії даних виконуються в одній транзакції.
+    """
+    with transaction.atomic(savepoint=False):  # Усередині save_forecast_run — частина його транзакції
+        ForecastRun.objects.filter(zone=run.zone, is_current=True).exclude(pk=run.pk).update(is_current=False)
+        ForecastRun.objects.filter(pk=run.pk).update(is_current=True)
+        run.is_current = True
+        bump_data_version(PREDICTIONS_VERSION)  # Інвалідовує закешований дашборд
+    return run
+
+
+def run_predictions(zone=DEFAULT_ZONE, run_id=None):
+    """
+    Прогнози зони із запуску run_id, за замовчуванням — з поточного запуску зони.
+    """
+    queryset = PricePrediction.objects.filter(zone=zone)
+    if run_id is None:
+        return queryset.filter(run__is_current=True)
+    return queryset.filter(run_id=run_id)
+
+
+def prediction_prices(start=None, hours=DEFAULT_PLAN_HOURS, zone=DEFAULT_ZONE):
+    """
+    Погодинні прогнозовані ціни поточного запуску зони для планування: до hours годин від start
+    (за замовчуванням — початок горизонту запуску).
+    Повертає (timestamps, prices); години мають іти без пропусків.
+    """
+    run = ForecastRun.objects.filter(zone=zone, is_current=True).first()
+    rows = []
+    if run is not None:
+        start = start or run.horizon_start
+        queryset = run.predictions.order_by('timestamp')
+        if start is not None:
+            queryset = queryset.filter(timestamp__gte=start)
+        rows = list(queryset.values_list('timestamp', 'predicted_price')[:hours])
+    if not rows:
+        raise LookupError(
+            f"No price predictions for zone {zone} to plan on. Run 'python manage.py train_predict_model' first.")
+
+    timestamps = [timestamp for timestamp, _ in rows]
+    gaps = [b for a, b in zip(timestamps, timestamps[1:]) if b - a != timedelta(hours=1)]
+    if gaps:
+        raise ValueError(f"Price predictions are not hourly-contiguous: gap before {gaps[0].isoformat()}.")
+    return timestamps, np.array([price for _, price in rows], dtype=float)
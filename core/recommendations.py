@@ -0,0 +1,135 @@
+"""
+Векторний генератор торгових рекомендацій.
+
+Стратегія отримує масиви всього горизонту (мітки часу, прогнозовані ціни, ковзне середнє
+за 24 години) і повертає масив сигналів: BUY_SIGNAL, SELL_SIGNAL або NEUTRAL_SIGNAL.
+Групування за добою рахується через коди днів і np.bincount / lexsort, без циклів по рядках,
+тож рік погодинних прогнозів обробляється за мілісекунди. Результат — стовпчиковий DataFrame,
+придатний для пакетного запису.
+"""
+import numpy as np
+import pandas as pd
+
+BUY = "КУПУВАТИ"
+SELL = "ПРОДАВАТИ"
+NEUTRAL = "Нейтрально"
+
+BUY_SIGNAL = 1
+SELL_SIGNAL = -1
+NEUTRAL_SIGNAL = 0
+_LABELS = np.array([NEUTRAL, BUY, SELL], dtype=object)  # Індексується сигналом: 0, 1, -1
+
+DEFAULT_STRATEGY = 'threshold'
+RECOMMENDATION_THRESHOLD_BUY = 0.98  # Купувати, якщо прогнозована ціна на 2% нижче середньої за 24 години
+RECOMMENDATION_THRESHOLD_SELL = 1.02  # Продавати, якщо прогнозована ціна на 2% вище середньої за 24 години
+
+
+def _day_codes(timestamps):
+    """
+    Номер доби для кожної мітки (0..кількість діб-1) та кількість діб.
+    """
+    days = pd.DatetimeIndex(timestamps).normalize()
+    codes, uniques = pd.factorize(days)
+    return codes, len(uniques)
+
+
+def _daily_mean(values, codes, days):
+    return (np.bincount(codes, weights=values, minlength=days) / np.bincount(codes, minlength=days))[codes]
+
+
+def _rank_within_day(values, codes):
+    """
+    Ранг значення в межах доби (0 — найменше) та кількість годин у добі.
+    """
+    order = np.lexsort((values, codes))
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    counts = np.diff(np.r_[starts, len(order)])
+    ranks = np.empty(len(values), dtype=int)
+    ranks[order] = np.arange(len(order)) - np.repeat(starts, counts)
+    day_counts = np.empty(len(values), dtype=int)
+    day_counts[order] = np.repeat(counts, counts)
+    return ranks, day_counts
+
+
+def threshold_signals(timestamps, predicted, reference, buy_threshold=RECOMMENDATION_THRESHOLD_BUY,
+                      sell_threshold=RECOMMENDATION_THRESHOLD_SELL):
+    """
+    Правило за замовчуванням: КУПУВАТИ, якщо прогноз нижче reference * buy_threshold,
+    ПРОДАВАТИ — якщо вище reference * sell_threshold (reference — середня ціна за 24 години).
+    """
+    signals = np.full(len(predicted), NEUTRAL_SIGNAL, dtype=np.int8)
+    signals[predicted > reference * sell_threshold] = SELL_SIGNAL
+    signals[predicted < reference * buy_threshold] = BUY_SIGNAL
+    return signals
+
+
+def spread_signals(timestamps, predicted, reference, spread=0.05):
+    """
+    Спред відносно середньої прогнозованої ціни доби: КУПУВАТИ нижче mean * (1 - spread),
+    ПРОДАВАТИ вище mean * (1 + spread).
+    """
+    codes, days = _day_codes(timestamps)
+    daily_mean = _daily_mean(predicted, codes, days)
+    signals = np.full(len(predicted), NEUTRAL_SIGNAL, dtype=np.int8)
+    signals[predicted > daily_mean * (1 + spread)] = SELL_SIGNAL
+    signals[predicted < daily_mean * (1 - spread)] = BUY_SIGNAL
+    return signals
+
+
+def percentile_signals(timestamps, predicted, reference, lower=20, upper=80):
+    """
+    Процентильні смуги доби: КУПУВАТИ в годинах нижче lower-го процентиля прогнозованої ціни доби,
+    ПРОДАВАТИ — вище upper-го. Процентиль години рахується за її рангом у добі.
+    """
+    codes, _ = _day_codes(timestamps)
+    ranks, counts = _rank_within_day(predicted, codes)
+    percentile = np.divide(100.0 * ranks, counts - 1, out=np.full(len(ranks), 50.0), where=counts > 1)
+    signals = np.full(len(predicted), NEUTRAL_SIGNAL, dtype=np.int8)
+    signals[percentile > upper] = SELL_SIGNAL
+    signals[percentile < lower] = BUY_SIGNAL
+    return signals
+
+
+def top_n_signals(timestamps, predicted, reference, hours=4):
+    """
+    КУПУВАТИ в hours найдешевших годинах кожної доби, ПРОДАВАТИ — у hours найдорожчих.
+    """
+    codes, _ = _day_codes(timestamps)
+    ranks, counts = _rank_within_day(predicted, codes)
+    signals = np.full(len(predicted), NEUTRAL_SIGNAL, dtype=np.int8)
+    signals[ranks >= counts - hours] = SELL_SIGNAL
+    signals[ranks < hours] = BUY_SIGNAL
+    return signals
+
+
+STRATEGIES = {
+    'threshold': threshold_signals,
+    'spread': spread_signals,
+    'percentile': percentile_signals,
+    'top_n': top_n_signals,
+}
+
+
+def recommend(df_predictions, strategy=DEFAULT_STRATEGY, **params):
+    """
+    Рекомендації для DataFrame прогнозів (timestamp, price, predicted_price, price_rolling_mean_24h).
+    Повертає DataFrame зі стовпцями timestamp, predicted_price, actual_price, recommendation, signal.
+    Рядки без ковзного середнього пропускаються для стратегії threshold, якій воно потрібне.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown recommendation strategy '{strategy}'. Available: {list(STRATEGIES)}")
+
+    if strategy == 'threshold':
+        df_predictions = df_predictions.dropna(subset=['price_rolling_mean_24h'])
+    predicted = df_predictions['predicted_price'].to_numpy(dtype=float)
+    reference = df_predictions['price_rolling_mean_24h'].to_numpy(dtype=float)
+    signals = STRATEGIES[strategy](df_predictions['timestamp'], predicted, reference, **params)
+
+    return pd.DataFrame({
+        'timestamp': df_predictions['timestamp'].reset_index(drop=True),
+        'predicted_price': predicted,
+        'actual_price': df_predictions['price'].to_numpy(dtype=float),
+        'recommendation': _LABELS[signals],
+        'signal': signals,
+    })
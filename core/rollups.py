@@ -0,0 +1,135 @@
+from datetime import timedelta, timezone
+
+import pandas as pd
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import TruncDay, TruncWeek
+
+from core.data_access import read_frame
+from core.data_cache import bump_data_version
+from core.models import DEFAULT_ZONE, EnergyData, EnergyRollup
+
+RESOLUTION_HOUR = 'hour'
+RESOLUTION_DAY = 'day'
+RESOLUTION_WEEK = 'week'
+
+# Межі ширини діапазону для вибору роздільності дашборду.
+# Кількість точок на графіку: до ~1 080 погодинних, до ~730 денних, далі ~52 на рік.
+HOURLY_MAX_DAYS = 45
+DAILY_MAX_DAYS = 730
+
+ROLLUP_METRICS = [
+    'price', 'demand', 'supply', 'temperature', 'wind_generation', 'solar_generation',
+    'radiation_direct_horizontal', 'radiation_diffuse_horizontal',
+]
+
+_TRUNC = {
+    RESOLUTION_DAY: TruncDay,
+    RESOLUTION_WEEK: TruncWeek,
+}
+_PERIOD = {
+    RESOLUTION_DAY: timedelta(days=1),
+    RESOLUTION_WEEK: timedelta(weeks=1),
+}
+_STATS = {
+    'min': Min,
+    'mean': Avg,
+    'max': Max,
+}
+
+
+def choose_resolution(start_date, end_date):
+    """
+    Обирає роздільність даних для дашборду за шириною діапазону дат.
+    """
+    width_days = (end_date - start_date).days + 1
+    if width_days <= HOURLY_MAX_DAYS:
+        return RESOLUTION_HOUR
+    if width_days <= DAILY_MAX_DAYS:
+        return RESOLUTION_DAY
+    return RESOLUTION_WEEK
+
+
+def floor_period(timestamps, resolution):
+    """
+    Векторно округлює Series часових міток (UTC) до початку доби або тижня (понеділок).
+    """
+    days = timestamps.dt.floor('D')
+    if resolution == RESOLUTION_WEEK:
+        return days - pd.to_timedelta(days.dt.dayofweek, unit='D')
+    if resolution == RESOLUTION_DAY:
+        return days
+    return timestamps
+
+
+def _floor_datetime(value, resolution):
+    value = value.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == RESOLUTION_WEEK:
+        value -= timedelta(days=value.weekday())
+    return value
+
+
+def refresh_rollups(start, end, zones=None):
+    """
+    Перераховує денні та тижневі агрегати для всіх періодів, що перетинають [start, end]
+    (для зон zones або всіх зон). Агрегація виконується в базі даних одним запитом з групуванням
+    за зоною та періодом; зачіпаються лише змінені періоди.
+    """
+    aggregates = {'sample_count': Count('id')}
+    for metric in ROLLUP_METRICS:
+        for stat, func in _STATS.items():
+            aggregates[f'{metric}_{stat}'] = func(metric)
+
+    for resolution, trunc in _TRUNC.items():
+        period_from = _floor_datetime(start, resolution)
+        period_to = _floor_datetime(end, resolution) + _PERIOD[resolution]
+
+        queryset = EnergyData.objects.filter(timestamp__gte=period_from, timestamp__lt=period_to)
+        if zones is not None:
+            queryset = queryset.filter(zone__in=zones)
+        rows = (
+            queryset
+            .annotate(period=trunc('timestamp', tzinfo=timezone.utc))
+            .order_by()
+            .values('zone', 'period')
+            .annotate(**aggregates)
+        )
+        rollups = [
+            EnergyRollup(resolution=resolution, period_start=row.pop('period'), **row)
+            for row in rows
+        ]
+        EnergyRollup.objects.bulk_create(
+            rollups,
+            update_conflicts=True,
+            unique_fields=['zone', 'resolution', 'period_start'],
+            update_fields=list(aggregates),
+        )
+
+
+def rebuild_rollups():
+    """
+    Повністю перебудовує агрегати з EnergyData (наприклад, для вже наповненої бази).
+    """
+    with transaction.atomic():
+        EnergyRollup.objects.all().delete()
+        bounds = EnergyData.objects.aggregate(start=Min('timestamp'), end=Max('timestamp'))
+        if bounds['start'] is not None:
+            refresh_rollups(bounds['start'], bounds['end'])
+        bump_data_version()
+
+
+def rollup_frame(resolution, start, end, zone=DEFAULT_ZONE):
+    """
+    Агрегати зони за період як DataFrame: 'timestamp' (початок періоду), середні значення
+    під назвами полів EnergyData, а також стовпці <metric>_min та <metric>_max.
+    """
+    fields = ['period_start'] + [f'{metric}_{stat}' for metric in ROLLUP_METRICS for stat in _STATS]
+    qs = EnergyRollup.objects.filter(
+        zone=zone,
+        resolution=resolution,
+        period_start__gte=_floor_datetime(start, resolution),
+        period_start__lte=end,
+    ).order_by('period_start')
+
+    df = read_frame(qs, fields)
+    return df.rename(columns={'period_start': 'timestamp', **{f'{m}_mean': m for m in ROLLUP_METRICS}})
@@ -0,0 +1,196 @@
+"""
+Оптимізація купівлі-продажу електроенергії на горизонті прогнозу.
+
+Актив — накопичувач з обмеженнями (ємність, швидкість заряду/розряду, ККД) і, за потреби,
+споживанням daily_volume MWh на добу, рівномірно розподіленим по годинах. Мінімальна вартість
+плану рахується динамічним програмуванням на сітці рівнів заряду: для кожної години вартість
+переходу між рівнями — ціна * обсяг закупівлі (продаж — від'ємна закупівля). Активи з однаковою
+кількістю рівнів обробляються разом: один крок DP — кілька операцій NumPy над масивом (активи x рівні x рівні).
+"""
+import numpy as np
+
+DEFAULT_LEVELS = 41  # Мінімальна кількість рівнів заряду в сітці DP (крок = ємність / 40)
+MAX_LEVELS = 201
+MAX_ASSETS = 1000
+# Сумарна кількість переходів між рівнями (рівні² на актив) за запит: обмежує пам'ять масивів DP
+MAX_GRID_CELLS = 2_500_000
+
+# Параметри активу та значення за замовчуванням
+ASSET_DEFAULTS = {
+    'capacity': 0.0,  # MWh
+    'charge_rate': 0.0,  # MW, максимум енергії з мережі в накопичувач за годину
+    'discharge_rate': None,  # MW, максимум енергії з накопичувача за годину (за замовчуванням = charge_rate)
+    'efficiency': 0.9,  # ККД повного циклу; заряд і розряд мають по sqrt(efficiency)
+    'initial_level': 0.0,  # MWh на початку горизонту
+    'final_level': None,  # Мінімальний рівень у кінці горизонту (за замовчуванням = initial_level)
+    'daily_volume': 0.0,  # MWh споживання на добу, яке потрібно купити або взяти з накопичувача
+}
+_TOLERANCE = 1e-9
+
+
+class SchedulePlan:
+    """
+    План для всіх активів: buy/sell/level — масиви (активи x години), level — рівень після години.
+    cost — вартість плану, baseline_cost — вартість купівлі споживання щогодини без накопичувача.
+    feasible — чи існує план, що задовольняє обмеження (для неможливих cost = inf).
+    """
+
+    def __init__(self, buy, sell, level, cost, baseline_cost, feasible):
+        self.buy = buy
+        self.sell = sell
+        self.level = level
+        self.cost = cost
+        self.baseline_cost = baseline_cost
+        self.feasible = feasible
+
+
+def normalize_assets(assets):
+    """
+    Список словників параметрів -> словник масивів {параметр: масив по активах}.
+    """
+    if not assets:
+        raise ValueError("At least one asset is required.")
+    if len(assets) > MAX_ASSETS:
+        raise ValueError(f"At most {MAX_ASSETS} assets can be scheduled at once.")
+
+    columns = {name: [] for name in ASSET_DEFAULTS}
+    for n, asset in enumerate(assets):
+        if not isinstance(asset, dict):
+            raise ValueError(f"Asset {n} must be an object of parameters.")
+        unknown = set(asset) - set(ASSET_DEFAULTS) - {'id'}
+        if unknown:
+            raise ValueError(f"Asset {n} has unknown parameter(s) {sorted(unknown)}. Available: {list(ASSET_DEFAULTS)}")
+        values = {**ASSET_DEFAULTS, **{key: value for key, value in asset.items() if value is not None}}
+        if values['discharge_rate'] is None:
+            values['discharge_rate'] = values['charge_rate']
+        if values['final_level'] is None:
+            values['final_level'] = values['initial_level']
+        for name in ASSET_DEFAULTS:
+            try:
+                columns[name].append(float(values[name]))
+            except (TypeError, ValueError):
+                raise ValueError(f"Asset {n}: '{name}' must be a number.")
+
+    arrays = {name: np.array(values) for name, values in columns.items()}
+    if (arrays['efficiency'] <= 0).any() or (arrays['efficiency'] > 1).any():
+        raise ValueError("'efficiency' must be in (0, 1].")
+    for name in ('capacity', 'charge_rate', 'discharge_rate', 'initial_level', 'final_level', 'daily_volume'):
+        if (arrays[name] < 0).any() or not np.isfinite(arrays[name]).all():
+            raise ValueError(f"'{name}' must be a non-negative number.")
+    if (arrays['initial_level'] > arrays['capacity']).any() or (arrays['final_level'] > arrays['capacity']).any():
+        raise ValueError("'initial_level' and 'final_level' cannot exceed 'capacity'.")
+    return arrays
+
+
+def grid_levels(params, levels=DEFAULT_LEVELS):
+    """
+    Кількість рівнів сітки кожного активу: не менше levels і достатньо, щоб за годину можна було
+    змінити рівень хоча б на один крок при повільнішому із заряду чи розряду. Викликає ValueError,
+    якщо активу потрібно більше MAX_LEVELS рівнів або сітки всіх активів разом перевищують MAX_GRID_CELLS.
+    """
+    efficiency = np.sqrt(params['efficiency'])
+    step = np.minimum(params['charge_rate'] * efficiency, params['discharge_rate'] / efficiency)
+    usable = (params['capacity'] > 0) & (step > 0)
+    required = np.full(len(step), levels, dtype=np.int64)
+    required[usable] = np.maximum(
+        levels, np.ceil(params['capacity'][usable] / step[usable] - _TOLERANCE).astype(np.int64) + 1,
+    )
+    too_fine = np.flatnonzero(required > MAX_LEVELS)
+    if len(too_fine):
+        n = int(too_fine[0])
+        raise ValueError(
+            f"Asset {n} needs {int(required[n])} storage levels (capacity / charge or discharge rate is too large); "
+            f"at most {MAX_LEVELS} are supported."
+        )
+    # Масиви DP мають розмір активи x рівні x рівні
+    cells = int((required ** 2).sum())
+    if cells > MAX_GRID_CELLS:
+        raise ValueError(
+            f"Assets need {cells} storage level transitions in total; at most {MAX_GRID_CELLS} per request. "
+            "Schedule fewer assets or use fewer levels."
+        )
+    return required
+
+
+def _optimize_group(prices, params, levels):
+    """
+    DP для активів з однаковою кількістю рівнів сітки. Повертає (grid_energy, level, cost).
+    """
+    count, horizon = prices.shape
+    charge_efficiency = np.sqrt(params['efficiency'])[:, None, None]
+    discharge_efficiency = charge_efficiency
+    consumption = (params['daily_volume'] / 24)[:, None, None]
+
+    # Рівні заряду кожного активу та зміна рівня для переходу i -> j
+    grid = params['capacity'][:, None] * np.linspace(0, 1, levels)[None, :]
+    delta = grid[:, None, :] - grid[:, :, None]
+    # Енергія з мережі за годину: споживання плюс заряд (з втратами) або мінус віддача розряду
+    energy = consumption + np.where(delta >= 0, delta / charge_efficiency, delta * discharge_efficiency)
+    feasible_move = (
+        (delta / charge_efficiency <= params['charge_rate'][:, None, None] + _TOLERANCE)
+        & (-delta * discharge_efficiency <= params['discharge_rate'][:, None, None] + _TOLERANCE)
+    )
+    move_penalty = np.where(feasible_move, 0.0, np.inf)
+
+    # Зворотний прохід: value[a, i] — мінімальна вартість решти горизонту з рівня i
+    value = np.where(grid >= params['final_level'][:, None] - _TOLERANCE, 0.0, np.inf)
+    policy = np.empty((count, horizon, levels), dtype=np.int32)
+    total = np.empty_like(energy)
+    for t in range(horizon - 1, -1, -1):
+        np.multiply(prices[:, t, None, None], energy, out=total)
+        total += move_penalty
+        total += value[:, None, :]
+        policy[:, t] = total.argmin(axis=2)
+        value = np.take_along_axis(total, policy[:, t, :, None], axis=2)[..., 0]
+
+    # Прямий прохід від найближчого до initial_level рівня сітки
+    state = np.zeros(count, dtype=np.int64)
+    nonempty = params['capacity'] > 0
+    state[nonempty] = np.rint(params['initial_level'][nonempty] / params['capacity'][nonempty] * (levels - 1))
+    rows = np.arange(count)
+    cost = value[rows, state]
+    grid_energy = np.empty((count, horizon))
+    level = np.empty((count, horizon))
+    for t in range(horizon):
+        following = policy[rows, t, state]
+        grid_energy[:, t] = energy[rows, state, following]
+        state = following
+        level[:, t] = grid[rows, state]
+    return grid_energy, level, cost
+
+
+def optimize_schedule(prices, assets, levels=DEFAULT_LEVELS):
+    """
+    Мінімальний за вартістю план для кожного активу. prices — погодинні ціни (горизонт,)
+    або окремі для кожного активу (активи x горизонт); assets — список словників ASSET_DEFAULTS.
+    Рівні заряду дискретні (grid_levels), тож вартість може трохи перевищувати оптимум неперервної задачі.
+    Активи з однаковою сіткою плануються разом; сітка одного активу не залежить від інших.
+    """
+    params = normalize_assets(assets)
+    count = len(params['capacity'])
+    prices = np.broadcast_to(np.asarray(prices, dtype=float), (count, np.shape(prices)[-1]))
+    if not np.isfinite(prices).all():
+        raise ValueError("Prices must be finite numbers.")
+    horizon = prices.shape[1]
+    if levels < 2:
+        raise ValueError("At least 2 storage levels are required.")
+    asset_levels = grid_levels(params, levels)
+
+    grid_energy = np.empty((count, horizon))
+    level = np.empty((count, horizon))
+    cost = np.empty(count)
+    for group_levels in np.unique(asset_levels):
+        members = np.flatnonzero(asset_levels == group_levels)
+        group_params = {name: values[members] for name, values in params.items()}
+        grid_energy[members], level[members], cost[members] = _optimize_group(
+            prices[members], group_params, int(group_levels),
+        )
+
+    return SchedulePlan(
+        buy=np.clip(grid_energy, 0, None),
+        sell=np.clip(-grid_energy, 0, None),
+        level=level,
+        cost=cost,
+        baseline_cost=(prices * (params['daily_volume'] / 24)[:, None]).sum(axis=1),
+        feasible=np.isfinite(cost),
+    )
@@ -0,0 +1,126 @@
+"""
+Симуляція Монте-Карло шляхів ціни.
+
+Невизначеність оцінюється бутстрепом залишків на останніх днях історії:
+  * ціна — залишки моделі (факт - прогноз) за ту ж годину доби; вибраний залишок додається до
+    прогнозу кожного кроку й потрапляє в лаги наступних (recursive_forecast з noise);
+  * попит, вітер, сонце — добові зміни (x_t - x_{t-24}) за ту ж годину доби, що накопичуються
+    з кожною добою горизонту навколо сезонного наївного прогнозу.
+Сценарії генеруються пакетами NumPy і прогнозуються одним predict на крок; пакети розподіляються
+між процесами пулу. Зберігаються лише квантилі, а не самі шляхи.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from core.feature_engine import ROLLING_WINDOW
+from core.forecasting import HOURLY, default_paths, recursive_forecast
+
+QUANTILES = (10, 50, 90)
+RESIDUAL_DAYS = 30  # Днів історії, з яких беруться залишки
+SIMULATED_FIELDS = ('demand', 'wind_generation', 'solar_generation')
+
+
+class ResidualPool:
+    """
+    Залишки, згруповані за годиною доби: values відсортовані за годиною, offsets/counts — межі груп.
+    """
+
+    def __init__(self, hours, values):
+        values = np.asarray(values, dtype=float)
+        hours = np.asarray(hours, dtype=int)
+        valid = ~np.isnan(values)
+        order = np.argsort(hours[valid], kind='stable')
+        self.values = values[valid][order]
+        self.counts = np.bincount(hours[valid], minlength=24)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)[:-1]])
+        if (self.counts == 0).any():
+            raise ValueError("Residual pool needs at least one value for every hour of the day.")
+
+    def sample(self, rng, hours, size):
+        """
+        Масив (size x len(hours)): для кожної години горизонту — випадкові залишки тієї ж години доби.
+        """
+        hours = np.asarray(hours, dtype=int)
+        picks = rng.random((size, len(hours))) * self.counts[hours]
+        return self.values[self.offsets[hours] + picks.astype(np.int64)]
+
+
+def residual_pools(model, features, df_features, days=RESIDUAL_DAYS):
+    """
+    Пули залишків з останніх days днів DataFrame ознак (create_features): залишки моделі ціни
+    та добові зміни SIMULATED_FIELDS.
+    """
+    recent = df_features.tail(days * 24)
+    hours = recent['timestamp'].dt.hour.to_numpy()
+    pools = {'price': ResidualPool(hours, recent['price'].to_numpy(dtype=float)
+                                   - np.asarray(model.predict(recent[features].to_numpy(dtype=float)), dtype=float))}
+    history = df_features.tail(days * 24 + ROLLING_WINDOW)
+    for field in SIMULATED_FIELDS:
+        changes = history[field].diff(ROLLING_WINDOW).to_numpy(dtype=float)[ROLLING_WINDOW:]
+        pools[field] = ResidualPool(hours[-len(changes):], changes)
+    return pools
+
+
+def _simulate_chunk(model, features, engine, horizon, pools, size, seed):
+    rng = np.random.default_rng(seed)
+    hours = (engine.last_timestamp.hour + 1 + np.arange(horizon)) % 24
+    scenarios = {}
+    for field, path in default_paths(engine, horizon).items():
+        if field not in SIMULATED_FIELDS:
+            continue
+        changes = pools[field].sample(rng, hours, size)
+        # Похибка сезонного наївного прогнозу на k-й день — сума k добових змін
+        for step in range(ROLLING_WINDOW, horizon):
+            changes[:, step] += changes[:, step - ROLLING_WINDOW]
+        scenarios[field] = np.clip(path + changes, 0, None)
+    noise = pools['price'].sample(rng, hours, size)
+    result = recursive_forecast(model, features, engine, horizon, scenarios, noise=noise)
+    return result.predicted_prices.astype(np.float32)
+
+
+class SimulationResult:
+    """
+    Квантилі шляхів ціни: quantiles[q] — масив довжини горизонту для кожного q з QUANTILES.
+    """
+
+    def __init__(self, timestamps, quantiles, simulations):
+        self.timestamps = timestamps
+        self.quantiles = quantiles
+        self.simulations = simulations
+
+    def to_frame(self):
+        """
+        DataFrame: timestamp та стовпці price_p10, price_p50, price_p90 (за QUANTILES).
+        """
+        return pd.DataFrame({
+            'timestamp': self.timestamps,
+            **{f'price_p{q}': values for q, values in self.quantiles.items()},
+        })
+
+
+def simulate_prices(model, features, engine, horizon, pools, simulations=1000, workers=1, seed=None,
+                    quantiles=QUANTILES, chunk_size=500):
+    """
+    Генерує simulations шляхів ціни на horizon годин після engine.last_timestamp пакетами по chunk_size
+    (workers процесів, 1 — без пулу) і повертає їхні квантилі. seed робить результат відтворюваним.
+    """
+    if simulations <= 0:
+        raise ValueError("Number of simulations must be positive.")
+    sizes = [min(chunk_size, simulations - start) for start in range(0, simulations, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(sizes)))
+    args = [(model, features, engine, horizon, pools, size, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+
+    if workers == 1:
+        chunks = [_simulate_chunk(*chunk_args) for chunk_args in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_simulate_chunk, *zip(*args)))
+
+    paths = np.concatenate(chunks)
+    values = np.percentile(paths, quantiles, axis=0)
+    timestamps = pd.date_range(pd.Timestamp(engine.last_timestamp) + HOURLY, periods=horizon, freq='h')
+    return SimulationResult(timestamps, dict(zip(quantiles, values)), len(paths))
@@ -0,0 +1,82 @@
+// Декодер двійкового формату рядів графіків дашборду (див. core/chart_payload.py).
+// Значення читаються як Float32Array поверх отриманого ArrayBuffer без розбору тексту.
+
+const SECONDS_PER_DAY = 86400;
+
+function padTime(value) {
+    return (value < 10 ? '0' : '') + value;
+}
+
+function civilDate(days) {
+    // 'YYYY-MM-DD' для номера доби від 1970-01-01 (алгоритм civil_from_days, без Date)
+    const z = days + 719468;
+    const era = Math.floor(z / 146097);
+    const dayOfEra = z - era * 146097;
+    const yearOfEra = Math.floor((dayOfEra - Math.floor(dayOfEra / 1460) + Math.floor(dayOfEra / 36524)
+        - Math.floor(dayOfEra / 146096)) / 365);
+    const dayOfYear = dayOfEra - (365 * yearOfEra + Math.floor(yearOfEra / 4) - Math.floor(yearOfEra / 100));
+    const monthIndex = Math.floor((5 * dayOfYear + 2) / 153);
+    const day = dayOfYear - Math.floor((153 * monthIndex + 2) / 5) + 1;
+    const month = monthIndex < 10 ? monthIndex + 3 : monthIndex - 9;
+    const year = yearOfEra + era * 400 + (month <= 2 ? 1 : 0);
+    return year + '-' + padTime(month) + '-' + padTime(day);
+}
+
+function chartLabels(start, step, length, offsets) {
+    // 'YYYY-MM-DD HH:MM' в UTC — той самий формат міток, що й на сервері.
+    // Дата обчислюється арифметично й лише раз на добу: toISOString для кожної точки помітно повільніший
+    const labels = new Array(length);
+    let day = null;
+    let prefix = '';
+    for (let i = 0; i < length; i++) {
+        const seconds = start + (offsets === null ? i : offsets[i]) * step;
+        const days = Math.floor(seconds / SECONDS_PER_DAY);
+        const secondsOfDay = seconds - days * SECONDS_PER_DAY;
+        if (days !== day) {
+            day = days;
+            prefix = civilDate(days) + ' ';
+        }
+        labels[i] = prefix + padTime(Math.floor(secondsOfDay / 3600)) + ':' + padTime(Math.floor(secondsOfDay % 3600 / 60));
+    }
+    return labels;
+}
+
+function nullableArray(values) {
+    // NaN — відсутнє значення: Chart.js розриває лінію на null
+    const result = new Array(values.length);
+    for (let i = 0; i < values.length; i++) {
+        const value = values[i];
+        result[i] = value !== value ? null : value;
+    }
+    return result;
+}
+
+function decodeChartPayload(buffer) {
+    const view = new DataView(buffer);
+    const headerLength = view.getUint32(0, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)));
+    if (header.version !== 1) {
+        throw new Error('Unsupported chart payload version: ' + header.version);
+    }
+    const dataStart = 4 + headerLength;
+
+    const charts = {};
+    for (const [chart, meta] of Object.entries(header.charts)) {
+        const offsets = meta.offsets === null ? null : new Uint32Array(buffer, dataStart + meta.offsets, meta.length);
+        const series = {};
+        for (const [name, offset] of Object.entries(meta.series)) {
+            series[name] = nullableArray(new Float32Array(buffer, dataStart + offset, meta.length));
+        }
+        charts[chart] = {labels: chartLabels(meta.start, header.step, meta.length, offsets), series: series};
+    }
+    return charts;
+}
+
+function fetchChartPayload(url) {
+    return fetch(url).then(response => {
+        if (!response.ok) {
+            throw new Error('Chart data request failed: ' + response.status);
+        }
+        return response.arrayBuffer();
+    }).then(decodeChartPayload);
+}
@@ -1,3 +1,1739 @@
-from django.test import TestCase
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+from io import StringIO
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from asgiref.sync import async_to_sync
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from xgboost import XGBRegressor
+
+from core.chart_payload import accepted_encoding, decode_chart_payload, encode_chart_payload
+from core.data_access import read_async, read_concurrently, read_frame
+from core.data_cache import PREDICTIONS_VERSION, bump_data_version, cached_count, get_data_version
+from core.archive import (
+    ARCHIVE_VERSION, archive_is_current, export_partition, load_energy_frame, partition_path, sync_archive,
+)
+from core.ingest import detect_zones, import_csv, import_csv_incremental, prepare_chunk, upsert_frame
+from core.downsampling import lttb, lttb_indices, downsample_group
+from core import ingest, ml_utils, model_registry, tuning
+from core.backtesting import REFERENCE_WINDOW, make_folds, prior_mean_reference, run_backtest, trading_pnl
+from core.feature_engine import EXOGENOUS_FIELDS, FeatureEngine, RollingWindow
+from core.forecasting import recursive_forecast
+from core.feature_store import build_feature_matrix, forecast_hours, refresh_feature_state, update_feature_state
+from core.ml_utils import FEATURES, create_features
+from core.models import (
+    DEFAULT_ZONE, EnergyData, EnergyRollup, FeatureState, ForecastRun, IngestCheckpoint, ModelVersion, PricePrediction,
+    TuningTrial,
+)
+from core.predictions import prediction_prices, run_predictions, save_forecast_run, set_current_run
+from core.pagination import decode_cursor, encode_cursor, keyset_paginate
+from core.recommendations import BUY, NEUTRAL, SELL, recommend
+from core.rollups import (
+    DAILY_MAX_DAYS, HOURLY_MAX_DAYS, RESOLUTION_DAY, RESOLUTION_HOUR, RESOLUTION_WEEK, choose_resolution, floor_period,
+    rollup_frame,
+)
+from core.scheduling import optimize_schedule
+from core.simulation import ResidualPool, residual_pools, simulate_prices
+
+
+class LTTBDownsamplingTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.y = np.cumsum(rng.normal(size=50_000))
+        # Короткі піки, які легко загубити при простому проріджуванні
+        self.y[12_345] = self.y.max() + 500
+        self.y[40_001] = self.y.min() - 500
+
+    def test_returns_threshold_points_including_endpoints(self):
+        idx = lttb_indices(self.y, 1000)
+        self.assertEqual(len(idx), 1000)
+        self.assertEqual(idx[0], 0)
+        self.assertEqual(idx[-1], len(self.y) - 1)
+        self.assertTrue(np.all(np.diff(idx) > 0))
+
+    def test_global_extrema_are_preserved(self):
+        for threshold in (10, 100, 1000):
+            idx = lttb_indices(self.y, threshold)
+            self.assertIn(12_345, idx)
+            self.assertIn(40_001, idx)
+
+    def test_extrema_preserved_for_random_series(self):
+        rng = np.random.default_rng(11)
+        for _ in range(20):
+            y = rng.normal(size=int(rng.integers(100, 5_000)))
+            idx = lttb_indices(y, int(rng.integers(3, 90)))
+            self.assertIn(int(np.argmax(y)), idx)
+            self.assertIn(int(np.argmin(y)), idx)
+
+    def test_short_series_is_returned_unchanged(self):
+        np.testing.assert_array_equal(lttb_indices(np.arange(5.0), 10), np.arange(5))
+        np.testing.assert_array_equal(lttb_indices(np.arange(50.0), 0), np.arange(50))
+
+    def test_nan_values_are_skipped(self):
+        y = self.y.copy()
+        y[:100] = np.nan
+        idx = lttb_indices(y, 500)
+        self.assertFalse(np.isnan(y[idx]).any())
+        self.assertEqual(idx[0], 100)
+
+    def test_lttb_returns_selected_points(self):
+        x = np.arange(len(self.y)) * 3600
+        xs, ys = lttb(x, self.y, 200)
+        self.assertEqual(len(xs), 200)
+        self.assertEqual(ys.max(), self.y.max())
+        self.assertEqual(ys.min(), self.y.min())
+
+    def test_group_keeps_peaks_of_every_series(self):
+        other = -self.y[::-1].copy()
+        idx = downsample_group([self.y, other], 300)
+        for series in (self.y, other):
+            self.assertIn(int(np.argmax(series)), idx)
+            self.assertIn(int(np.argmin(series)), idx)
+        self.assertLessEqual(len(idx), 300)
+
+    def test_group_stays_within_threshold_for_disjoint_peaks(self):
+        rng = np.random.default_rng(3)
+        group = []
+        for position in range(5):
+            series = rng.normal(size=20_000)
+            # Піки кожного ряду в окремому місці, тож вибірки рядів майже не перетинаються
+            series[1_000 + position * 3_000] = 100
+            series[2_000 + position * 3_000] = -100
+            group.append(series)
+        for threshold in (1, 2, 10, 14, 15, 50, 300, 1000):
+            idx = downsample_group(group, threshold)
+            self.assertLessEqual(len(idx), threshold)
+            self.assertTrue(np.all(np.diff(idx) > 0))
+            self.assertEqual(idx[0], 0)
+        idx = downsample_group(group, 300)
+        self.assertEqual(idx[-1], 19_999)
+        for series in group:
+            self.assertIn(int(np.argmax(series)), idx)
+            self.assertIn(int(np.argmin(series)), idx)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        rows = []
+        for i in range(53):
+            # Повторювані ціни та NULL-и в температурі перевіряють тай-брейк за timestamp
+            rows.append(EnergyData(
+                timestamp=start + timedelta(hours=i),
+                price=float(i % 7),
+                demand=1000.0 + i,
+                temperature=None if i % 5 == 0 else float(i % 4),
+            ))
+        EnergyData.objects.bulk_create(rows)
+
+    def setUp(self):
+        cache.clear()
+
+    def _expected(self, sort_by):
+        field = sort_by.lstrip('-')
+        desc = sort_by.startswith('-')
+        objs = list(EnergyData.objects.all())
+        nulls = sorted((o for o in objs if getattr(o, field) is None), key=lambda o: o.timestamp, reverse=desc)
+        values = sorted((o for o in objs if getattr(o, field) is not None),
+                        key=lambda o: (getattr(o, field), o.timestamp), reverse=desc)
+        return [o.pk for o in (values + nulls if desc else nulls + values)]
+
+    def _walk_forward(self, sort_by, per_page=10):
+        pages, after = [], None
+        while True:
+            page = keyset_paginate(EnergyData.objects.all(), sort_by, per_page, after=after)
+            pages.append([o.pk for o in page])
+            if not page.has_next:
+                return pages
+            after = decode_cursor(page.next_cursor)
+
+    def test_forward_walk_matches_full_ordering(self):
+        for sort_by in ['-timestamp', 'timestamp', 'price', '-price', 'temperature', '-temperature']:
+            with self.subTest(sort_by=sort_by):
+                pages = self._walk_forward(sort_by)
+                self.assertEqual(sum(pages, []), self._expected(sort_by))
+                self.assertEqual([len(p) for p in pages], [10] * 5 + [3])
+
+    def test_backward_walk_returns_same_pages(self):
+        for sort_by in ['price', '-temperature']:
+            with self.subTest(sort_by=sort_by):
+                forward = self._walk_forward(sort_by)
+                page = keyset_paginate(EnergyData.objects.all(), sort_by, 10, last=True)
+                backward = [[o.pk for o in page]]
+                while page.has_previous:
+                    page = keyset_paginate(EnergyData.objects.all(), sort_by, 10,
+                                           before=decode_cursor(page.previous_cursor))
+                    backward.insert(0, [o.pk for o in page])
+                # Остання сторінка при русі назад заповнена повністю, тож порівнюємо порядок записів
+                self.assertEqual(sum(backward, []), sum(forward, []))
+                self.assertFalse(page.has_previous)
+
+    def test_cursor_round_trip(self):
+        obj = EnergyData.objects.filter(temperature__isnull=True).first()
+        self.assertEqual(decode_cursor(encode_cursor(obj, 'temperature')), (None, obj.timestamp))
+        with self.assertRaises(ValueError):
+            decode_cursor('1.0|not-a-date')
+
+    def test_list_view_keyset_and_numbered_modes(self):
+        response = self.client.get(reverse('energy_list'), {'sort_by': 'price'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['keyset'])
+        self.assertEqual(response.context['total_count'], 53)
+        self.assertIn('after=', response.context['next_url'])
+
+        response = self.client.get(reverse('energy_list'), {'pagination': 'pages', 'page': 2})
+        self.assertEqual(response.context['page_obj'].number, 2)
+        self.assertEqual(response.context['page_obj'].paginator.num_pages, 2)
+
+    def test_cached_count_invalidated_by_data_version(self):
+        params = {'price__gte': 3.0}
+        queryset = EnergyData.objects.filter(price__gte=3.0)
+        self.assertEqual(cached_count(queryset, 'test', params), 29)
+        EnergyData.objects.filter(price=6.0).delete()
+        self.assertEqual(cached_count(queryset, 'test', params), 29)  # Без зміни версії — значення з кешу
+
+        version = get_data_version()
+        bump_data_version()
+        self.assertEqual(get_data_version(), version + 1)
+        self.assertEqual(cached_count(queryset, 'test', params), 22)
+
+
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        EnergyData.objects.bulk_create([
+            EnergyData(timestamp=start + timedelta(hours=i), price=50.0 + i % 24, demand=1000.0)
+            for i in range(24 * 10)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_dashboard_context_is_cached_until_data_changes(self):
+        url = reverse('energy_dashboard')
+        first = self.client.get(url, {'start_date': '2024-01-01', 'end_date': '2024-01-10'})
+        # Повторний запит читає лише версії даних (для списку зон і для контексту)
+        with self.assertNumQueries(2):
+            second = self.client.get(url, {'end_date': '2024-01-10', 'start_date': '2024-01-01'})
+        self.assertEqual(first.content, second.content)
+
+    def test_chart_data_is_cached_until_data_changes(self):
+        url = reverse('energy_dashboard_chart_data')
+        params = {'start_date': '2024-01-01', 'end_date': '2024-01-10'}
+
+        def max_price():
+            _, series = decode_chart_payload(self.client.get(url, params).content)['price']
+            return np.nanmax(series['prices_actual'])
+
+        self.assertEqual(max_price(), 73.0)
+        with self.assertNumQueries(2):
+            self.client.get(url, params)
+        EnergyData.objects.filter(timestamp__date='2024-01-05').update(price=999.0)
+        self.assertEqual(max_price(), 73.0)
+        bump_data_version()
+        self.assertEqual(max_price(), 999.0)
+
+    def test_prediction_version_invalidates_dashboard(self):
+        url = reverse('energy_dashboard')
+        self.client.get(url)
+        bump_data_version(PREDICTIONS_VERSION)
+        with self.assertNumQueries(4):  # Версії (зони, контекст), останній timestamp, прогнози
+            self.client.get(url)
+
+    def test_list_page_is_cached(self):
+        url = reverse('energy_list')
+        self.client.get(url, {'sort_by': 'price'})
+        with self.assertNumQueries(3):  # Версія даних для списку зон, кількості та сторінки
+            response = self.client.get(url, {'sort_by': 'price'})
+        self.assertEqual(len(response.context['page_obj']), 50)
+
+
+class ModelRegistryTests(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        settings_override = override_settings(MODEL_REGISTRY_DIR=tmp_dir.name, MODEL_RELOAD_CHECK_SECONDS=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        model_registry.clear_model_cache()
+        self.addCleanup(model_registry.clear_model_cache)
+
+        rng = np.random.default_rng(0)
+        self.X = pd.DataFrame(rng.normal(size=(200, 3)), columns=['a', 'b', 'c'])
+        self.y = self.X['a'] * 2 + self.X['b']
+
+    def _fit(self, seed):
+        return XGBRegressor(n_estimators=20, max_depth=3, random_state=seed).fit(self.X, self.y)
+
+    def test_register_and_load_round_trip(self):
+        model = self._fit(1)
+        version = model_registry.register_model(model, ['a', 'b', 'c'], metrics={'rmse': 0.1})
+        self.assertTrue(version.is_active)
+        self.assertTrue(version.artifact.endswith('.ubj'))
+
+        loaded = model_registry.get_active_model()
+        self.assertEqual(loaded.version, version.pk)
+        self.assertEqual(loaded.features, ['a', 'b', 'c'])
+        np.testing.assert_allclose(loaded.predict(self.X), model.predict(self.X), rtol=1e-6)
+
+    def test_active_model_is_loaded_once_and_reloaded_on_promotion(self):
+        first = model_registry.register_model(self._fit(1), ['a', 'b', 'c'])
+        second = model_registry.register_model(self._fit(2), ['a', 'b', 'c'], promote=False)
+        self.assertEqual(ModelVersion.objects.get(is_active=True).pk, first.pk)
+
+        with mock.patch.object(model_registry, 'load_version', wraps=model_registry.load_version) as load:
+            model_registry.get_active_model()
+            model_registry.get_active_model()
+            self.assertEqual(load.call_count, 1)
+
+            # Просування з іншого процесу: кеш цього процесу не скидається, версія перевіряється в базі
+            ModelVersion.objects.filter(pk=first.pk).update(is_active=False)
+            ModelVersion.objects.filter(pk=second.pk).update(is_active=True)
+            self.assertEqual(model_registry.get_active_model().version, second.pk)
+            self.assertEqual(load.call_count, 2)
+
+    def test_missing_active_model_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            model_registry.get_active_model()
+
+
+class IncrementalTrainingTests(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        settings_override = override_settings(MODEL_REGISTRY_DIR=tmp_dir.name, MODEL_RELOAD_CHECK_SECONDS=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        model_registry.clear_model_cache()
+        self.addCleanup(model_registry.clear_model_cache)
+        params = mock.patch.dict(ml_utils.MODEL_PARAMS, {'n_estimators': 60, 'n_jobs': 1})
+        params.start()
+        self.addCleanup(params.stop)
+
+        rng = np.random.default_rng(0)
+        hours = 24 * 70
+        timestamps = pd.date_range('2024-01-01', periods=hours, freq='h', tz='UTC')
+        demand = 2000 + 300 * np.sin(np.arange(hours) * 2 * np.pi / 24) + rng.normal(0, 20, hours)
+        self.df = pd.DataFrame({
+            'timestamp': timestamps,
+            'price': demand / 40 + rng.normal(0, 1, hours),
+            'demand': demand,
+            'temperature': rng.normal(10, 3, hours),
+            'wind_generation': rng.uniform(0, 500, hours),
+            'solar_generation': rng.uniform(0, 200, hours),
+            'radiation_direct_horizontal': rng.uniform(0, 100, hours),
+            'radiation_diffuse_horizontal': rng.uniform(0, 50, hours),
+        })
+
+    def test_without_active_model_trains_from_scratch(self):
+        _, _, version = ml_utils.update_model(self.df)
+        self.assertEqual(version.metrics['training'], 'full')
+        self.assertEqual(version.metrics['full_retrain_reason'], 'no active model')
+
+    def test_continues_boosting_on_new_rows(self):
+        _, _, base = ml_utils.train_model(self.df.iloc[:-24 * 7])
+        model, features, version = ml_utils.update_model(self.df)
+
+        self.assertEqual(features, FEATURES)
+        self.assertEqual(version.metrics['training'], 'incremental')
+        self.assertEqual(version.metrics['base_version'], base.pk)
+        self.assertEqual(version.metrics['new_rows'], 24 * 7)
+        self.assertEqual(version.train_start, base.train_start)
+        self.assertEqual(version.train_end, base.train_end + timedelta(days=7))
+        self.assertTrue(version.is_active)
+        self.assertGreater(model.best_iteration, base.metrics['best_iteration'])
+
+        # Нових рядків більше немає: активна версія лишається без змін
+        _, _, again = ml_utils.update_model(self.df)
+        self.assertEqual(again.pk, version.pk)
+
+    def test_full_retrain_policy(self):
+        _, _, base = ml_utils.train_model(self.df.iloc[:-24 * 7])
+        ModelVersion.objects.filter(pk=base.pk).update(features=FEATURES[:-1])
+        _, _, version = ml_utils.update_model(self.df)
+        self.assertEqual(version.metrics['full_retrain_reason'], 'feature schema changed')
+
+        # Модель, навчена на попередньому визначенні ознак (ковзне середнє ціни з поточною годиною)
+        ModelVersion.objects.filter(pk=version.pk).update(params=ml_utils.MODEL_PARAMS)
+        _, _, version = ml_utils.update_model(self.df)
+        self.assertEqual(version.metrics['full_retrain_reason'], 'feature definitions changed')
+
+        ModelVersion.objects.filter(pk=version.pk).update(metrics={**version.metrics, 'rmse': 1e-3})
+        _, _, retrained = ml_utils.update_model(self.df.iloc[:-1])
+        self.assertIn('holdout RMSE drifted', retrained.metrics['full_retrain_reason'])
+
+
+    def _store(self, df):
+        EnergyData.objects.bulk_create([EnergyData(**row) for row in df.to_dict('records')])
+        bump_data_version()
+
+    def test_command_retrain_then_incremental_continues_boosting(self):
+        # Моделі пулу процесів (Command._save_zone) реєструються з версією ознак, тож --incremental
+        # продовжує їх бустинг, а не перенавчає з нуля
+        self._store(self.df.iloc[:-24 * 7])
+        options = {'workers': 1, 'predict_period_days': 1, 'stdout': StringIO()}
+        with override_settings(ENERGY_ARCHIVE_DIR=f'{settings.MODEL_REGISTRY_DIR}/archive'):
+            call_command('train_predict_model', retrain=True, **options)
+            base = ModelVersion.objects.get(is_active=True)
+            self.assertEqual(base.params, ml_utils.registry_params())
+
+            self._store(self.df.iloc[-24 * 7:])
+            output = StringIO()
+            call_command('train_predict_model', incremental=True, **{**options, 'stdout': output})
+
+        version = ModelVersion.objects.get(is_active=True)
+        self.assertEqual(version.metrics['training'], 'incremental')
+        self.assertNotIn('full_retrain_reason', version.metrics)
+        self.assertEqual(version.metrics['base_version'], base.pk)
+        self.assertIn(f'Continued boosting v{base.pk}', output.getvalue())
+        self.assertEqual(ForecastRun.objects.get(is_current=True).model_version_id, version.pk)
+
+
+class FeatureStoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        rng = np.random.default_rng(3)
+        start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+        hours = 24 * 5
+        EnergyData.objects.bulk_create([
+            EnergyData(
+                timestamp=start + timedelta(hours=i),
+                price=float(50 + rng.normal(scale=10)),
+                demand=float(3000 + rng.normal(scale=200)),
+                temperature=float(rng.normal(scale=5)),
+                wind_generation=float(abs(rng.normal(scale=500))),
+                solar_generation=float(abs(rng.normal(scale=300))),
+                radiation_direct_horizontal=float(abs(rng.normal(scale=100))),
+                radiation_diffuse_horizontal=float(abs(rng.normal(scale=50))),
+            )
+            for i in range(hours)
+        ])
+
+    def _batch_features(self, horizon, demand_path):
+        """
+        Ознаки майбутніх годин так, як їх будує train_predict_model: історія + майбутні рядки.
+        """
+        history = pd.DataFrame(list(EnergyData.objects.order_by('timestamp').values()))
+        history['timestamp'] = pd.to_datetime(history['timestamp'], utc=True)
+        last = history.iloc[-1]
+        future = pd.DataFrame({
+            'timestamp': pd.date_range(last['timestamp'] + pd.Timedelta(hours=1), periods=horizon, freq='h'),
+            'price': np.nan,
+            'demand': demand_path,
+            **{field: last[field] for field in ['temperature', 'wind_generation', 'solar_generation',
+                                                 'radiation_direct_horizontal', 'radiation_diffuse_horizontal']},
+        })
+        features = create_features(pd.concat([history, future], ignore_index=True))
+        return features.tail(horizon)[FEATURES].to_numpy(dtype=float)
+
+    def test_matches_create_features_over_horizon(self):
+        state = refresh_feature_state()
+        timestamps, _ = forecast_hours(state, end=state.as_of + timedelta(hours=48))
+        demand_path = np.linspace(2500, 3500, len(timestamps))
+
+        online = build_feature_matrix(state, timestamps, FEATURES, overrides={'demand': demand_path})
+        batch = self._batch_features(len(timestamps), demand_path)
+        np.testing.assert_allclose(online, batch, rtol=1e-9, atol=1e-9, equal_nan=True)
+
+    def test_state_follows_new_rows(self):
+        state = refresh_feature_state()
+        new_timestamp = state.as_of + timedelta(hours=1)
+        EnergyData.objects.create(timestamp=new_timestamp, price=123.0, demand=4000.0)
+        state = refresh_feature_state()
+        self.assertEqual(state.as_of, new_timestamp)
+        self.assertEqual(state.window['price'][-1], 123.0)
+        self.assertEqual(len(state.window['price']), 24)
+        self.assertIsNone(state.rolling_sums['wind_generation'])  # У вікні з'явився пропуск
+
+    def test_range_validation(self):
+        state = refresh_feature_state()
+        with self.assertRaises(ValueError):
+            forecast_hours(state, start=state.as_of)
+        with self.assertRaises(ValueError):
+            forecast_hours(state, end=state.as_of + timedelta(days=30))
+
+
+class FeatureEngineParityTests(SimpleTestCase):
+    RAW_FIELDS = [
+        'price', 'demand', 'temperature', 'wind_generation', 'solar_generation',
+        'radiation_direct_horizontal', 'radiation_diffuse_horizontal',
+    ]
+
+    def _frame(self, hours, missing_share=0.0, seed=5):
+        rng = np.random.default_rng(seed)
+        frame = pd.DataFrame({'timestamp': pd.date_range('2023-12-20', periods=hours, freq='h', tz='UTC')})
+        for field in self.RAW_FIELDS:
+            values = rng.normal(50, 20, hours)
+            values[rng.random(hours) < missing_share] = np.nan
+            frame[field] = values
+        return frame
+
+    def _assert_parity(self, frame, actual):
+        expected = create_features(frame)[FEATURES].to_numpy(dtype=float)
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12, equal_nan=True)
+
+    def test_transform_matches_create_features(self):
+        # Перехід через Новий рік перевіряє dayofyear/weekofyear/year
+        frame = self._frame(24 * 30)
+        self._assert_parity(frame, FeatureEngine().transform(frame))
+
+    def test_missing_values_are_backfilled_like_create_features(self):
+        frame = self._frame(24 * 30, missing_share=0.03)
+        # Довгий пропуск: ковзне середнє невизначене понад 24 години і заповнюється наступним значенням
+        frame.loc[100:130, 'wind_generation'] = np.nan
+        frame.loc[len(frame) - 3:, 'price'] = np.nan  # Хвостові пропуски bfill не заповнює
+        self._assert_parity(frame, FeatureEngine().transform(frame))
+
+    def test_short_history(self):
+        frame = self._frame(10)
+        self._assert_parity(frame, FeatureEngine().transform(frame))
+
+    def test_appending_rows_one_by_one(self):
+        frame = self._frame(24 * 10, missing_share=0.02)
+        engine = FeatureEngine()
+        rows = [
+            engine.append(row.timestamp.to_pydatetime(), {field: getattr(row, field) for field in self.RAW_FIELDS})
+            for row in frame.itertuples()
+        ]
+        self._assert_parity(frame, np.vstack(rows))
+
+    def test_out_of_order_append_is_rejected(self):
+        engine = FeatureEngine()
+        timestamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        engine.append(timestamp, {'price': 1.0})
+        with self.assertRaises(ValueError):
+            engine.append(timestamp, {'price': 2.0})
+
+    def test_rolling_window_sum_stays_exact(self):
+        rng = np.random.default_rng(11)
+        values = rng.normal(1e6, 1e3, 50_000)
+        window = RollingWindow(24)
+        for value in values:
+            window.push(value)
+        self.assertEqual(window.values(), list(values[-24:]))
+        self.assertAlmostEqual(window.sum, float(np.sum(values[-24:])), delta=1e-6)
+
+
+class FeatureStateUpdateTests(TestCase):
+    def _frame(self, start, hours):
+        rng = np.random.default_rng(hours)
+        return pd.DataFrame({
+            'timestamp': pd.date_range(start, periods=hours, freq='h', tz='UTC'),
+            'price': rng.normal(50, 10, hours),
+            'demand': rng.normal(3000, 100, hours),
+            'temperature': rng.normal(5, 2, hours),
+            'wind_generation': rng.normal(500, 50, hours),
+            'solar_generation': rng.normal(200, 20, hours),
+            'radiation_direct_horizontal': rng.normal(100, 10, hours),
+            'radiation_diffuse_horizontal': rng.normal(50, 5, hours),
+        })
+
+    def _write(self, frame):
+        EnergyData.objects.bulk_create([EnergyData(**row) for row in frame.to_dict('records')])
+        return update_feature_state(frame)
+
+    def _assert_same_state(self, state, expected):
+        self.assertEqual(state.as_of, expected.as_of)
+        self.assertEqual(state.last_values, expected.last_values)
+        for field, values in expected.window.items():
+            np.testing.assert_allclose(state.window[field], values)
+            np.testing.assert_allclose(state.rolling_sums[field], expected.rolling_sums[field])
+
+    def test_incremental_update_matches_refresh_from_database(self):
+        self._write(self._frame('2024-01-01', 30))
+        for start, hours in (('2024-01-02 06:00', 5), ('2024-01-02 11:00', 1), ('2024-01-02 12:00', 40)):
+            state = self._write(self._frame(start, hours))
+            self._assert_same_state(state, refresh_feature_state())
+
+    def test_backfilled_rows_trigger_refresh(self):
+        self._write(self._frame('2024-01-02', 30))
+        state = self._write(self._frame('2024-01-01', 3))
+        self.assertEqual(state.as_of, datetime(2024, 1, 3, 5, tzinfo=timezone.utc))
+        self._assert_same_state(state, refresh_feature_state())
+
+
+class _ColumnModel:
+    """
+    Тестова модель: прогноз = значення ознаки column + offset.
+    """
+
+    def __init__(self, column, offset=0.0):
+        self.column = column
+        self.offset = offset
+
+    def predict(self, X):
+        return X[:, FEATURES.index(self.column)] + self.offset if self.column else np.full(len(X), self.offset)
+
+
+class RecursiveForecastTests(SimpleTestCase):
+    def setUp(self):
+        start = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        rows = [
+            {'timestamp': start + timedelta(hours=i), 'price': 10.0, 'demand': 2000.0 + i, 'temperature': 12.0,
+             'wind_generation': 300.0, 'solar_generation': 50.0,
+             'radiation_direct_horizontal': 20.0, 'radiation_diffuse_horizontal': 10.0}
+            for i in range(48)
+        ]
+        self.engine = FeatureEngine.from_history(rows[-24:], features=[])
+
+    def test_predictions_feed_back_into_price_lag(self):
+        result = recursive_forecast(_ColumnModel('price_lag1', 1.0), FEATURES, self.engine, 72)
+        np.testing.assert_allclose(result.predicted_prices[0], 10.0 + np.arange(1, 73))
+        self.assertEqual(result.timestamps[0], pd.Timestamp('2024-05-03 00:00', tz='UTC'))
+
+    def test_price_rolling_mean_uses_predicted_hours(self):
+        result = recursive_forecast(_ColumnModel(None, 34.0), FEATURES, self.engine, 30)
+        steps = np.arange(30)
+        expected = (10.0 * np.clip(24 - steps, 0, None) + 34.0 * np.minimum(steps, 24)) / 24
+        np.testing.assert_allclose(result.price_rolling_means[0], expected)
+
+    def test_features_match_training_features_with_actual_prices(self):
+        rng = np.random.default_rng(4)
+        frame = pd.DataFrame({'timestamp': pd.date_range('2024-05-01', periods=72, freq='h', tz='UTC')})
+        for field in ['price', 'demand', 'temperature', 'wind_generation', 'solar_generation',
+                      'radiation_direct_horizontal', 'radiation_diffuse_horizontal']:
+            frame[field] = rng.normal(50, 20, 72)
+        history, future = frame.iloc[:48], frame.iloc[48:]
+        engine = FeatureEngine.from_history(history.to_dict('records'), features=[])
+
+        class ReplayModel:
+            # Повертає фактичні ціни, тож лаги й ковзні середні ціни будуються з тих самих значень, що в навчанні
+            rows = []
+
+            def predict(self, X):
+                self.rows.append(X[0].copy())
+                return np.array([future['price'].iloc[len(self.rows) - 1]])
+
+        model = ReplayModel()
+        scenarios = {field: future[field].to_numpy() for field in EXOGENOUS_FIELDS}
+        recursive_forecast(model, FEATURES, engine, 24, scenarios)
+        expected = create_features(frame)[FEATURES].tail(24).to_numpy(dtype=float)
+        np.testing.assert_allclose(np.vstack(model.rows), expected, rtol=1e-9)
+
+    def test_default_paths_repeat_previous_day(self):
+        result = recursive_forecast(_ColumnModel('demand'), FEATURES, self.engine, 48)
+        np.testing.assert_allclose(result.predicted_prices[0], np.tile(2024.0 + np.arange(24), 2))
+
+    def test_batched_scenarios_match_single_runs(self):
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.normal(size=(400, len(FEATURES))), columns=FEATURES)
+        X['demand'] = rng.uniform(1500, 2500, 400)
+        X['price_lag1'] = rng.uniform(0, 50, 400)
+        model = XGBRegressor(n_estimators=20, max_depth=3).fit(X, X['demand'] / 100 + X['price_lag1'] / 2)
+
+        demand = rng.uniform(1500, 2500, size=(5, 24))
+        batched = recursive_forecast(model, FEATURES, self.engine, 24, {'demand': demand, 'temperature': 3.0})
+        self.assertEqual(batched.predicted_prices.shape, (5, 24))
+        for scenario in range(5):
+            single = recursive_forecast(model, FEATURES, self.engine, 24,
+                                        {'demand': demand[scenario], 'temperature': 3.0})
+            np.testing.assert_allclose(batched.predicted_prices[scenario], single.predicted_prices[0], rtol=1e-6)
+
+    def test_price_noise_feeds_back_into_later_steps(self):
+        noise = np.zeros((2, 6))
+        noise[1, 0] = 5.0
+        result = recursive_forecast(_ColumnModel('price_lag1', 1.0), FEATURES, self.engine, 6, noise=noise)
+        np.testing.assert_allclose(result.predicted_prices[0], 10.0 + np.arange(1, 7))
+        np.testing.assert_allclose(result.predicted_prices[1], 15.0 + np.arange(1, 7))
+
+    def test_invalid_scenarios(self):
+        with self.assertRaises(ValueError):
+            recursive_forecast(_ColumnModel('demand'), FEATURES, self.engine, 24, noise=np.ones(10))
+        with self.assertRaises(ValueError):
+            recursive_forecast(_ColumnModel('demand'), FEATURES, self.engine, 24, {'humidity': 1.0})
+        with self.assertRaises(ValueError):
+            recursive_forecast(_ColumnModel('demand'), FEATURES, self.engine, 24, {'demand': np.ones(10)})
+
+
+class BacktestingTests(SimpleTestCase):
+    def setUp(self):
+        self.timestamps = np.arange(
+            np.datetime64('2024-01-01T00:00:00'), np.datetime64('2024-05-01T00:00:00'), np.timedelta64(1, 'h')
+        )
+
+    def test_folds_walk_backward_from_latest_hour(self):
+        folds = make_folds(self.timestamps, 3, test_days=10, validation_days=5, min_train_rows=24 * 30)
+        self.assertEqual([fold.number for fold in folds], [1, 2, 3])
+        self.assertEqual(folds[0].test_end, len(self.timestamps))
+        for fold in folds:
+            self.assertEqual(fold.train_start, 0)
+            self.assertEqual(fold.test_end - fold.test_start, 240)
+            self.assertEqual(fold.test_start - fold.validation_start, 120)
+        self.assertEqual(folds[1].test_end, folds[0].test_start)
+
+    def test_folds_stop_when_training_history_is_too_short(self):
+        folds = make_folds(self.timestamps, 20, test_days=30, validation_days=10, min_train_rows=24 * 30)
+        self.assertEqual(len(folds), 2)
+        rolling = make_folds(self.timestamps, 2, test_days=10, validation_days=5, train_days=20, min_train_rows=0)
+        self.assertTrue(all(fold.validation_start - fold.train_start == 480 for fold in rolling))
+
+    def test_trading_pnl_follows_recommendation_rule(self):
+        actual = np.array([90.0, 120.0, 100.0, 80.0])
+        predicted = np.array([80.0, 120.0, 100.0, 101.0])
+        reference = np.full(4, 100.0)
+        # Купівля за прогнозом 80 (< 95): 100 - 90; продаж за прогнозом 120 (> 105): 120 - 100
+        self.assertEqual(trading_pnl(actual, predicted, reference, 0.95, 1.05), (30.0, 2))
+
+    def test_reference_uses_only_prices_before_each_hour(self):
+        prices = np.random.default_rng(2).normal(50, 10, 100)
+        reference = prior_mean_reference(prices)
+        self.assertTrue(np.isnan(reference[:REFERENCE_WINDOW]).all())
+        np.testing.assert_allclose(reference[REFERENCE_WINDOW:],
+                                   [prices[t - REFERENCE_WINDOW:t].mean() for t in range(REFERENCE_WINDOW, 100)])
+        # Збігається з ознакою моделі після розігріву
+        features = create_features(pd.DataFrame({
+            'timestamp': pd.date_range('2024-01-01', periods=100, freq='h', tz='UTC'),
+            'price': prices, 'demand': 1.0, 'wind_generation': 1.0, 'solar_generation': 1.0,
+        }))
+        np.testing.assert_allclose(reference[REFERENCE_WINDOW:],
+                                   features['price_rolling_mean_24h'].to_numpy()[REFERENCE_WINDOW:])
+
+        # Зміна фактичної ціни години не змінює її власну опорну ціну
+        spiked = prices.copy()
+        spiked[50] = 1000.0
+        self.assertEqual(prior_mean_reference(spiked)[50], reference[50])
+        self.assertNotEqual(prior_mean_reference(spiked)[51], reference[51])
+
+        # Без повного вікна правило не торгує
+        self.assertEqual(trading_pnl(prices[:24], prices[:24] * 0.5, reference[:24], 0.95, 1.05), (0.0, 0))
+
+    def test_run_backtest_reports_every_fold(self):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(len(self.timestamps), 3))
+        y = 2 * X[:, 0] + rng.normal(scale=0.1, size=len(X))
+        params = {'n_estimators': 30, 'max_depth': 3, 'early_stopping_rounds': 5, 'eval_metric': 'rmse'}
+        folds = make_folds(self.timestamps, 2, test_days=10, validation_days=5, min_train_rows=24 * 30)
+        seen = []
+
+        results = run_backtest(X, y, self.timestamps, np.zeros(len(X)), folds, params, (0.95, 1.05),
+                               workers=1, on_result=seen.append)
+        self.assertEqual([result['fold'] for result in results], [1, 2])
+        self.assertEqual(seen, results)
+        self.assertEqual(results[0]['test_rows'], 240)
+        self.assertEqual(results[0]['test_end'], datetime(2024, 4, 30, 23))
+        self.assertLess(results[0]['rmse'], 1.0)
+
+
+class HyperparameterSearchTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        hours = 24 * 140
+        timestamps = pd.date_range('2024-01-01', periods=hours, freq='h', tz='UTC')
+        demand = 2000 + 300 * np.sin(np.arange(hours) * 2 * np.pi / 24) + rng.normal(0, 20, hours)
+        self.frame = pd.DataFrame({
+            'timestamp': timestamps,
+            'price': demand / 40 + rng.normal(0, 1, hours),
+            'demand': demand,
+            'temperature': rng.normal(10, 3, hours),
+            'wind_generation': rng.uniform(0, 500, hours),
+            'solar_generation': rng.uniform(0, 200, hours),
+            'radiation_direct_horizontal': rng.uniform(0, 100, hours),
+            'radiation_diffuse_horizontal': rng.uniform(0, 50, hours),
+        })
+        params = mock.patch.dict(ml_utils.MODEL_PARAMS, {'n_estimators': 20, 'early_stopping_rounds': 5})
+        params.start()
+        self.addCleanup(params.stop)
+
+    def test_sampled_params_stay_in_search_space(self):
+        rng = np.random.default_rng(1)
+        for _ in range(50):
+            params = tuning.sample_params(rng)
+            self.assertIn(params['max_depth'], tuning.SEARCH_SPACE['max_depth'][1])
+            self.assertIn(params['max_bin'], tuning.SEARCH_SPACE['max_bin'][1])
+            self.assertTrue(0.01 <= params['learning_rate'] <= 0.3)
+            self.assertTrue(0.5 <= params['subsample'] <= 1.0)
+
+    def test_quantized_matrices_are_shared_across_trials(self):
+        features = create_features(self.frame)
+        timestamps = features['timestamp'].dt.tz_localize(None).to_numpy(dtype='datetime64[s]')
+        folds = make_folds(timestamps, 2, test_days=10, validation_days=5)
+        trials = [
+            (1, {'max_depth': 3, 'learning_rate': 0.1, 'subsample': 1.0, 'colsample_bytree': 1.0, 'max_bin': 64}),
+            (2, {'max_depth': 5, 'learning_rate': 0.2, 'subsample': 0.8, 'colsample_bytree': 0.8, 'max_bin': 64}),
+        ]
+        with mock.patch.object(tuning.xgb, 'QuantileDMatrix', wraps=tuning.xgb.QuantileDMatrix) as matrix:
+            results = tuning.run_search(features[FEATURES], features['price'], folds, trials,
+                                        ml_utils.MODEL_PARAMS, workers=1)
+        # Навчальна, валідаційна й тестова матриці будуються один раз на фолд, а не на кожну спробу
+        self.assertEqual(matrix.call_count, 3 * len(folds))
+        self.assertEqual([result['number'] for result in results], [1, 2])
+        self.assertEqual(len(results[0]['fold_rmse']), len(folds))
+
+    def test_command_persists_trials(self):
+        EnergyData.objects.bulk_create([EnergyData(**row) for row in self.frame.to_dict('records')])
+        call_command('tune_model', trials=2, folds=1, workers=1, seed=0, study='test', stdout=StringIO())
+        call_command('tune_model', trials=1, folds=1, workers=1, seed=1, study='test', stdout=StringIO())
+
+        trials = TuningTrial.objects.filter(study='test')
+        self.assertEqual(sorted(trials.values_list('number', flat=True)), [1, 2, 3])
+        self.assertEqual(set(trials.first().params), set(tuning.SEARCH_SPACE))
+        self.assertEqual(len(trials.first().fold_rmse), 1)
+
+
+class RecommendationStrategyTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frame = pd.DataFrame({
+            'timestamp': pd.date_range('2024-03-01', periods=72, freq='h', tz='UTC'),
+            'price': np.nan,
+            'predicted_price': rng.normal(50, 10, 72),
+            'price_rolling_mean_24h': rng.normal(50, 2, 72),
+        })
+        self.frame.loc[:5, 'price_rolling_mean_24h'] = np.nan
+
+    def test_threshold_matches_row_by_row_rule(self):
+        result = recommend(self.frame)
+        expected = []
+        for _, row in self.frame.dropna(subset=['price_rolling_mean_24h']).iterrows():
+            label = NEUTRAL
+            if row['predicted_price'] < row['price_rolling_mean_24h'] * 0.98:
+                label = BUY
+            elif row['predicted_price'] > row['price_rolling_mean_24h'] * 1.02:
+                label = SELL
+            expected.append(label)
+        self.assertEqual(result['recommendation'].tolist(), expected)
+        self.assertEqual(len(result), 66)
+        self.assertEqual(result['timestamp'].iloc[0], self.frame['timestamp'].iloc[6])
+
+    def test_top_n_marks_cheapest_and_most_expensive_hours_per_day(self):
+        result = recommend(self.frame, 'top_n', hours=3)
+        self.assertEqual(len(result), 72)
+        for _, day in result.groupby(result['timestamp'].dt.date):
+            ordered = day.sort_values('predicted_price')['recommendation'].tolist()
+            self.assertEqual(ordered[:3], [BUY] * 3)
+            self.assertEqual(ordered[-3:], [SELL] * 3)
+            self.assertEqual(ordered[3:-3], [NEUTRAL] * 18)
+
+    def test_spread_and_percentile_use_daily_statistics(self):
+        spread = recommend(self.frame, 'spread', spread=0.1)
+        daily_mean = spread.groupby(spread['timestamp'].dt.date)['predicted_price'].transform('mean')
+        np.testing.assert_array_equal(spread['signal'] == 1, spread['predicted_price'] < daily_mean * 0.9)
+        np.testing.assert_array_equal(spread['signal'] == -1, spread['predicted_price'] > daily_mean * 1.1)
+
+        percentile = recommend(self.frame, 'percentile', lower=10, upper=90)
+        # 24 години: ранги 0..2 нижче 10-го процентиля, 21..23 — вище 90-го
+        self.assertEqual((percentile['recommendation'] == BUY).sum(), 9)
+        self.assertEqual((percentile['recommendation'] == SELL).sum(), 9)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            recommend(self.frame, 'momentum')
+
+
+class ForecastRunPersistenceTests(TestCase):
+    def _recommendations(self, start, hours, price):
+        return pd.DataFrame({
+            'timestamp': pd.date_range(start, periods=hours, freq='h', tz='UTC'),
+            'predicted_price': np.full(hours, price),
+            'actual_price': np.nan,
+            'recommendation': 'Нейтрально',
+        })
+
+    def test_overlapping_runs_are_kept_and_current_run_switches(self):
+        first = save_forecast_run(self._recommendations('2024-05-01', 72, 40.0), mode='recursive', strategy='threshold')
+        version = get_data_version(PREDICTIONS_VERSION)
+        second = save_forecast_run(self._recommendations('2024-05-02', 24, 50.0))
+
+        self.assertEqual(get_data_version(PREDICTIONS_VERSION), version + 1)
+        self.assertEqual(second.rows, 24)
+        # Обидва запуски зберігають усі свої години, зокрема спільні
+        self.assertEqual(PricePrediction.objects.filter(run=first).count(), 72)
+        self.assertEqual(PricePrediction.objects.filter(run=second).count(), 24)
+        overlap = datetime(2024, 5, 2, 12, tzinfo=timezone.utc)
+        self.assertEqual(
+            dict(PricePrediction.objects.filter(timestamp=overlap).values_list('run', 'predicted_price')),
+            {first.pk: 40.0, second.pk: 50.0},
+        )
+        self.assertIsNone(PricePrediction.objects.first().actual_price)
+
+        # Дашборд і планування бачать лише поточний запуск
+        self.assertEqual(list(ForecastRun.objects.filter(is_current=True)), [second])
+        self.assertEqual(set(run_predictions().values_list('predicted_price', flat=True)), {50.0})
+        self.assertEqual(run_predictions(run_id=first.pk).count(), 72)
+        timestamps, prices = prediction_prices()
+        self.assertEqual((timestamps[0], len(prices), prices[0]), (second.horizon_start, 24, 50.0))
+
+        set_current_run(first)
+        self.assertEqual(get_data_version(PREDICTIONS_VERSION), version + 2)
+        self.assertEqual(list(ForecastRun.objects.filter(is_current=True)), [first])
+        self.assertEqual(run_predictions().count(), 72)
+
+    def test_failed_write_leaves_previous_predictions(self):
+        save_forecast_run(self._recommendations('2024-05-01', 48, 40.0))
+        with mock.patch('core.predictions.bump_data_version', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                save_forecast_run(self._recommendations('2024-05-01', 24, 50.0))
+        self.assertEqual(ForecastRun.objects.count(), 1)
+        self.assertTrue(ForecastRun.objects.get().is_current)
+        self.assertEqual(set(PricePrediction.objects.values_list('predicted_price', flat=True)), {40.0})
+        self.assertEqual(PricePrediction.objects.count(), 48)
+
+    def test_rows_are_written_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            save_forecast_run(self._recommendations('2024-05-01', 2000, 40.0), batch_size=500)
+        self.assertEqual(PricePrediction.objects.count(), 2000)
+        # Пакетні INSERT (SQLite додатково обмежує кількість параметрів запиту), а не запит на рядок
+        self.assertLess(len(queries), 30)
+
+
+class MonteCarloSimulationTests(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        hours = 24 * 40
+        timestamps = pd.date_range('2024-03-01', periods=hours, freq='h', tz='UTC')
+        self.frame = pd.DataFrame({
+            'timestamp': timestamps,
+            'price': 40.0 + 10 * np.sin(np.arange(hours) * 2 * np.pi / 24) + rng.normal(0, 3, hours),
+            'demand': 2000.0 + rng.normal(0, 50, hours),
+            'temperature': 12.0,
+            'wind_generation': rng.uniform(0, 800, hours),
+            'solar_generation': rng.uniform(0, 200, hours),
+            'radiation_direct_horizontal': 20.0,
+            'radiation_diffuse_horizontal': 10.0,
+        })
+        self.engine = FeatureEngine.from_history(self.frame.tail(24).to_dict('records'), features=[])
+
+    def test_residual_pool_samples_same_hour(self):
+        pool = ResidualPool(np.tile(np.arange(24), 3), np.tile(np.arange(24) * 10.0, 3))
+        samples = pool.sample(np.random.default_rng(0), [5, 23, 0], 100)
+        self.assertEqual(samples.shape, (100, 3))
+        np.testing.assert_array_equal(samples, np.tile([50.0, 230.0, 0.0], (100, 1)))
+        with self.assertRaises(ValueError):
+            ResidualPool(np.arange(12), np.ones(12))
+
+    def test_quantiles_are_ordered_and_reproducible(self):
+        model = _ColumnModel('price_lag1')
+        pools = residual_pools(model, FEATURES, create_features(self.frame))
+        result = simulate_prices(model, FEATURES, self.engine, 48, pools, simulations=700, seed=1, chunk_size=300)
+        self.assertEqual(result.simulations, 700)
+        self.assertEqual(len(result.timestamps), 48)
+        self.assertEqual(result.timestamps[0], self.frame['timestamp'].iloc[-1] + pd.Timedelta(hours=1))
+        p10, p50, p90 = (result.quantiles[q] for q in (10, 50, 90))
+        self.assertTrue((p10 <= p50).all() and (p50 <= p90).all())
+        # Шум накопичується в лагах ціни: смуга розширюється з горизонтом
+        self.assertGreater((p90 - p10)[-1], (p90 - p10)[0])
+
+        again = simulate_prices(model, FEATURES, self.engine, 48, pools, simulations=700, seed=1, chunk_size=300)
+        np.testing.assert_allclose(again.quantiles[50], p50)
+        self.assertEqual(list(result.to_frame().columns), ['timestamp', 'price_p10', 'price_p50', 'price_p90'])
+
+    def test_bands_are_saved_and_charted_after_actual_data(self):
+        EnergyData.objects.bulk_create([
+            EnergyData(**row) for row in self.frame.tail(48).to_dict('records')
+        ])
+        start = self.frame['timestamp'].iloc[-1] + pd.Timedelta(hours=1)
+        recommendations = pd.DataFrame({
+            'timestamp': pd.date_range(start, periods=24, freq='h'),
+            'predicted_price': 45.0,
+            'actual_price': np.nan,
+            'recommendation': 'Нейтрально',
+            'price_p10': 30.0,
+            'price_p50': 44.0,
+            'price_p90': 60.0,
+        })
+        save_forecast_run(recommendations)
+        self.assertEqual(set(PricePrediction.objects.values_list('price_p10', 'price_p90')), {(30.0, 60.0)})
+
+        response = self.client.get(reverse('energy_dashboard_chart_data'), {'max_points': 0})
+        charts = decode_chart_payload(response.content)
+        timestamps, series = charts['price']
+        self.assertEqual(len(timestamps), 72)
+        self.assertEqual(timestamps[-1], start + pd.Timedelta(hours=23))
+        self.assertEqual(series['prices_p90'][-24:].tolist(), [60.0] * 24)
+        self.assertTrue(np.isnan(series['prices_p90'][:48]).all())
+        # Інші графіки лишаються на шкалі фактичних даних
+        self.assertEqual(len(charts['demand_supply'][0]), 48)
+
+
+class ScheduleOptimizationTests(SimpleTestCase):
+    def test_buys_cheap_and_sells_expensive_hours(self):
+        plan = optimize_schedule([10.0, 100.0, 50.0], [{'capacity': 1, 'charge_rate': 1, 'efficiency': 1}])
+        np.testing.assert_allclose(plan.buy[0], [1, 0, 0])
+        np.testing.assert_allclose(plan.sell[0], [0, 1, 0])
+        np.testing.assert_allclose(plan.level[0], [1, 0, 0])
+        self.assertAlmostEqual(plan.cost[0], -90.0)
+
+    def test_consumption_without_storage_costs_baseline(self):
+        prices = np.linspace(20, 60, 48)
+        plan = optimize_schedule(prices, [{'daily_volume': 24}])
+        np.testing.assert_allclose(plan.buy[0], np.ones(48))
+        self.assertAlmostEqual(plan.cost[0], prices.sum())
+        self.assertAlmostEqual(plan.baseline_cost[0], prices.sum())
+
+    def test_matches_linear_program(self):
+        from scipy.optimize import linprog
+
+        rng = np.random.default_rng(0)
+        hours = 72
+        prices = 50 + 15 * np.sin(np.arange(hours) / 24 * 2 * np.pi) + rng.normal(0, 3, hours)
+        asset = {'capacity': 10, 'charge_rate': 2.5, 'efficiency': 0.81, 'initial_level': 5, 'daily_volume': 24}
+        plan = optimize_schedule(prices, [asset], levels=201)
+
+        # Змінні: заряд з мережі, віддача з накопичувача, рівні після кожної години
+        eta = 0.9
+        A = np.zeros((hours, 3 * hours))
+        b = np.zeros(hours)
+        for t in range(hours):
+            A[t, [t, hours + t, 2 * hours + t]] = [-eta, 1 / eta, 1]
+            if t:
+                A[t, 2 * hours + t - 1] = -1
+        b[0] = 5
+        bounds = [(0, 2.5)] * 2 * hours + [(0, 10)] * (hours - 1) + [(5, 10)]
+        lp = linprog(np.concatenate([prices, -prices, np.zeros(hours)]), A_eq=A, b_eq=b, bounds=bounds)
+        optimum = lp.fun + prices.sum()
+        self.assertGreaterEqual(plan.cost[0], optimum - 1e-6)
+        self.assertLess(plan.cost[0], optimum + abs(optimum) * 0.005)
+        self.assertTrue((plan.level[0] >= -1e-9).all() and (plan.level[0] <= 10 + 1e-9).all())
+
+    def test_batched_assets_match_individual_plans(self):
+        rng = np.random.default_rng(1)
+        prices = rng.uniform(20, 80, 48)
+        assets = [
+            {'capacity': 4, 'charge_rate': 1, 'efficiency': 0.9},
+            {'capacity': 20, 'charge_rate': 5, 'discharge_rate': 2, 'daily_volume': 48, 'initial_level': 10},
+            {'daily_volume': 12},
+        ]
+        batched = optimize_schedule(prices, assets)
+        for n, asset in enumerate(assets):
+            single = optimize_schedule(prices, [asset])
+            self.assertAlmostEqual(batched.cost[n], single.cost[0])
+
+    def test_infeasible_and_invalid_assets(self):
+        plan = optimize_schedule([10.0, 20.0], [{'capacity': 5, 'charge_rate': 1, 'final_level': 5}])
+        self.assertFalse(plan.feasible[0])
+        with self.assertRaises(ValueError):
+            optimize_schedule([10.0], [{'capacity': 1, 'initial_level': 2}])
+        with self.assertRaises(ValueError):
+            optimize_schedule([10.0], [{'volume': 1}])
+
+    def test_mixed_rate_batch_sizes_grid_per_asset(self):
+        rng = np.random.default_rng(2)
+        prices = rng.uniform(20, 80, 48)
+        slow = {'capacity': 10, 'charge_rate': 0.1, 'efficiency': 1, 'initial_level': 5}
+        assets = [slow] + [{'capacity': 4, 'charge_rate': 2, 'efficiency': 0.9, 'daily_volume': 24}] * 50
+        plan = optimize_schedule(prices, assets)
+        # Повільний актив має власну сітку (101 рівень), тож може заряджатися щогодини
+        self.assertTrue(plan.feasible[0])
+        self.assertGreater(plan.buy[0].sum(), 0)
+        np.testing.assert_allclose(np.abs(np.diff(np.concatenate([[5], plan.level[0]]))).max(), 0.1)
+        self.assertAlmostEqual(plan.cost[0], optimize_schedule(prices, [slow]).cost[0])
+        self.assertAlmostEqual(plan.cost[1], optimize_schedule(prices, assets[1:2]).cost[0])
+
+        # Актив, якому потрібно більше MAX_LEVELS рівнів, відхиляється, а не обрізається
+        with self.assertRaisesRegex(ValueError, 'Asset 0 needs'):
+            optimize_schedule(prices, [{'capacity': 100, 'charge_rate': 0.1}] + assets[1:])
+        with self.assertRaisesRegex(ValueError, 'at most'):
+            optimize_schedule(prices, [{'capacity': 20, 'charge_rate': 0.1}] * 100)
+
+
+class BiddingZoneTests(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        settings_override = override_settings(MODEL_REGISTRY_DIR=tmp_dir.name, MODEL_RELOAD_CHECK_SECONDS=0,
+                                              ENERGY_ARCHIVE_DIR=f'{tmp_dir.name}/archive')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        model_registry.clear_model_cache()
+        self.addCleanup(model_registry.clear_model_cache)
+        cache.clear()
+
+    def _write_csv(self, hours=48):
+        frame = pd.DataFrame({
+            'utc_timestamp': pd.date_range('2024-01-01', periods=hours, freq='h', tz='UTC').strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'temperature': 3.0,
+            'radiation_direct_horizontal': 0.0,
+            'radiation_diffuse_horizontal': 0.0,
+        })
+        for zone, price in (('DK_1', 40.0), ('DK_2', 60.0)):
+            frame[f'{zone}_price_day_ahead'] = price
+            frame[f'{zone}_load_actual_entsoe_transparency'] = 1000.0
+            frame[f'{zone}_wind_generation_actual'] = 500.0
+            frame[f'{zone}_solar_generation_actual'] = 0.0
+        frame['DK_2_temperature'] = 5.0  # Погода зони має пріоритет над спільною
+        path = f'{self.tmp_dir}/zones.csv'
+        frame.to_csv(path, index=False)
+        return path
+
+    def test_wide_csv_is_imported_per_zone(self):
+        path = self._write_csv()
+        self.assertEqual(detect_zones(pd.read_csv(path, nrows=0).columns.tolist()), ['DK_1', 'DK_2'])
+
+        stats = import_csv(path, chunksize=20)
+        self.assertEqual(stats['rows_written'], 96)
+        self.assertEqual(stats['zones'], ['DK_1', 'DK_2'])
+        self.assertEqual(set(EnergyData.objects.filter(zone='DK_2').values_list('price', 'temperature')), {(60.0, 5.0)})
+        self.assertEqual(set(EnergyData.objects.filter(zone='DK_1').values_list('price', 'temperature')), {(40.0, 3.0)})
+        self.assertEqual(set(EnergyRollup.objects.values_list('zone', flat=True)), {'DK_1', 'DK_2'})
+
+        # Повторний імпорт однієї зони оновлює лише її рядки
+        import_csv(path, zones=['DK_2'])
+        self.assertEqual(EnergyData.objects.count(), 96)
+
+    def test_incremental_import_of_a_new_zone_reads_its_history(self):
+        path = self._write_csv(hours=24)
+        self.assertEqual(import_csv_incremental(path, 'zones', zones=['DK_1'])['mode'], 'full')
+        self.assertEqual(IngestCheckpoint.objects.get(source='zones').zones, ['DK_1'])
+
+        # Нова зона ще не має історії: спільний high-water mark DK_1 не повинен відкинути її перші 24 години
+        self._write_csv(hours=36)
+        stats = import_csv_incremental(path, 'zones', zones=['DK_1', 'DK_2'])
+        self.assertEqual((stats['mode'], stats['rows_written']), ('full', 72))
+        self.assertEqual(EnergyData.objects.filter(zone='DK_2').count(), 36)
+        self.assertEqual(IngestCheckpoint.objects.get(source='zones').zones, ['DK_1', 'DK_2'])
+
+        self._write_csv(hours=48)
+        stats = import_csv_incremental(path, 'zones', zones=['DK_2', 'DK_1'])
+        self.assertEqual((stats['mode'], stats['rows_written']), ('seek', 24))
+        self.assertEqual(EnergyData.objects.count(), 96)
+
+    def test_truncate_is_limited_to_requested_zones(self):
+        path = self._write_csv()
+        call_command('fetch_energy_data', path, incremental=True, source='zones', stdout=StringIO())
+        IngestCheckpoint.objects.create(source='other', zones=['DK_1'])
+        dk1_state = FeatureState.objects.get(key='DK_1').pk
+        dk1_rows = set(EnergyData.objects.filter(zone='DK_1').values_list('pk', flat=True))
+
+        output = StringIO()
+        call_command('fetch_energy_data', path, truncate=True, zones='DK_2', stdout=output)
+        self.assertIn('Existing EnergyData records of zone(s) DK_2 deleted.', output.getvalue())
+        # Дані, агрегати та стан ознак DK_1 залишаються; недійсна лише позначка, що покривала DK_2
+        self.assertEqual(set(EnergyData.objects.filter(zone='DK_1').values_list('pk', flat=True)), dk1_rows)
+        self.assertEqual(EnergyData.objects.filter(zone='DK_2').count(), 48)
+        self.assertTrue(EnergyRollup.objects.filter(zone='DK_1').exists())
+        self.assertEqual(FeatureState.objects.get(key='DK_1').pk, dk1_state)
+        self.assertEqual(set(IngestCheckpoint.objects.values_list('source', flat=True)), {'other', path})
+
+    def test_each_zone_has_its_own_active_model(self):
+        rng = np.random.default_rng(0)
+        X = pd.DataFrame(rng.normal(size=(100, 2)), columns=['a', 'b'])
+        model = XGBRegressor(n_estimators=5).fit(X, X['a'])
+        first = model_registry.register_model(model, ['a', 'b'])
+        second = model_registry.register_model(model, ['a', 'b'], zone='DK_2')
+        third = model_registry.register_model(model, ['a', 'b'], zone='DK_2')
+
+        self.assertEqual(first.zone, DEFAULT_ZONE)
+        self.assertEqual(model_registry.get_active_model().version, first.pk)
+        self.assertEqual(model_registry.get_active_model('DK_2').version, third.pk)
+        second.refresh_from_db()
+        self.assertFalse(second.is_active)
+        with self.assertRaises(FileNotFoundError):
+            model_registry.get_active_model('SE_3')
+
+    def test_forecast_runs_and_dashboard_are_per_zone(self):
+        import_csv(self._write_csv())
+        timestamps = pd.date_range('2024-01-03', periods=24, freq='h', tz='UTC')
+        for zone, price in (('DK_1', 41.0), ('DK_2', 61.0)):
+            save_forecast_run(pd.DataFrame({
+                'timestamp': timestamps, 'predicted_price': price, 'actual_price': np.nan, 'recommendation': 'Нейтрально',
+            }), zone=zone)
+        # Новий запуск однієї зони не видаляє прогнози іншої
+        save_forecast_run(pd.DataFrame({
+            'timestamp': timestamps[:12], 'predicted_price': 62.0, 'actual_price': np.nan, 'recommendation': 'Нейтрально',
+        }), zone='DK_2')
+        self.assertEqual(run_predictions('DK_1').count(), 24)
+        self.assertEqual(run_predictions('DK_2').count(), 12)
+        self.assertEqual(PricePrediction.objects.filter(zone='DK_2').count(), 36)
+
+        response = self.client.get(reverse('energy_dashboard'), {'zone': 'DK_2'})
+        self.assertEqual(response.context['zone'], 'DK_2')
+        self.assertEqual(response.context['zones'], ['DK_1', 'DK_2'])
+        chart_data = self.client.get(f"{reverse('energy_dashboard_chart_data')}?{response.context['chart_data_query']}")
+        _, series = decode_chart_payload(chart_data.content)['price']
+        self.assertEqual(set(series['prices_predicted'][~np.isnan(series['prices_predicted'])]), {62.0})
+
+        response = self.client.get(reverse('energy_list'), {'zone': 'DK_2'})
+        self.assertEqual({row.zone for row in response.context['page_obj']}, {'DK_2'})
+
+
+class ColumnarArchiveTests(TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        settings_override = override_settings(ENERGY_ARCHIVE_DIR=tmp_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        frame = pd.DataFrame({
+            'zone': DEFAULT_ZONE,
+            'timestamp': pd.date_range('2023-12-31', periods=72, freq='h', tz='UTC'),
+            'price': np.arange(72, dtype=float),
+            'demand': 1000.0,
+            'supply': np.nan,
+            'temperature': 2.0,
+            'wind_generation': 300.0,
+            'solar_generation': 0.0,
+            'radiation_direct_horizontal': 0.0,
+            'radiation_diffuse_horizontal': 0.0,
+        })
+        upsert_frame(frame)
+        self.frame = frame
+
+    def test_archive_matches_database(self):
+        from_database = load_energy_frame([DEFAULT_ZONE])
+        self.assertEqual(from_database.attrs['source'], 'database')
+
+        self.assertEqual(sync_archive(), 2)  # Партиції 2023 та 2024 років
+        self.assertTrue(partition_path(DEFAULT_ZONE, 2024).exists())
+        from_archive = load_energy_frame([DEFAULT_ZONE])
+        self.assertEqual(from_archive.attrs['source'], 'archive')
+        pd.testing.assert_frame_equal(from_archive, from_database, check_dtype=False)
+        self.assertTrue(from_archive['supply'].isna().all())
+
+    def test_projection_and_time_range(self):
+        sync_archive()
+        frame = load_energy_frame([DEFAULT_ZONE], ['price'], start=datetime(2024, 1, 1, 12, tzinfo=timezone.utc),
+                                  end=datetime(2024, 1, 1, 14, tzinfo=timezone.utc))
+        self.assertEqual(list(frame.columns), ['zone', 'timestamp', 'price'])
+        self.assertEqual(frame['price'].tolist(), [36.0, 37.0, 38.0])
+
+    def test_writes_make_archive_stale_until_synced(self):
+        sync_archive()
+        version = get_data_version()
+        upsert_frame(self.frame.tail(1).assign(price=-5.0))
+        self.assertEqual(load_energy_frame([DEFAULT_ZONE]).attrs['source'], 'database')
+
+        # Архів був актуальним до запису, тож переписується лише зачеплена партиція
+        with mock.patch('core.archive.export_partition', wraps=export_partition) as export:
+            sync_archive({(DEFAULT_ZONE, 2024)}, since=version)
+        export.assert_called_once_with(DEFAULT_ZONE, 2024)
+        frame = load_energy_frame([DEFAULT_ZONE])
+        self.assertEqual(frame.attrs['source'], 'archive')
+        self.assertEqual(frame['price'].iloc[-1], -5.0)
+
+
+class ArchiveRebuildTests(TransactionTestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        settings_override = override_settings(ENERGY_ARCHIVE_DIR=tmp_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        EnergyData.objects.bulk_create([
+            EnergyData(timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(hours=i), price=50.0 + i,
+                       demand=1000.0, temperature=2.0, wind_generation=300.0, solar_generation=0.0,
+                       radiation_direct_horizontal=0.0, radiation_diffuse_horizontal=0.0)
+            for i in range(48)
+        ])
+        bump_data_version()
+        sync_archive()
+
+    def test_full_rebuild_marks_archive_stale_before_deleting_files(self):
+        self.assertTrue(archive_is_current([DEFAULT_ZONE]))
+        seen = []
+        delete_tree = shutil.rmtree
+
+        def rmtree(path, ignore_errors=False):
+            # Скидання версії вже зафіксоване: читачі з інших з'єднань бачать архів неактуальним
+            seen.append((connection.in_atomic_block, get_data_version(ARCHIVE_VERSION),
+                         archive_is_current([DEFAULT_ZONE]), partition_path(DEFAULT_ZONE, 2024).exists()))
+            delete_tree(path, ignore_errors=ignore_errors)
+
+        with mock.patch('core.archive.shutil.rmtree', side_effect=rmtree):
+            self.assertEqual(sync_archive(), 1)
+        self.assertEqual(seen, [(False, 0, False, True)])
+        self.assertEqual(get_data_version(ARCHIVE_VERSION), get_data_version())
+        self.assertEqual(load_energy_frame([DEFAULT_ZONE]).attrs['source'], 'archive')
+
+
+class ReadFrameTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        EnergyData.objects.bulk_create([
+            EnergyData(zone='DK_2' if i % 2 else DEFAULT_ZONE, timestamp=start + timedelta(hours=i), price=float(i),
+                       demand=1000.0, supply=None if i % 3 else 5.0, temperature=1.5)
+            for i in range(50)
+        ])
+
+    def test_matches_values_path(self):
+        queryset = EnergyData.objects.order_by('zone', '-timestamp')
+        fields = ['price', 'zone', 'timestamp', 'supply']
+        # Пакети менші за вибірку: масиви кілька разів розширюються
+        frame = read_frame(queryset, fields, fetch_size=7)
+
+        expected = pd.DataFrame(list(queryset.values(*fields)), columns=fields)
+        expected['timestamp'] = pd.to_datetime(expected['timestamp'], utc=True)
+        expected['supply'] = expected['supply'].astype(float)
+        pd.testing.assert_frame_equal(frame, expected, check_dtype=False)
+        self.assertEqual(str(frame['timestamp'].dtype), 'datetime64[us, UTC]')
+        self.assertEqual(frame['supply'].dtype, np.float64)
+        self.assertEqual(int(frame['supply'].isna().sum()), 33)
+
+    def test_numeric_columns_share_one_block(self):
+        frame = read_frame(EnergyData.objects.filter(zone=DEFAULT_ZONE).order_by('timestamp'),
+                           ['timestamp', 'price', 'demand'])
+        self.assertEqual(len(frame), 25)
+        # Стовпці — зрізи одного масиву, заповненого з курсора
+        self.assertTrue(np.may_share_memory(frame['price'].to_numpy(), frame['demand'].to_numpy()))
+
+    def test_empty_results(self):
+        for queryset in (EnergyData.objects.filter(zone='SE_3'), EnergyData.objects.filter(zone__in=[])):
+            frame = read_frame(queryset, ['timestamp', 'price', 'zone'])
+            self.assertTrue(frame.empty)
+            self.assertEqual(list(frame.columns), ['timestamp', 'price', 'zone'])
+
+
+class ConcurrentReadTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        EnergyData.objects.bulk_create([
+            EnergyData(timestamp=start + timedelta(hours=i), price=50.0 + i % 24, demand=1000.0)
+            for i in range(24 * 3)
+        ])
+        bump_data_version()
+
+    def _reader(self, value, threads):
+        def read():
+            threads.append(threading.get_ident())
+            return value, EnergyData.objects.count()
+        return read
+
+    def test_reads_run_in_pool_threads_outside_transactions(self):
+        threads = []
+        results = async_to_sync(read_concurrently)(self._reader('a', threads), self._reader('b', threads))
+        self.assertEqual(results, [('a', 72), ('b', 72)])
+        self.assertNotIn(threading.get_ident(), threads)
+
+    def test_reads_use_request_connection_inside_transaction(self):
+        threads = []
+        with transaction.atomic():
+            EnergyData.objects.filter(price__gt=60).delete()
+            # Незафіксоване видалення видно лише на з'єднанні цієї транзакції
+            self.assertEqual(async_to_sync(read_async)(self._reader('a', threads)), ('a', 33))
+        self.assertEqual(threads, [threading.get_ident()])
+
+    def test_async_dashboard_and_api(self):
+        response = async_to_sync(self.async_client.get)(
+            reverse('energy_dashboard'), {'start_date': '2024-01-01', 'end_date': '2024-01-03'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['data_period_info'], '2024-01-01 - 2024-01-03')
+        response = async_to_sync(self.async_client.get)(
+            reverse('energy_dashboard_chart_data'), {'start_date': '2024-01-01', 'end_date': '2024-01-03'})
+        _, series = decode_chart_payload(response.content)['price']
+        self.assertEqual(len(series['prices_actual']), 72)
+
+        data = async_to_sync(self.async_client.get)(reverse('energy_data_api'), {'limit': 50}).json()
+        self.assertEqual(data['count'], 50)
+        self.assertIsNotNone(data['next_cursor'])
+
+
+class DashboardRegressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Фактичні дані 1-2 січня з пропуском 10:00-14:00 першого дня
+        hours = [hour for hour in range(48) if not 10 <= hour <= 14]
+        EnergyData.objects.bulk_create([
+            EnergyData(timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(hours=hour), price=40.0 + hour,
+                       demand=1000.0, temperature=2.0, wind_generation=300.0, solar_generation=0.0,
+                       radiation_direct_horizontal=0.0, radiation_diffuse_horizontal=0.0)
+            for hour in hours
+        ])
+        bump_data_version()
+        # Прогноз з 2 січня 22:00 перекриває дві останні фактичні години; частина рекомендацій відсутня
+        save_forecast_run(pd.DataFrame({
+            'timestamp': pd.date_range('2024-01-02 22:00', periods=5, freq='h', tz='UTC'),
+            'predicted_price': [61.0, 62.0, 63.456, 64.0, 65.0],
+            'actual_price': [68.0, 69.0, np.nan, np.nan, np.nan],
+            'recommendation': [BUY, SELL, BUY, None, NEUTRAL],
+        }))
+        self.params = {'start_date': '2024-01-01', 'end_date': '2024-01-03', 'max_points': 0}
+
+    def test_recommendations_cover_hours_after_last_actual(self):
+        response = self.client.get(reverse('energy_dashboard'), self.params)
+        self.assertEqual(response.context['recommendations'], [{'day': '2024-01-03', 'recs': [
+            f'00:00: {BUY} (Прогноз: 63.46 EUR/MWh)',
+            '01:00: None (Прогноз: 64.00 EUR/MWh)',
+            f'02:00: {NEUTRAL} (Прогноз: 65.00 EUR/MWh)',
+        ]}])
+        self.assertEqual(response.context['resolution_label'], 'погодинна')
+        self.assertEqual(PricePrediction.objects.filter(recommendation__isnull=True).count(), 1)
+
+    def test_price_chart_merges_predictions_with_actual_gaps(self):
+        response = self.client.get(reverse('energy_dashboard_chart_data'), self.params)
+        charts = decode_chart_payload(response.content)
+        timestamps, series = charts['price']
+        # Пропущені години не з'являються на шкалі; години лише з прогнозом додаються після фактичних
+        expected = [datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(hours=hour)
+                    for hour in range(51) if not 10 <= hour <= 14]
+        self.assertEqual(list(timestamps), expected)
+        self.assertEqual(len(charts['weather'][0]), 43)
+
+        actual, predicted = series['prices_actual'], series['prices_predicted']
+        self.assertEqual(np.isnan(actual).tolist(), [False] * 43 + [True] * 3)
+        self.assertEqual(np.isnan(predicted).tolist(), [True] * 41 + [False] * 5)
+        np.testing.assert_allclose(predicted[-5:], [61.0, 62.0, 63.456, 64.0, 65.0], rtol=1e-6)
+        self.assertEqual(actual[-4], 87.0)  # Остання фактична година: 2 січня 23:00
+        self.assertTrue(np.isnan(series['prices_p50']).all())
+
+    def test_empty_range(self):
+        params = {'start_date': '2023-06-01', 'end_date': '2023-06-03'}
+        response = self.client.get(reverse('energy_dashboard'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['recommendations'], [])
+        self.assertEqual(response.context['data_period_info'], '2023-06-01 - 2023-06-03')
+
+        charts = decode_chart_payload(self.client.get(reverse('energy_dashboard_chart_data'), params).content)
+        self.assertEqual(set(charts), {'price', 'demand_supply', 'generation', 'weather'})
+        for timestamps, series in charts.values():
+            self.assertEqual(len(timestamps), 0)
+            self.assertTrue(all(len(values) == 0 for values in series.values()))
+
+
+class ChartPayloadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        EnergyData.objects.bulk_create([
+            EnergyData(timestamp=start + timedelta(hours=i), price=50.0 + i % 24, demand=1000.0)
+            for i in range(24 * 10)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_round_trip_with_gaps_and_missing_values(self):
+        timestamps = pd.DatetimeIndex(['2024-01-01 00:00', '2024-01-01 01:00', '2024-01-01 05:00'], tz='UTC')
+        payload = encode_chart_payload({
+            'price': (timestamps, {'actual': [1.5, np.nan, 3.25], 'predicted': [np.nan, 2.0, 4.0]}),
+            'regular': (timestamps[:2], {'demand': [10.0, 20.0]}),
+            'empty': (timestamps[:0], {'demand': []}),
+        }, 3600)
+        charts = decode_chart_payload(payload)
+
+        decoded_timestamps, series = charts['price']
+        self.assertTrue(decoded_timestamps.equals(timestamps))
+        np.testing.assert_array_equal(series['actual'], np.array([1.5, np.nan, 3.25], dtype=np.float32))
+        np.testing.assert_array_equal(series['predicted'], np.array([np.nan, 2.0, 4.0], dtype=np.float32))
+        self.assertTrue(charts['regular'][0].equals(timestamps[:2]))
+        self.assertEqual(len(charts['empty'][1]['demand']), 0)
+        # Заголовок і кожен масив вирівняні на 4 байти: 5 рядів і зсуви нерегулярного графіка
+        self.assertEqual(len(payload) % 4, 0)
+
+        with self.assertRaises(ValueError):
+            encode_chart_payload({'price': (timestamps + pd.Timedelta(minutes=30) * np.arange(3), {})}, 3600)
+
+    def test_float32_payload_is_smaller_than_inline_json(self):
+        params = {'start_date': '2024-01-01', 'end_date': '2024-01-10', 'max_points': 0}
+        dashboard = self.client.get(reverse('energy_dashboard'), params)
+        self.assertNotIn(b'JSON.parse(', dashboard.content)
+        self.assertIn(reverse('energy_dashboard_chart_data').encode(), dashboard.content)
+
+        response = self.client.get(reverse('energy_dashboard_chart_data'), params)
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        charts = decode_chart_payload(response.content)
+        self.assertEqual(len(charts['weather'][0]), 240)
+        # 12 рядів по 240 точок float32 і компактний заголовок замість міток для кожної точки
+        self.assertLess(len(response.content), 12 * 240 * 4 + 1024)
+
+    def test_compression_follows_accept_encoding(self):
+        url = reverse('energy_dashboard_chart_data')
+        params = {'start_date': '2024-01-01', 'end_date': '2024-01-10'}
+        plain = self.client.get(url, params).content
+
+        response = self.client.get(url, params, headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain)
+        self.assertLess(len(response.content), len(plain))
+
+        with mock.patch('core.chart_payload.brotli', None):
+            self.assertEqual(accepted_encoding('br, gzip'), 'gzip')
+        self.assertIsNone(accepted_encoding('identity'))
+        self.assertIsNone(accepted_encoding(None))
+
+    def test_accept_encoding_q_values(self):
+        with mock.patch('core.chart_payload.brotli', mock.Mock()):  # brotli — необов'язкова залежність
+            self.assertEqual(accepted_encoding('gzip, br'), 'br')
+            self.assertEqual(accepted_encoding('br;q=0, gzip'), 'gzip')
+            self.assertEqual(accepted_encoding('br;q=0.5, gzip;q=0.8'), 'gzip')
+            self.assertEqual(accepted_encoding('BR; Q=1.0, gzip;q=0.8'), 'br')
+            self.assertEqual(accepted_encoding('*'), 'br')
+            self.assertEqual(accepted_encoding('br;q=0, *;q=0.1'), 'gzip')
+            self.assertIsNone(accepted_encoding('br;q=0, gzip;q=0'))
+            self.assertIsNone(accepted_encoding('gzip;q=0, *;q=0'))
+            self.assertIsNone(accepted_encoding('gzip;q=high'))
+
+        response = self.client.get(reverse('energy_dashboard_chart_data'), {'start_date': '2024-01-01'},
+                                   headers={'Accept-Encoding': 'br;q=0, gzip;q=0'})
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_misaligned_timestamps_return_400(self):
+        EnergyData.objects.create(timestamp=datetime(2024, 1, 3, 12, 30, tzinfo=timezone.utc), price=50.0,
+                                  demand=1000.0)
+        params = {'start_date': '2024-01-01', 'end_date': '2024-01-10'}
+        response = self.client.get(reverse('energy_dashboard_chart_data'), params)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(b'not aligned', response.content)
+
+
+class CsvImportTestCase(TestCase):
+    HEADER = ('utc_timestamp,DK_1_price_day_ahead,DK_1_load_actual_entsoe_transparency,DK_1_wind_generation_actual,'
+              'DK_1_solar_generation_actual,temperature,radiation_direct_horizontal,radiation_diffuse_horizontal\n')
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        settings_override = override_settings(ENERGY_ARCHIVE_DIR=f'{tmp_dir.name}/archive')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.path = f'{tmp_dir.name}/opsd.csv'
+
+    def _lines(self, hours, price=40.0):
+        # Рядок CSV на кожну годину 2024 року з номером hours (ціна = price + номер години)
+        return ''.join(
+            f"{(datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(hours=hour)):%Y-%m-%dT%H:%M:%SZ},"
+            f"{price + hour},1000.0,500.0,0.0,3.0,0.0,0.0\n"
+            for hour in hours
+        )
+
+    def _write(self, text, mode='w'):
+        with open(self.path, mode) as f:
+            f.write(text)
+
+    def _prices(self):
+        return list(EnergyData.objects.order_by('timestamp').values_list('price', flat=True))
+
+
+class ChunkedImportTests(CsvImportTestCase):
+    def _chunk(self, text):
+        return pd.read_csv(StringIO(self.HEADER + text))
+
+    def test_prepare_chunk_drops_incomplete_rows_and_keeps_last_duplicate(self):
+        lines = self._lines(range(6)).splitlines(keepends=True)
+        lines[1] = lines[1].replace(',41.0,', ',,')  # Без ціни
+        lines[2] = lines[2].replace(',3.0,', ',,')  # Без температури
+        lines[3] = 'not a date' + lines[3][lines[3].index(','):]
+        lines.append(self._lines([4], price=100.0))  # Повтор години 4 у тому ж шматку
+        frame, dropped = prepare_chunk(self._chunk(''.join(lines)))
+
+        self.assertEqual(dropped, 4)
+        self.assertEqual(list(frame.columns), ['zone', 'timestamp', *ingest.VALUE_FIELDS])
+        self.assertEqual(frame['timestamp'].dt.hour.tolist(), [0, 5, 4])
+        self.assertEqual(frame['price'].tolist(), [40.0, 45.0, 104.0])
+        self.assertTrue(frame['supply'].isna().all())  # supply не обов'язкове поле й не відкидає рядки
+
+    def test_prepare_chunk_duplicates_are_per_zone(self):
+        chunk = self._chunk(self._lines([0, 0]))
+        chunk['DK_2_price_day_ahead'] = [60.0, 61.0]
+        for suffix in ('load_actual_entsoe_transparency', 'wind_generation_actual', 'solar_generation_actual'):
+            chunk[f'DK_2_{suffix}'] = 0.0
+        frame, dropped = prepare_chunk(chunk, ['DK_1', 'DK_2'])
+        self.assertEqual(dropped, 2)
+        self.assertEqual(frame[['zone', 'price']].values.tolist(), [['DK_1', 40.0], ['DK_2', 61.0]])
+
+    def test_reimport_updates_rows_in_place(self):
+        self._write(self.HEADER + self._lines(range(30)))
+        self.assertEqual(import_csv(self.path, chunksize=7)['rows_written'], 30)
+        ids = list(EnergyData.objects.order_by('timestamp').values_list('id', flat=True))
+
+        self._write(self.HEADER + self._lines(range(30), price=10.0))
+        stats = import_csv(self.path, chunksize=7)
+        self.assertEqual((stats['rows_written'], stats['chunks']), (30, 5))
+        self.assertEqual(list(EnergyData.objects.order_by('timestamp').values_list('id', flat=True)), ids)
+        self.assertEqual(self._prices(), [10.0 + hour for hour in range(30)])
+        day = EnergyRollup.objects.get(resolution='day', period_start=datetime(2024, 1, 2, tzinfo=timezone.utc))
+        self.assertEqual((day.price_max, day.sample_count), (39.0, 6))
+
+        # upsert_frame напряму: той самий рядок, нові значення, без нових записів
+        frame, _ = prepare_chunk(self._chunk(self._lines([3], price=-50.0)))
+        self.assertEqual(upsert_frame(frame), 1)
+        self.assertEqual(EnergyData.objects.count(), 30)
+        self.assertEqual(EnergyData.objects.get(id=ids[3]).price, -47.0)
+        self.assertEqual(upsert_frame(frame.iloc[:0]), 0)
+
+    def test_truncate_flag_replaces_existing_data(self):
+        self._write(self.HEADER + self._lines(range(30)))
+        call_command('fetch_energy_data', self.path, stdout=StringIO())
+        self.assertEqual(EnergyData.objects.count(), 30)
+
+        self._write(self.HEADER + self._lines(range(24, 34), price=0.0))
+        output = StringIO()
+        call_command('fetch_energy_data', self.path, truncate=True, stdout=output)
+        self.assertIn('Existing EnergyData records deleted.', output.getvalue())
+        self.assertEqual(self._prices(), [float(hour) for hour in range(24, 34)])
+        self.assertEqual(set(EnergyRollup.objects.filter(resolution='day').values_list('sample_count', flat=True)),
+                         {10})
+        self.assertEqual(IngestCheckpoint.objects.get().last_timestamp, datetime(2024, 1, 2, 9, tzinfo=timezone.utc))
+
+        # Без --truncate повторний імпорт лише оновлює рядки
+        call_command('fetch_energy_data', self.path, stdout=StringIO())
+        self.assertEqual(EnergyData.objects.count(), 10)
+        with self.assertRaises(CommandError):
+            call_command('fetch_energy_data', self.path, truncate=True, incremental=True, stdout=StringIO())
+
+
+class IncrementalImportTests(CsvImportTestCase):
+    def _import(self):
+        return import_csv_incremental(self.path, 'opsd', chunksize=10)
+
+    def test_appended_rows_are_read_from_saved_offset(self):
+        self._write(self.HEADER + self._lines(range(24)))
+        self.assertEqual(self._import()['mode'], 'full')
+        checkpoint = IngestCheckpoint.objects.get(source='opsd')
+        size = os.path.getsize(self.path)
+        self.assertEqual(checkpoint.byte_offset, size)
+        self.assertTrue(checkpoint.is_sorted)
+
+        self._write(self._lines(range(24, 30)), mode='a')
+        with mock.patch('core.ingest._read_chunks', wraps=ingest._read_chunks) as read_chunks:
+            stats = self._import()
+        self.assertEqual(read_chunks.call_args.args[1], size)  # Читання з кінця вже імпортованої частини
+        self.assertEqual((stats['mode'], stats['rows_read'], stats['rows_written'], stats['rows_skipped']),
+                         ('seek', 6, 6, 0))
+        self.assertEqual(self._prices(), [40.0 + hour for hour in range(30)])
+        checkpoint.refresh_from_db()
+        self.assertEqual(checkpoint.last_timestamp, datetime(2024, 1, 2, 5, tzinfo=timezone.utc))
+        self.assertEqual(checkpoint.byte_offset, os.path.getsize(self.path))
+
+    def test_rewritten_or_truncated_file_falls_back_to_scan(self):
+        self._write(self.HEADER + self._lines(range(24)))
+        self._import()
+
+        # Переписаний файл: останній імпортований рядок змінився, тож збережений зсув недійсний
+        self._write(self.HEADER + self._lines(range(26), price=10.0))
+        stats = self._import()
+        self.assertEqual((stats['mode'], stats['rows_read'], stats['rows_written'], stats['rows_skipped']),
+                         ('scan', 26, 2, 24))
+        self.assertEqual(self._prices()[22:], [62.0, 63.0, 34.0, 35.0])
+
+        # Обрізаний файл коротший за збережений зсув: нічого нового, high-water mark не відступає
+        self._write(self.HEADER + self._lines(range(12)))
+        stats = self._import()
+        self.assertEqual((stats['mode'], stats['rows_written'], stats['rows_skipped']), ('scan', 0, 12))
+        checkpoint = IngestCheckpoint.objects.get(source='opsd')
+        self.assertEqual(checkpoint.last_timestamp, datetime(2024, 1, 2, 1, tzinfo=timezone.utc))
+        self.assertEqual(EnergyData.objects.count(), 26)
+
+    def test_partial_trailing_line_is_imported_on_next_run(self):
+        complete = self.HEADER + self._lines(range(24))
+        last_line = self._lines([24])
+        self._write(complete + last_line[:25])  # Рядок, який ще дописується
+        stats = self._import()
+        self.assertEqual(stats['rows_written'], 24)
+        self.assertEqual(IngestCheckpoint.objects.get(source='opsd').byte_offset, len(complete))
+
+        self._write(last_line[25:] + self._lines([25]), mode='a')
+        stats = self._import()
+        self.assertEqual((stats['mode'], stats['rows_written']), ('seek', 2))
+        self.assertEqual(self._prices()[-2:], [64.0, 65.0])
+
+    def test_unsorted_rows_disable_seek(self):
+        self._write(self.HEADER + self._lines([*range(12), 20, *range(12, 20), *range(21, 24)]))
+        self._import()
+        self.assertFalse(IngestCheckpoint.objects.get(source='opsd').is_sorted)
+
+        self._write(self._lines(range(24, 27)), mode='a')
+        stats = self._import()
+        self.assertEqual((stats['mode'], stats['rows_written'], stats['rows_skipped']), ('scan', 3, 24))
+        self.assertEqual(self._prices(), [40.0 + hour for hour in range(27)])
+
+        # Відсортований файл, хвіст якого повертається в минуле: цей прохід ще читає зі зсуву,
+        # але наступний перечитує файл повністю
+        self._write(self.HEADER + self._lines(range(24)))
+        IngestCheckpoint.objects.all().delete()
+        self._import()
+        self._write(self._lines([5, 24]), mode='a')
+        stats = self._import()
+        self.assertEqual((stats['mode'], stats['rows_written'], stats['rows_skipped']), ('seek', 1, 1))
+        self.assertFalse(IngestCheckpoint.objects.get(source='opsd').is_sorted)
+        self._write(self._lines([25]), mode='a')
+        self.assertEqual(self._import()['mode'], 'scan')
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        # 2024-01-06 — субота: діапазон перетинає межу тижня в ніч на понеділок 2024-01-08
+        rng = np.random.default_rng(4)
+        hours = 10 * 24
+        self.frame = pd.DataFrame({
+            'zone': DEFAULT_ZONE,
+            'timestamp': pd.date_range('2024-01-06', periods=hours, freq='h', tz='UTC'),
+            'price': rng.normal(50, 15, hours).round(2),
+            'demand': rng.normal(1500, 200, hours).round(1),
+            'supply': np.nan,
+            'temperature': rng.normal(2, 3, hours).round(1),
+            'wind_generation': 300.0,
+            'solar_generation': 0.0,
+            'radiation_direct_horizontal': 0.0,
+            'radiation_diffuse_horizontal': 0.0,
+        })
+        upsert_frame(self.frame)
+        self.start = datetime(2024, 1, 6, tzinfo=timezone.utc)
+        self.end = datetime(2024, 1, 15, 23, tzinfo=timezone.utc)
+
+    def test_rollups_match_pandas_groupby(self):
+        for resolution in (RESOLUTION_DAY, RESOLUTION_WEEK):
+            with self.subTest(resolution=resolution):
+                expected = (
+                    self.frame.groupby(floor_period(self.frame['timestamp'], resolution))
+                    .agg(price_min=('price', 'min'), price=('price', 'mean'), price_max=('price', 'max'),
+                         demand=('demand', 'mean'), sample_count=('price', 'size'))
+                )
+                frame = rollup_frame(resolution, self.start, self.end).set_index('timestamp')
+                self.assertEqual(list(frame.index), list(expected.index))
+                for column in ('price_min', 'price', 'price_max', 'demand'):
+                    np.testing.assert_allclose(frame[column], expected[column])
+                self.assertTrue(frame['supply'].isna().all())
+
+                counts = EnergyRollup.objects.filter(resolution=resolution).order_by('period_start')
+                self.assertEqual(list(counts.values_list('sample_count', flat=True)), expected['sample_count'].tolist())
+
+    def test_weeks_start_on_monday(self):
+        weeks = list(EnergyRollup.objects.filter(resolution=RESOLUTION_WEEK).order_by('period_start')
+                     .values_list('period_start', 'sample_count'))
+        # Субота й неділя 6-7 січня належать тижню з понеділка 1 січня, понеділок 8 січня — новому тижню
+        self.assertEqual(weeks, [
+            (datetime(2024, 1, 1, tzinfo=timezone.utc), 48),
+            (datetime(2024, 1, 8, tzinfo=timezone.utc), 168),
+            (datetime(2024, 1, 15, tzinfo=timezone.utc), 24),
+        ])
+        self.assertTrue((floor_period(self.frame['timestamp'], RESOLUTION_WEEK).dt.dayofweek == 0).all())
+        # Початок діапазону в середині тижня захоплює весь тиждень
+        frame = rollup_frame(RESOLUTION_WEEK, datetime(2024, 1, 10, tzinfo=timezone.utc), self.end)
+        self.assertEqual(frame['timestamp'].tolist()[0], pd.Timestamp('2024-01-08', tz='UTC'))
+
+    def test_upsert_refreshes_only_touched_periods(self):
+        # Зіпсовані агрегати незачеплених періодів залишаються як є, тож видно, що їх не перераховано
+        untouched = EnergyRollup.objects.filter(period_start=datetime(2024, 1, 6, tzinfo=timezone.utc))
+        untouched.update(price_max=-1.0)
+        row = self.frame[self.frame['timestamp'] == pd.Timestamp('2024-01-10 05:00', tz='UTC')]
+        upsert_frame(row.assign(price=500.0))
+
+        self.assertEqual(set(untouched.values_list('price_max', flat=True)), {-1.0})
+        day = EnergyRollup.objects.get(resolution=RESOLUTION_DAY, period_start=datetime(2024, 1, 10, tzinfo=timezone.utc))
+        week = EnergyRollup.objects.get(resolution=RESOLUTION_WEEK, period_start=datetime(2024, 1, 8, tzinfo=timezone.utc))
+        self.assertEqual((day.price_max, day.sample_count), (500.0, 24))
+        self.assertEqual((week.price_max, week.sample_count), (500.0, 168))
+        self.assertEqual(EnergyRollup.objects.count(), 10 + 3)
+
+    def test_resolution_thresholds(self):
+        start = date(2024, 1, 1)
+        cases = [
+            (start, RESOLUTION_HOUR),
+            (start + timedelta(days=HOURLY_MAX_DAYS - 1), RESOLUTION_HOUR),
+            (start + timedelta(days=HOURLY_MAX_DAYS), RESOLUTION_DAY),
+            (start + timedelta(days=DAILY_MAX_DAYS - 1), RESOLUTION_DAY),
+            (start + timedelta(days=DAILY_MAX_DAYS), RESOLUTION_WEEK),
+        ]
+        for end, resolution in cases:
+            with self.subTest(days=(end - start).days + 1):
+                self.assertEqual(choose_resolution(start, end), resolution)
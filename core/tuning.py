@@ -0,0 +1,146 @@
+"""
+Пошук гіперпараметрів моделі цін на фолдах часового ряду.
+
+Кожна спроба (trial) навчає бустер на всіх фолдах з make_folds і отримує середню RMSE
+на тестових періодах. Спроби виконуються паралельно в пулі процесів; кожен процес відкриває
+ознаки через memmap і будує квантований QuantileDMatrix для фолду (та кількості бінів гістограми)
+лише один раз, після чого перевикористовує його в усіх своїх спробах.
+
+Модуль не імпортує Django: збереження спроб у таблицю виконує викликач через on_result.
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+
+from core.backtesting import open_arrays, save_arrays
+
+# Простір пошуку: (тип, межі). log — логарифмічно-рівномірний розподіл, choice — один зі значень
+SEARCH_SPACE = {
+    'max_depth': ('choice', [3, 4, 5, 6, 7, 8, 10]),
+    'learning_rate': ('log', (0.01, 0.3)),
+    'subsample': ('uniform', (0.5, 1.0)),
+    'colsample_bytree': ('uniform', (0.5, 1.0)),
+    'max_bin': ('choice', [64, 128, 256, 512]),
+}
+
+_worker_arrays = None
+_worker_matrices = {}  # (номер фолду, max_bin) -> (dtrain, dvalidation, dtest)
+
+
+def sample_params(rng, space=SEARCH_SPACE):
+    """
+    Випадкова точка простору пошуку (значення — звичайні типи Python, придатні для JSON).
+    """
+    params = {}
+    for name, (kind, values) in space.items():
+        if kind == 'choice':
+            params[name] = values[int(rng.integers(len(values)))]
+        elif kind == 'log':
+            params[name] = float(np.exp(rng.uniform(np.log(values[0]), np.log(values[1]))))
+        else:
+            params[name] = float(rng.uniform(*values))
+    return params
+
+
+def _open_arrays(directory):
+    global _worker_arrays
+    _worker_arrays = open_arrays(directory, ('X', 'y'))
+    _worker_matrices.clear()
+
+
+def _fold_matrices(fold, max_bin):
+    """
+    Квантовані матриці фолду: будуються один раз на процес і кількість бінів.
+    Валідаційна та тестова матриці використовують квантилі навчальної (ref).
+    """
+    key = (fold.number, max_bin)
+    if key not in _worker_matrices:
+        X, y = _worker_arrays['X'], _worker_arrays['y']
+        train = slice(fold.train_start, fold.validation_start)
+        validation = slice(fold.validation_start, fold.test_start)
+        test = slice(fold.test_start, fold.test_end)
+        dtrain = xgb.QuantileDMatrix(X[train], y[train], max_bin=max_bin)
+        _worker_matrices[key] = (
+            dtrain,
+            xgb.QuantileDMatrix(X[validation], y[validation], ref=dtrain, max_bin=max_bin),
+            xgb.QuantileDMatrix(X[test], y[test], ref=dtrain, max_bin=max_bin),
+        )
+    return _worker_matrices[key]
+
+
+def _run_trial(number, params, folds, base_params):
+    started = time.perf_counter()
+    booster_params = {**base_params, **params, 'tree_method': 'hist'}
+    num_boost_round = booster_params.pop('n_estimators')
+    early_stopping_rounds = booster_params.pop('early_stopping_rounds')
+
+    fold_rmse, fold_mae, best_iterations = [], [], []
+    for fold in folds:
+        dtrain, dvalidation, dtest = _fold_matrices(fold, params['max_bin'])
+        booster = xgb.train(
+            booster_params, dtrain,
+            num_boost_round=num_boost_round,
+            evals=[(dvalidation, 'validation')],
+            early_stopping_rounds=early_stopping_rounds,
+            verbose_eval=False,
+        )
+        predicted = booster.predict(dtest, iteration_range=(0, booster.best_iteration + 1))
+        errors = predicted - dtest.get_label()
+        fold_rmse.append(float(np.sqrt(np.mean(errors ** 2))))
+        fold_mae.append(float(np.mean(np.abs(errors))))
+        best_iterations.append(int(booster.best_iteration))
+
+    return {
+        'number': number,
+        'params': params,
+        'rmse': float(np.mean(fold_rmse)),
+        'mae': float(np.mean(fold_mae)),
+        'fold_rmse': fold_rmse,
+        'best_iterations': best_iterations,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def run_search(X, y, folds, trials, base_params, workers=None, on_result=None):
+    """
+    Виконує спроби trials ([(номер, параметри), ...]) на фолдах folds.
+    base_params — параметри у форматі XGBRegressor (n_estimators, early_stopping_rounds, objective, ...),
+    які перекриваються параметрами спроби. Кожна спроба отримує cpu_count // workers потоків,
+    тож пул не перевантажує ядра. Повертає результати в порядку trials.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(trials)))
+    base_params = {key: value for key, value in base_params.items() if key not in ('n_jobs', 'random_state')}
+    base_params['nthread'] = max(1, (os.cpu_count() or 1) // workers)
+    base_params['seed'] = 42
+
+    results = []
+
+    def collect(result):
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    with tempfile.TemporaryDirectory(prefix='tuning-') as directory:
+        save_arrays(directory, {
+            'X': np.ascontiguousarray(X, dtype=np.float32),
+            'y': np.asarray(y, dtype=np.float64),
+        })
+
+        if workers == 1:
+            _open_arrays(directory)
+            try:
+                for number, params in trials:
+                    collect(_run_trial(number, params, folds, base_params))
+            finally:
+                _worker_matrices.clear()
+            return results
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_open_arrays, initargs=(directory,)) as pool:
+            futures = [pool.submit(_run_trial, number, params, folds, base_params) for number, params in trials]
+            for future in futures:
+                collect(future.result())
+    return results
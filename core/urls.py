@@ -5,4 +5,5 @@ urlpatterns = [
     path('', views.index, name='index'),
     path('energy-list/', views.energy_list, name='energy_list'),
     path('energy-dashboard/', views.energy_dashboard, name='energy_dashboard'),
+    path('energy-dashboard/chart-data/', views.energy_dashboard_chart_data, name='energy_dashboard_chart_data'),
 ]
\ No newline at end of file
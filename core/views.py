@@ -1,12 +1,76 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render
-from django.http import HttpResponse
-from .models import EnergyData, PricePrediction
-import pandas as pd
-import json
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.utils.cache import patch_vary_headers
+from .models import DEFAULT_ZONE, EnergyData
+import numpy as np
+from functools import partial
+from django.core.paginator import EmptyPage, PageNotAnInteger
 from django.db.models import Q
 from datetime import datetime, timedelta, timezone
 from django.utils import timezone as django_timezone
+from urllib.parse import urlencode
+from .chart_payload import CONTENT_TYPE as CHART_PAYLOAD_CONTENT_TYPE, accepted_encoding, compress_payload, encode_chart_payload
+from .data_access import read_async, read_concurrently, read_frame
+from .data_cache import ENERGY_DATA_VERSION, PREDICTIONS_VERSION, acached_value, cached_count, cached_value
+from .downsampling import downsample_group
+from .predictions import run_predictions
+from .pagination import CachedCountPaginator, decode_cursor, keyset_paginate
+from .rollups import choose_resolution, floor_period, rollup_frame, RESOLUTION_HOUR, RESOLUTION_DAY, RESOLUTION_WEEK
+
+ENERGY_LIST_PAGE_SIZE = 50  # 50 записів на сторінку
+
+DEFAULT_MAX_POINTS = 1000
+MAX_POINTS_LIMIT = 20000
+
+DASHBOARD_FIELDS = [
+    'timestamp', 'price', 'demand', 'supply', 'temperature',
+    'wind_generation', 'solar_generation',
+    'radiation_direct_horizontal', 'radiation_diffuse_horizontal',
+]
+
+# Ряди кожного графіка дашборду; ряди одного графіка зменшуються разом
+CHART_SERIES = {
+    'price': ['prices_actual', 'prices_predicted', 'prices_p10', 'prices_p50', 'prices_p90'],
+    'demand_supply': ['demand', 'supply'],
+    'generation': ['wind_gen', 'solar_gen'],
+    'weather': ['temperature', 'rad_direct', 'rad_diffuse'],
+}
+
+# Квантилі симуляції Монте-Карло, що показуються смугою навколо прогнозу
+PREDICTION_BANDS = ['price_p10', 'price_p50', 'price_p90']
+
+RESOLUTION_LABELS = {
+    RESOLUTION_HOUR: 'погодинна',
+    RESOLUTION_DAY: 'денна (середні значення)',
+    RESOLUTION_WEEK: 'тижнева (середні значення)',
+}
+
+# Крок шкали часу графіків (секунди) для кожної роздільності
+RESOLUTION_STEPS = {
+    RESOLUTION_HOUR: 3600,
+    RESOLUTION_DAY: 24 * 3600,
+    RESOLUTION_WEEK: 7 * 24 * 3600,
+}
+
+
+def available_zones():
+    """
+    Зони, для яких є дані (кешується до наступного імпорту; DISTINCT читає лише індекс (zone, timestamp)).
+    """
+    return cached_value(
+        'zones', {}, lambda: list(EnergyData.objects.order_by('zone').values_list('zone', flat=True).distinct()),
+    )
+
+
+def _selected_zone(request, zones):
+    """
+    Зона з параметра ?zone=; невідома або відсутня — DEFAULT_ZONE (або перша зона з даними).
+    """
+    zone = request.GET.get('zone')
+    if zone in zones:
+        return zone
+    return DEFAULT_ZONE if DEFAULT_ZONE in zones or not zones else zones[0]
 
 
 def index(request):
@@ -14,7 +78,10 @@ def index(request):
 
 
 def energy_list(request):
-    energy_data_list = EnergyData.objects.all()
+    zones = available_zones()
+    zone = _selected_zone(request, zones)
+    # Усі фільтри й сортування працюють у межах зони: індекси починаються з zone
+    energy_data_list = EnergyData.objects.filter(zone=zone)
 
     # --- Фільтрація ---
     filters = {
@@ -26,11 +93,13 @@ def energy_list(request):
         'max_temp': request.GET.get('max_temp'),
         'sort_by': request.GET.get('sort_by', '-timestamp'),
     }
+    applied_filters = {'zone': zone}  # Нормалізовані фільтри, що реально застосовані (ключ кешу кількості)
 
     if filters['start_date']:
         try:
             start_datetime = datetime.strptime(filters['start_date'], '%Y-%m-%d')
             energy_data_list = energy_data_list.filter(timestamp__gte=start_datetime)
+            applied_filters['timestamp__gte'] = start_datetime
         except ValueError:
             pass
 
@@ -39,6 +108,7 @@ def energy_list(request):
             end_datetime = datetime.strptime(filters['end_date'], '%Y-%m-%d')
             end_datetime = end_datetime.replace(hour=23, minute=59, second=59)
             energy_data_list = energy_data_list.filter(timestamp__lte=end_datetime)
+            applied_filters['timestamp__lte'] = end_datetime
         except ValueError:
             pass
 
@@ -46,12 +116,14 @@ def energy_list(request):
         try:
             min_price = float(filters['min_price'])
             energy_data_list = energy_data_list.filter(price__gte=min_price)
+            applied_filters['price__gte'] = min_price
         except ValueError:
             pass
     if filters['max_price']:
         try:
             max_price = float(filters['max_price'])
             energy_data_list = energy_data_list.filter(price__lte=max_price)
+            applied_filters['price__lte'] = max_price
         except ValueError:
             pass
 
@@ -59,12 +131,14 @@ def energy_list(request):
         try:
             min_temp = float(filters['min_temp'])
             energy_data_list = energy_data_list.filter(temperature__gte=min_temp)
+            applied_filters['temperature__gte'] = min_temp
         except ValueError:
             pass
     if filters['max_temp']:
         try:
             max_temp = float(filters['max_temp'])
             energy_data_list = energy_data_list.filter(temperature__lte=max_temp)
+            applied_filters['temperature__lte'] = max_temp
         except ValueError:
             pass
 
@@ -75,49 +149,167 @@ def energy_list(request):
         'solar_generation', '-solar_generation', 'radiation_direct_horizontal',
         '-radiation_direct_horizontal', 'radiation_diffuse_horizontal', '-radiation_diffuse_horizontal'
     ]
-    if filters['sort_by'] in valid_sort_fields:
-        energy_data_list = energy_data_list.order_by(filters['sort_by'])
-    else:
-        energy_data_list = energy_data_list.order_by('-timestamp')
+    if filters['sort_by'] not in valid_sort_fields:
+        filters['sort_by'] = '-timestamp'
+    sort_by = filters['sort_by']
 
-    # --- Пагінація ---
-    paginator = Paginator(energy_data_list, 50)  # 50 записів на сторінку
-
-    page_number = request.GET.get('page')
-    try:
-        page_obj = paginator.page(page_number)
-    except PageNotAnInteger:
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
-
-    page_range_elided = paginator.get_elided_page_range(
-        number=page_obj.number,
-        on_each_side=2,
-        on_ends=1
-    )
+    # Кількість записів кешується до наступного імпорту, тож COUNT(*) не виконується на кожен запит
+    total_count = cached_count(energy_data_list, 'energy_list', applied_filters)
 
     get_copy = request.GET.copy()
-    if 'page' in get_copy:
-        del get_copy['page']
+    for param in ('page', 'after', 'before', 'last'):
+        get_copy.pop(param, None)
     query_string = get_copy.urlencode()
 
     context = {
-        'page_obj': page_obj,
+        'zone': zone,
+        'zones': zones,
         'filters': filters,
         'query_string': query_string,
-        'page_range_elided': page_range_elided,
+        'total_count': total_count,
     }
+
+    # --- Пагінація ---
+    if request.GET.get('pagination') == 'pages':
+        # Класична пагінація за номером сторінки (OFFSET) — для переходу на довільну сторінку
+        energy_data_list = energy_data_list.order_by(sort_by, '-timestamp' if sort_by.startswith('-') else 'timestamp')
+        paginator = CachedCountPaginator(energy_data_list, ENERGY_LIST_PAGE_SIZE, count=total_count)
+
+        page_number = request.GET.get('page')
+        try:
+            page_obj = paginator.page(page_number)
+        except PageNotAnInteger:
+            page_obj = paginator.page(1)
+        except EmptyPage:
+            page_obj = paginator.page(paginator.num_pages)
+        # Кількість відома, тож paginator.page не звертається до бази; кешуються лише записи сторінки
+        page_rows = page_obj.object_list
+        page_obj.object_list = cached_value(
+            'energy_list:page', {**applied_filters, 'sort_by': sort_by, 'page': page_obj.number},
+            lambda: list(page_rows),
+        )
+
+        context['page_obj'] = page_obj
+        context['page_range_elided'] = paginator.get_elided_page_range(
+            number=page_obj.number,
+            on_each_side=2,
+            on_ends=1
+        )
+        return render(request, 'core/energy_list.html', context)
+
+    # Keyset-пагінація (за замовчуванням): сторінка визначається курсором (значення, timestamp)
+    # останнього/першого запису, тому затримка не залежить від глибини сторінки
+    try:
+        after = decode_cursor(request.GET['after']) if request.GET.get('after') else None
+        before = decode_cursor(request.GET['before']) if request.GET.get('before') else None
+    except ValueError:
+        after = before = None
+
+    last = bool(request.GET.get('last'))
+    page_obj = cached_value(
+        'energy_list:keyset',
+        {**applied_filters, 'sort_by': sort_by, 'after': after, 'before': before, 'last': last},
+        lambda: keyset_paginate(
+            energy_data_list, sort_by, ENERGY_LIST_PAGE_SIZE, after=after, before=before, last=last,
+        ),
+    )
+
+    base_query = f"?{query_string}&" if query_string else '?'
+    context.update({
+        'page_obj': page_obj,
+        'keyset': True,
+        'first_url': base_query.rstrip('&?') or '?',
+        'last_url': f"{base_query}{urlencode({'last': 1})}",
+        'next_url': f"{base_query}{urlencode({'after': page_obj.next_cursor})}" if page_obj.has_next else None,
+        'previous_url': (f"{base_query}{urlencode({'before': page_obj.previous_cursor})}"
+                         if page_obj.has_previous else None),
+    })
     return render(request, 'core/energy_list.html', context)
 
 
-def energy_dashboard(request):
+def _dashboard_params(request):
+    """
+    Нормалізовані параметри дашборду (некоректні дати відкидаються) — також ключ кешу.
+    """
+    user_start_date = _parse_date_param(request.GET.get('start_date'))
+    user_end_date = _parse_date_param(request.GET.get('end_date'))
+
+    # Максимальна кількість точок на ряд графіка (0 вимикає зменшення)
+    max_points = DEFAULT_MAX_POINTS
+    if request.GET.get('max_points'):
+        try:
+            max_points = min(max(int(request.GET['max_points']), 0), MAX_POINTS_LIMIT)
+        except ValueError:
+            pass
+    return user_start_date, user_end_date, max_points
+
+
+async def energy_dashboard(request):
     # --- Фільтрація для дашборду ---
-    user_start_date_str = request.GET.get('start_date')
-    user_end_date_str = request.GET.get('end_date')
+    user_start_date, user_end_date, max_points = _dashboard_params(request)
+    zones = await read_async(available_zones)
+    zone = _selected_zone(request, zones)
+
+    # Контекст змінюється лише після імпорту або перенавчання, тож кешується за версіями обох наборів даних
+    context = await acached_value(
+        'energy_dashboard',
+        {'zone': zone, 'start_date': user_start_date, 'end_date': user_end_date, 'max_points': max_points},
+        lambda: _dashboard_context(user_start_date, user_end_date, max_points, zone),
+        names=(ENERGY_DATA_VERSION, PREDICTIONS_VERSION),
+    )
+    context = {**context, 'zones': zones}
+    return await sync_to_async(render, thread_sensitive=False)(request, 'core/energy_dashboard.html', context)
+
 
-    # Отримуємо останню доступну дату з фактичних даних (якщо є)
-    last_actual_data_timestamp = EnergyData.objects.order_by('-timestamp').values_list('timestamp', flat=True).first()
+async def energy_dashboard_chart_data(request):
+    """
+    Ряди графіків дашборду у двійковому форматі core.chart_payload (стиснення за Accept-Encoding).
+    Шаблон дашборду завантажує їх окремим запитом із тими ж параметрами.
+    """
+    user_start_date, user_end_date, max_points = _dashboard_params(request)
+    zones = await read_async(available_zones)
+    zone = _selected_zone(request, zones)
+    encoding = accepted_encoding(request.headers.get('Accept-Encoding'))
+
+    # Кешується вже стиснене тіло, тож повторний запит не стискає його знову
+    try:
+        body = await acached_value(
+            'energy_dashboard:chart_data',
+            {'zone': zone, 'start_date': user_start_date, 'end_date': user_end_date, 'max_points': max_points,
+             'encoding': encoding},
+            lambda: _chart_data(user_start_date, user_end_date, max_points, zone, encoding),
+            names=(ENERGY_DATA_VERSION, PREDICTIONS_VERSION),
+        )
+    except ValueError as e:
+        # Мітки, які не лягають на шкалу роздільності, не можна закодувати (encode_chart_payload)
+        return HttpResponseBadRequest(str(e), content_type='text/plain')
+    response = HttpResponse(body, content_type=CHART_PAYLOAD_CONTENT_TYPE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def _parse_date_param(value):
+    if value:
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    return None
+
+
+def _last_actual_timestamp(zone):
+    """
+    Остання доступна дата фактичних даних зони (або None).
+    """
+    return EnergyData.objects.filter(zone=zone).order_by('-timestamp').values_list('timestamp', flat=True).first()
+
+
+def _dashboard_range(last_actual_data_timestamp, user_start_date, user_end_date):
+    """
+    Діапазон дат дашборду: задані користувачем дати, а замість відсутніх — дефолт від останніх фактичних даних.
+    """
     if last_actual_data_timestamp:
         # Для дефолту показуємо останні 30 днів фактичних даних + 7 днів прогнозів
         default_end_date = last_actual_data_timestamp.date() + timedelta(days=7)  # Включаємо прогнози
@@ -128,157 +320,187 @@ def energy_dashboard(request):
         default_end_date = datetime(2019, 12, 31).date()
         default_start_date = default_end_date - timedelta(days=30)
 
-    start_date_obj = default_start_date
-    end_date_obj = default_end_date
+    return user_start_date or default_start_date, user_end_date or default_end_date
 
-    # Обробка вхідних даних від користувача
-    if user_start_date_str:
-        try:
-            start_date_obj = datetime.strptime(user_start_date_str, '%Y-%m-%d').date()
-        except ValueError:
-            pass
 
-    if user_end_date_str:
-        try:
-            end_date_obj = datetime.strptime(user_end_date_str, '%Y-%m-%d').date()
-        except ValueError:
-            pass
+def _datetime_bounds(start_date_obj, end_date_obj):
+    return (datetime.combine(start_date_obj, datetime.min.time(), tzinfo=timezone.utc),
+            datetime.combine(end_date_obj, datetime.max.time(), tzinfo=timezone.utc))
 
-    # Передаємо фактичні дати, за якими відбувається фільтрація, в шаблон
-    dashboard_filters = {
-        'start_date': start_date_obj.isoformat(),
-        'end_date': end_date_obj.isoformat(),
-    }
-
-    # Отримуємо дані з бази даних за вказаним/дефолтним діапазоном
-    start_datetime_filter = datetime.combine(start_date_obj, datetime.min.time(), tzinfo=timezone.utc)
-    end_datetime_filter = datetime.combine(end_date_obj, datetime.max.time(), tzinfo=timezone.utc)
 
-    # Завантажуємо фактичні дані
-    energy_data_qs = EnergyData.objects.filter(
-        timestamp__gte=start_datetime_filter,
-        timestamp__lte=end_datetime_filter
-    ).order_by('timestamp')
+def _dashboard_actuals(zone, start_date_obj, end_date_obj):
+    """
+    Фактичні дані зони за діапазон: погодинні записи або, для довгих діапазонів, денні/тижневі агрегати,
+    щоб кількість точок залишалася обмеженою.
+    """
+    start_datetime_filter, end_datetime_filter = _datetime_bounds(start_date_obj, end_date_obj)
+    resolution = choose_resolution(start_date_obj, end_date_obj)
+    if resolution == RESOLUTION_HOUR:
+        energy_data_qs = EnergyData.objects.filter(
+            zone=zone,
+            timestamp__gte=start_datetime_filter,
+            timestamp__lte=end_datetime_filter
+        ).order_by('timestamp')
+        return read_frame(energy_data_qs, DASHBOARD_FIELDS)
+    return rollup_frame(resolution, start_datetime_filter, end_datetime_filter, zone)
 
-    df_actual = pd.DataFrame(list(energy_data_qs.values(
-        'timestamp', 'price', 'demand', 'supply', 'temperature',
-        'wind_generation', 'solar_generation',
-        'radiation_direct_horizontal', 'radiation_diffuse_horizontal'
-    )))
 
-    # Завантажуємо прогнозовані дані
-    prediction_data_qs = PricePrediction.objects.filter(
+def _dashboard_predictions(zone, start_date_obj, end_date_obj):
+    start_datetime_filter, end_datetime_filter = _datetime_bounds(start_date_obj, end_date_obj)
+    # Дашборд показує прогнози поточного запуску зони
+    prediction_data_qs = run_predictions(zone).filter(
         timestamp__gte=start_datetime_filter,
         timestamp__lte=end_datetime_filter
     ).order_by('timestamp')
-
-    df_predictions = pd.DataFrame(list(prediction_data_qs.values()))
-
-    # Об'єднуємо фактичні та прогнозовані дані для відображення на графіку цін
-    # Перевіряємо, чи df_predictions не порожній, перш ніж вибирати стовпці
-    df_combined_prices = pd.DataFrame()  # Створюємо порожній DataFrame за замовчуванням
-    if not df_predictions.empty:
-        # Переконаємось, що 'predicted_price' та 'timestamp' існують
-        if 'predicted_price' in df_predictions.columns and 'timestamp' in df_predictions.columns:
-            df_combined_prices = pd.merge(
-                df_actual[['timestamp', 'price']],
-                df_predictions[['timestamp', 'predicted_price']],
-                on='timestamp',
-                how='left'
-            )
-        else:
-            # Якщо прогнозовані дані є, але не мають потрібних стовпців (хоча не повинні)
-            df_combined_prices = df_actual[['timestamp', 'price']].copy()
-            df_combined_prices['predicted_price'] = None  # Додаємо порожній стовпець
-
+    return read_frame(prediction_data_qs, ['timestamp', 'predicted_price', 'recommendation', *PREDICTION_BANDS])
+
+
+async def _read_dashboard_data(zone, user_start_date, user_end_date, *frame_readers):
+    """
+    Діапазон дат дашборду, останній timestamp фактичних даних і результати frame_readers(zone, start, end).
+    Незалежні читання з бази виконуються одночасно.
+    """
+    if user_start_date and user_end_date:
+        # Діапазон заданий повністю: останній timestamp не потрібен для його обчислення
+        start_date_obj, end_date_obj = user_start_date, user_end_date
+        last_actual_data_timestamp, *frames = await read_concurrently(
+            partial(_last_actual_timestamp, zone),
+            *(partial(reader, zone, start_date_obj, end_date_obj) for reader in frame_readers),
+        )
     else:
-        # Якщо df_predictions порожній, тоді df_combined_prices містить лише фактичні ціни
-        df_combined_prices = df_actual[['timestamp', 'price']].copy()
-        df_combined_prices['predicted_price'] = None  # Додаємо порожній стовпець, щоб уникнути KeyError
-
-    labels = []
-    prices_actual = []
-    prices_predicted = []
-    demand = []
-    supply = []
-    wind_gen = []
-    solar_gen = []
-    temperature = []
-    rad_direct = []
-    rad_diffuse = []
-    recommendations = []
+        last_actual_data_timestamp = await read_async(partial(_last_actual_timestamp, zone))
+        start_date_obj, end_date_obj = _dashboard_range(last_actual_data_timestamp, user_start_date, user_end_date)
+        frames = await read_concurrently(
+            *(partial(reader, zone, start_date_obj, end_date_obj) for reader in frame_readers),
+        )
+    return start_date_obj, end_date_obj, last_actual_data_timestamp, frames
+
+
+async def _dashboard_context(user_start_date, user_end_date, max_points, zone=DEFAULT_ZONE):
+    """
+    Обчислює контекст дашборду зони: рекомендації та параметри запиту рядів графіків
+    (ряди завантажує сам шаблон з energy_dashboard_chart_data). Обчислення pandas
+    виконуються в пулі потоків, тож цикл подій не блокується.
+    """
+    start_date_obj, end_date_obj, last_actual_data_timestamp, (df_predictions,) = await _read_dashboard_data(
+        zone, user_start_date, user_end_date, _dashboard_predictions,
+    )
+    return await sync_to_async(_build_dashboard_context, thread_sensitive=False)(
+        zone, start_date_obj, end_date_obj, max_points, last_actual_data_timestamp, df_predictions,
+    )
 
-    if not df_actual.empty:
-        df_actual['timestamp'] = pd.to_datetime(df_actual['timestamp'])
-        labels = df_actual['timestamp'].dt.strftime('%Y-%m-%d %H:%M').tolist()
 
-        # Використовуємо df_actual для цих даних
-        demand = df_actual['demand'].fillna(0).tolist()
-        if 'supply' in df_actual.columns:
-            # Щоб уникнути FutureWarning, явно перетворюємо в float, якщо стовпець існує
-            supply = df_actual['supply'].astype(float).fillna(0).tolist()
-        else:
-            supply = [0] * len(df_actual)
+async def _chart_data(user_start_date, user_end_date, max_points, zone, encoding):
+    """
+    Тіло відповіді energy_dashboard_chart_data: закодовані (і стиснені encoding) ряди графіків.
+    """
+    start_date_obj, end_date_obj, _, (df_actual, df_predictions) = await _read_dashboard_data(
+        zone, user_start_date, user_end_date, _dashboard_actuals, _dashboard_predictions,
+    )
+    return await sync_to_async(_encode_chart_data, thread_sensitive=False)(
+        start_date_obj, end_date_obj, max_points, df_actual, df_predictions, encoding,
+    )
 
-        wind_gen = df_actual['wind_generation'].fillna(0).tolist()
-        solar_gen = df_actual['solar_generation'].fillna(0).tolist()
-        temperature = df_actual['temperature'].fillna(0).tolist()
-        rad_direct = df_actual['radiation_direct_horizontal'].fillna(0).tolist()
-        rad_diffuse = df_actual['radiation_diffuse_horizontal'].fillna(0).tolist()
 
-        df_combined_prices['timestamp'] = pd.to_datetime(df_combined_prices['timestamp'])
-        price_map = df_combined_prices.set_index('timestamp').to_dict('index')
+def _encode_chart_data(start_date_obj, end_date_obj, max_points, df_actual, df_predictions, encoding=None):
+    resolution = choose_resolution(start_date_obj, end_date_obj)
+    charts = _dashboard_charts(resolution, max_points, df_actual, df_predictions)
+    return compress_payload(encode_chart_payload(charts, RESOLUTION_STEPS[resolution]), encoding)
+
+
+def _dashboard_charts(resolution, max_points, df_actual, df_predictions):
+    """
+    Ряди графіків дашборду після LTTB з уже прочитаних даних: {графік: (часові мітки, {ряд: значення})}.
+    """
+    # Прогнози для графіка агрегуються до тієї ж роздільності, що й фактичні дані
+    price_columns = ['predicted_price', *PREDICTION_BANDS]
+    df_predictions_chart = df_predictions[['timestamp', *price_columns]]
+    if resolution != RESOLUTION_HOUR and not df_predictions.empty:
+        df_predictions_chart = (
+            df_predictions_chart.assign(timestamp=floor_period(df_predictions['timestamp'], resolution))
+            .groupby('timestamp', as_index=False)[price_columns].mean()
+        )
+
+    # Графік цін має власну шкалу часу — об'єднання міток фактичних даних і прогнозів,
+    # щоб години горизонту прогнозу після останніх фактичних даних теж відображались
+    df_prices = df_actual[['timestamp', 'price']].merge(
+        df_predictions_chart,
+        on='timestamp',
+        how='outer',
+    ).sort_values('timestamp', ignore_index=True)
+    timelines = {chart: df_actual['timestamp'] for chart in CHART_SERIES}
+    timelines['price'] = df_prices['timestamp']
+
+    # Ціни без даних передаються як NaN (розрив лінії), інші ряди — з нулями замість пропусків
+    series = {
+        'prices_actual': df_prices['price'].to_numpy(dtype=float),
+        'prices_predicted': df_prices['predicted_price'].to_numpy(dtype=float),
+        'prices_p10': df_prices['price_p10'].to_numpy(dtype=float),
+        'prices_p50': df_prices['price_p50'].to_numpy(dtype=float),
+        'prices_p90': df_prices['price_p90'].to_numpy(dtype=float),
+        'demand': df_actual['demand'].astype(float).fillna(0).to_numpy(),
+        'supply': df_actual['supply'].astype(float).fillna(0).to_numpy(),
+        'wind_gen': df_actual['wind_generation'].astype(float).fillna(0).to_numpy(),
+        'solar_gen': df_actual['solar_generation'].astype(float).fillna(0).to_numpy(),
+        'temperature': df_actual['temperature'].astype(float).fillna(0).to_numpy(),
+        'rad_direct': df_actual['radiation_direct_horizontal'].astype(float).fillna(0).to_numpy(),
+        'rad_diffuse': df_actual['radiation_diffuse_horizontal'].astype(float).fillna(0).to_numpy(),
+    }
 
-        for ts_label in labels:
-            # Парсимо ts_label, додаючи UTC timezone, якщо його немає
-            try:
-                ts_obj = datetime.strptime(ts_label, '%Y-%m-%dT%H:%M:%S%z')
-            except ValueError:
-                ts_obj = datetime.strptime(ts_label, '%Y-%m-%d %H:%M').replace(tzinfo=timezone.utc)
+    # Зменшуємо кількість точок кожного графіка (LTTB) зі збереженням піків.
+    # Ряди одного графіка отримують спільні мітки осі X.
+    charts = {}
+    for chart, names in CHART_SERIES.items():
+        indices = downsample_group([series[name] for name in names], max_points)
+        charts[chart] = (timelines[chart].iloc[indices], {name: series[name][indices] for name in names})
+    return charts
 
-            actual_p = price_map.get(ts_obj, {}).get('price')
-            prices_actual.append(actual_p if pd.notna(actual_p) else None)
 
-            predicted_p = price_map.get(ts_obj, {}).get('predicted_price')
-            prices_predicted.append(predicted_p if pd.notna(predicted_p) else None)
+def _build_dashboard_context(zone, start_date_obj, end_date_obj, max_points, last_actual_data_timestamp,
+                             df_predictions):
+    """
+    Рекомендації за днями з уже прочитаних прогнозів (без звернень до бази) та параметри сторінки.
+    """
+    # Передаємо фактичні дати, за якими відбувається фільтрація, в шаблон
+    dashboard_filters = {
+        'start_date': start_date_obj.isoformat(),
+        'end_date': end_date_obj.isoformat(),
+        'max_points': max_points,
+    }
+    resolution = choose_resolution(start_date_obj, end_date_obj)
 
     # Отримуємо рекомендації з прогнозованих даних за період дашборду
+    recommendations = []
     if not df_predictions.empty:
-        df_predictions['timestamp'] = pd.to_datetime(df_predictions['timestamp'])
-        daily_recommendations = {}
         # Фільтруємо рекомендації, щоб показувати лише майбутні або найближчі
         # Наприклад, тільки ті, що після останнього фактичного часу
         if last_actual_data_timestamp:
-            df_future_predictions = df_predictions[df_predictions['timestamp'] > last_actual_data_timestamp].copy()
+            df_future_predictions = df_predictions[df_predictions['timestamp'] > last_actual_data_timestamp]
         else:
-            df_future_predictions = df_predictions.copy()  # Якщо немає фактичних, показуємо всі прогнози
+            df_future_predictions = df_predictions  # Якщо немає фактичних, показуємо всі прогнози
 
         if not df_future_predictions.empty:
-            for _, row in df_future_predictions.iterrows():
-                day_str = row['timestamp'].strftime('%Y-%m-%d')
-                if day_str not in daily_recommendations:
-                    daily_recommendations[day_str] = []
-                daily_recommendations[day_str].append(
-                    f"{row['timestamp'].strftime('%H:%M')}: {row['recommendation']} (Прогноз: {row['predicted_price']:.2f} EUR/MWh)"
-                )
-
-            # Сортуємо дні для послідовного відображення
-            for day_key in sorted(daily_recommendations.keys()):
-                recommendations.append({'day': day_key, 'recs': daily_recommendations[day_key]})
+            timestamps = df_future_predictions['timestamp']
+            rec_texts = (
+                timestamps.dt.strftime('%H:%M') + ': '
+                + df_future_predictions['recommendation'].fillna('None').astype(str)
+                + ' (Прогноз: '
+                + np.char.mod('%.2f', df_future_predictions['predicted_price'].to_numpy(dtype=float))
+                + ' EUR/MWh)'
+            )
+            # Групуємо за днем (groupby сортує дні для послідовного відображення)
+            daily_recommendations = rec_texts.groupby(timestamps.dt.strftime('%Y-%m-%d')).agg(list)
+            recommendations = [
+                {'day': day_key, 'recs': recs} for day_key, recs in daily_recommendations.items()
+            ]
 
     context = {
-        'labels': json.dumps(labels),
-        'prices_actual': json.dumps(prices_actual),
-        'prices_predicted': json.dumps(prices_predicted),
-        'demand': json.dumps(demand),
-        'supply': json.dumps(supply),
-        'wind_gen': json.dumps(wind_gen),
-        'solar_gen': json.dumps(solar_gen),
-        'temperature': json.dumps(temperature),
-        'rad_direct': json.dumps(rad_direct),
-        'rad_diffuse': json.dumps(rad_diffuse),
+        'zone': zone,
         'dashboard_filters': dashboard_filters,
+        # Ряди графіків запитуються з уже обчисленим діапазоном, тож обидва запити бачать ті самі дати
+        'chart_data_query': urlencode({'zone': zone, **dashboard_filters}),
         'data_period_info': f"{dashboard_filters['start_date']} - {dashboard_filters['end_date']}",
+        'resolution_label': RESOLUTION_LABELS[resolution],
         'recommendations': recommendations
     }
-    return render(request, 'core/energy_dashboard.html', context)
\ No newline at end of file
+    return context